@@ -0,0 +1,159 @@
+# =============================================================================
+# ESCRITOR ÚNICO POR SALA (ACTOR ASYNCIO) E INSTANTÁNEAS DE LECTURA
+# =============================================================================
+#
+# Las mutaciones de una sala (cantar, cambiar de idioma, cargar, reiniciar...)
+# se encolan en su actor y se ejecutan de a una, en orden de llegada, en un
+# hilo aparte: dos peticiones concurrentes ya no compiten por
+# idioma_actual_idx, palabras_cantadas ni las marcas de los cartones.
+# Tras cada mutación el actor publica una Instantanea inmutable con los
+# cuerpos de las lecturas frecuentes ya construidos: los lectores los toman
+# sin bloqueo y sin pasar por la cola, aunque se esté cantando sin pausa.
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from game_manager import GameManager
+from config import LECTURAS_CALIENTES_SEG, MAX_CUERPOS_INSTANTANEA
+
+Construir = Callable[["Instantanea"], bytes]
+
+
+class Instantanea:
+    """
+    Modelo de lectura de una versión del juego. Los cuerpos que los lectores
+    pidieron hace poco se construyen antes de publicarla; uno que falte lo
+    materializa el actor la primera vez y queda en `cuerpos` para los demás.
+    """
+    __slots__ = ("version", "anterior", "carga", "cuerpos")
+
+    def __init__(self, juego: GameManager, anterior: Optional["Instantanea"] = None):
+        self.version = juego.version
+        # Versión publicada justo antes (base de los deltas de los clientes al día)
+        self.anterior = anterior.version if anterior is not None else None
+        # La lista de jugadores se reemplaza en cada carga: identifica el mazo cargado
+        self.carga = juego.jugadores
+        self.cuerpos: Dict[Hashable, bytes] = {}
+
+
+class ActorSala:
+    """Cola de mutaciones de una sala con un único consumidor"""
+
+    def __init__(self, juego: Callable[[], GameManager]):
+        self._juego = juego
+        self._pendientes: deque = deque()
+        self._tarea: Optional[asyncio.Task] = None
+        # Lecturas pedidas hace poco: clave -> (construir, última petición, depende solo de la carga)
+        self._calientes: "OrderedDict[Hashable, Tuple[Construir, float, bool]]" = OrderedDict()
+        self._candado = threading.Lock()
+        self.instantanea = Instantanea(juego())
+
+    def publicar(self):
+        """
+        Nueva instantánea con el estado actual (después de cada mutación). Se
+        completa con las lecturas calientes antes de reemplazar a la vigente.
+        """
+        anterior = self.instantanea
+        nueva = Instantanea(self._juego(), anterior)
+        misma_carga = nueva.carga is anterior.carga and len(nueva.carga) == len(anterior.carga)
+        for clave, construir, por_carga in self._vigentes():
+            if por_carga:
+                # Duplicados, similares...: no cambian al cantar, se heredan
+                cuerpo = anterior.cuerpos.get(clave) if misma_carga else None
+                if cuerpo is not None:
+                    nueva.cuerpos[clave] = cuerpo
+                continue
+            try:
+                nueva.cuerpos[clave] = construir(nueva)
+            except Exception:
+                # P. ej. un jugador que ya no existe: lo responde el actor si se vuelve a pedir
+                continue
+        self.instantanea = nueva
+
+    def anotar(self, clave: Hashable, construir: Construir, por_carga: bool = False):
+        """Marca la lectura como caliente: las próximas instantáneas la traerán construida"""
+        with self._candado:
+            self._calientes[clave] = (construir, time.monotonic(), por_carga)
+            self._calientes.move_to_end(clave)
+            if len(self._calientes) > MAX_CUERPOS_INSTANTANEA:
+                self._calientes.popitem(last=False)
+
+    def _vigentes(self) -> List[Tuple[Hashable, Construir, bool]]:
+        limite = time.monotonic() - LECTURAS_CALIENTES_SEG
+        with self._candado:
+            # Orden de última petición: las que nadie pide hace rato están al principio
+            while self._calientes and next(iter(self._calientes.values()))[1] < limite:
+                self._calientes.popitem(last=False)
+            return [(clave, construir, por_carga) for clave, (construir, _, por_carga) in self._calientes.items()]
+
+    async def ejecutar(self, mutacion: Callable[[], Any]) -> Any:
+        """Ejecuta la mutación cuando le toque y retorna su resultado (o propaga su excepción)"""
+        return await self._encolar(mutacion, True)
+
+    async def consultar(
+        self, clave: Hashable, construir: Construir, por_carga: bool = False
+    ) -> Tuple[Instantanea, bytes]:
+        """
+        Cuerpo de respuesta de la instantánea vigente, sin pasar por la cola si
+        ya está construido. Si no, lo construye el actor, así nunca se lee un
+        juego a medio mutar. `por_carga`: el cuerpo solo depende del mazo cargado.
+        """
+        self.anotar(clave, construir, por_carga)
+        instantanea = self.instantanea
+        cuerpo = instantanea.cuerpos.get(clave)
+        if cuerpo is not None:
+            return instantanea, cuerpo
+        return await self._encolar(lambda: self._materializar(clave, construir), False)
+
+    def _materializar(self, clave: Hashable, construir: Construir) -> Tuple[Instantanea, bytes]:
+        # Dentro del actor la instantánea vigente corresponde al juego actual
+        instantanea = self.instantanea
+        cuerpo = instantanea.cuerpos.get(clave)
+        if cuerpo is None:
+            cuerpo = construir(instantanea)
+            if len(instantanea.cuerpos) >= MAX_CUERPOS_INSTANTANEA:
+                instantanea.cuerpos.clear()
+            instantanea.cuerpos[clave] = cuerpo
+        return instantanea, cuerpo
+
+    async def _encolar(self, funcion: Callable[[], Any], publicar: bool) -> Any:
+        bucle = asyncio.get_running_loop()
+        if self._tarea is not None and self._tarea.get_loop() is not bucle:
+            # El event loop anterior ya no existe (p. ej. otro cliente de pruebas)
+            self._pendientes.clear()
+            self._tarea = None
+        futuro = bucle.create_future()
+        self._pendientes.append((funcion, publicar, futuro))
+        if self._tarea is None:
+            self._tarea = bucle.create_task(self._atender())
+        return await futuro
+
+    async def _atender(self):
+        """Consume la cola y termina al vaciarla (una sala sin actividad no deja tareas)"""
+        try:
+            while self._pendientes:
+                funcion, publicar, futuro = self._pendientes.popleft()
+                if futuro.cancelled():
+                    # El cliente se desconectó antes de que empezara
+                    continue
+                try:
+                    resultado = await asyncio.to_thread(self._aplicar, funcion, publicar)
+                except Exception as e:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                else:
+                    if not futuro.done():
+                        futuro.set_result(resultado)
+        finally:
+            if self._tarea is asyncio.current_task():
+                self._tarea = None
+
+    def _aplicar(self, funcion: Callable[[], Any], publicar: bool) -> Any:
+        try:
+            return funcion()
+        finally:
+            if publicar:
+                self.publicar()
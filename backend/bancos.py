@@ -0,0 +1,71 @@
+# =============================================================================
+# REGISTRO DE BANCOS COMPILADOS (CONJUNTOS HASH + IDS POR IDIOMA)
+# =============================================================================
+
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from serializacion import dumps
+from config import BANCO_PALABRAS
+
+
+class BancoCompilado:
+    """
+    Banco de un idioma listo para consultas O(1).
+    - palabras: frozenset para pertenencia
+    - ids: palabra -> id entero (orden alfabético, estable)
+    - lista: tupla ordenada para muestreo aleatorio e id -> palabra
+    """
+    __slots__ = ("idioma", "palabras", "ids", "lista")
+
+    def __init__(self, idioma: str, palabras: List[str]):
+        self.idioma = idioma
+        self.lista: Tuple[str, ...] = tuple(sorted(set(palabras)))
+        self.palabras: FrozenSet[str] = frozenset(self.lista)
+        self.ids: Dict[str, int] = {p: i for i, p in enumerate(self.lista)}
+
+    def __contains__(self, palabra: str) -> bool:
+        return palabra in self.palabras
+
+    def __len__(self) -> int:
+        return len(self.lista)
+
+
+class RegistroBancos:
+    """
+    Compila los bancos una sola vez por idioma y los comparte entre
+    validación de carga, canto de palabras y generación aleatoria.
+    Los bancos personalizados tienen prioridad sobre BANCO_PALABRAS.
+    """
+
+    def __init__(self, personalizados: Optional[Dict[str, List[str]]] = None):
+        self.configurar(personalizados or {})
+
+    def configurar(self, personalizados: Dict[str, List[str]]):
+        """Reemplaza los bancos personalizados e invalida lo compilado"""
+        self.personalizados = personalizados
+        self._compilados: Dict[str, Optional[BancoCompilado]] = {}
+        self._json: Optional[bytes] = None
+
+    def json_publico(self) -> bytes:
+        """Bancos que se envían al cliente (personalizados o BANCO_PALABRAS), serializados una vez"""
+        if self._json is None:
+            self._json = dumps(self.personalizados if self.personalizados else BANCO_PALABRAS)
+        return self._json
+
+    def tiene_personalizado(self, idioma: str) -> bool:
+        return idioma in self.personalizados
+
+    def banco(self, idioma: str) -> Optional[BancoCompilado]:
+        """Banco compilado del idioma (personalizado o predefinido), o None si no existe"""
+        if idioma not in self._compilados:
+            palabras = self.personalizados.get(idioma, BANCO_PALABRAS.get(idioma))
+            self._compilados[idioma] = BancoCompilado(idioma, palabras) if palabras is not None else None
+        return self._compilados[idioma]
+
+    def conjuntos_personalizados(self) -> Dict[str, FrozenSet[str]]:
+        """Conjuntos de los bancos personalizados (los únicos que se validan al cargar)"""
+        return {idioma: self.banco(idioma).palabras for idioma in self.personalizados}
+
+    def contiene(self, idioma: str, palabra: str) -> bool:
+        banco = self.banco(idioma)
+        return banco is not None and palabra in banco.palabras
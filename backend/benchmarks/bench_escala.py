@@ -0,0 +1,182 @@
+# =============================================================================
+# BENCHMARK DE ESCALA: CARGA, CANTO Y SERIALIZACIÓN DEL ESTADO
+# Uso: python benchmarks/bench_escala.py --tamanos 1000 10000 100000 --salida bench.json
+# =============================================================================
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_manager import GameManager
+from parser_cartones import leer_lineas_por_bloques
+from config import REGLAS_TAMANO, BANCO_PALABRAS, MOTORES_MARCADO
+from bancos import RegistroBancos
+from generador import bancos_para, bloques, lineas_cartones
+
+REGLAS_CARGA = {
+    codigo: {"max_palabras": tamano, "nombre": codigo}
+    for codigo, tamano in REGLAS_TAMANO.items()
+}
+REGLAS_REPARTO = ("minimo_uno", "uno_por_idioma")
+
+
+def _generar(n_cartones: int, ruta: str, semilla: int) -> float:
+    """Escribe el mazo con el generador vectorizado (n_cartones repartidos entre los idiomas)"""
+    reglas = dict(REGLAS_TAMANO)
+    por_idioma = max(1, n_cartones // len(reglas))
+    inicio = time.perf_counter()
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        for bloque in bloques(lineas_cartones(bancos_para(reglas, RegistroBancos({})), reglas, por_idioma, semilla)):
+            archivo.write(bloque)
+    return time.perf_counter() - inicio
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def _cargar(ruta: str, n_cartones: int, regla: str, motor: str) -> Dict:
+    """Carga el archivo en un GameManager nuevo y mide el tiempo"""
+    juego = GameManager(motor=motor, nivel_traza="off")
+    n_jugadores = max(1, n_cartones // (20 * len(REGLAS_TAMANO)))
+    with open(ruta, "rb") as archivo, contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        exito, mensaje, _ = juego.cargar_cartones_masivos(
+            leer_lineas_por_bloques(archivo), n_jugadores, REGLAS_CARGA, {}, regla
+        )
+        segundos = time.perf_counter() - inicio
+        juego.iniciar_juego()
+    if not exito:
+        raise RuntimeError(mensaje)
+    return {"juego": juego, "segundos": segundos, "n_jugadores": n_jugadores}
+
+
+def _cantar(juego: GameManager, rng: random.Random) -> Dict:
+    idioma = juego.orden_idiomas[juego.idioma_actual_idx]
+    return juego.cantar_palabra(rng.choice(BANCO_PALABRAS[idioma]))
+
+
+def medir_canto(juego: GameManager, n_palabras: int, semilla: int) -> Dict:
+    """Latencia por palabra cantada (sin llegar a ganador)"""
+    rng = random.Random(semilla)
+    tiempos = []
+    for _ in range(n_palabras):
+        if not juego.juego_activo:
+            break
+        inicio = time.perf_counter()
+        _cantar(juego, rng)
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        "palabras": len(tiempos),
+        "media_ms": statistics.mean(tiempos) * 1e3,
+        "p50_ms": _percentil(tiempos, 0.50) * 1e3,
+        "p95_ms": _percentil(tiempos, 0.95) * 1e3,
+        "max_ms": max(tiempos) * 1e3
+    }
+
+
+def medir_partida(juego: GameManager, semilla: int, max_cantos: int = 100_000) -> Dict:
+    """Partida completa hasta el primer ganador"""
+    rng = random.Random(semilla)
+    cantos = 0
+    inicio = time.perf_counter()
+    while juego.juego_activo and cantos < max_cantos:
+        resultado = _cantar(juego, rng)
+        cantos += 1
+    return {
+        "cantos": cantos,
+        "segundos": time.perf_counter() - inicio,
+        "ganadores": len(resultado.get("ganadores", [])) if cantos else 0
+    }
+
+
+def medir_estado(juego: GameManager) -> Dict:
+    """
+    Construcción y serialización JSON de get_estado_juego, contra get_estado_json
+    (primera llamada llena la caché de cada cartón; la segunda la reutiliza)
+    """
+    inicio = time.perf_counter()
+    estado = juego.get_estado_juego()
+    construir = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    texto = json.dumps(estado)
+    serializar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    juego.get_estado_json()
+    json_frio = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    cuerpo = juego.get_estado_json()
+    json_cache = time.perf_counter() - inicio
+    return {
+        "construir_ms": construir * 1e3,
+        "serializar_ms": serializar * 1e3,
+        "json_frio_ms": json_frio * 1e3,
+        "json_cache_ms": json_cache * 1e3,
+        "bytes": len(texto.encode("utf-8")),
+        "bytes_json": len(cuerpo)
+    }
+
+
+def ejecutar(tamanos: List[int], motor: str, n_palabras: int, semilla: int) -> List[Dict]:
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in tamanos:
+            ruta = os.path.join(directorio, f"cartones_{n}.txt")
+            generacion = _generar(n, ruta, semilla)
+            for regla in REGLAS_REPARTO:
+                carga = _cargar(ruta, n, regla, motor)
+                juego = carga["juego"]
+                fila = {
+                    "cartones": n,
+                    "regla": regla,
+                    "motor": motor,
+                    "jugadores": carga["n_jugadores"],
+                    "generacion_s": generacion,
+                    "carga_s": carga["segundos"],
+                    "canto": medir_canto(juego, n_palabras, semilla),
+                    "estado": medir_estado(juego)
+                }
+                # La partida completa parte de una carga nueva
+                fila["partida"] = medir_partida(_cargar(ruta, n, regla, motor)["juego"], semilla)
+                resultados.append(fila)
+                print(
+                    f"{n:>9} {regla:<15} carga={fila['carga_s']:.2f}s "
+                    f"canto_p50={fila['canto']['p50_ms']:.3f}ms "
+                    f"partida={fila['partida']['cantos']} cantos/{fila['partida']['segundos']:.2f}s "
+                    f"estado={fila['estado']['construir_ms'] + fila['estado']['serializar_ms']:.1f}ms "
+                    f"estado_cache={fila['estado']['json_cache_ms']:.1f}ms"
+                )
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de escala del GameManager")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--motor", choices=MOTORES_MARCADO, default="indice")
+    parser.add_argument("--palabras", type=int, default=50, help="Cantos medidos por tamaño")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="bench_resultados.json")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.tamanos, args.motor, args.palabras, args.semilla)
+    with open(args.salida, "w", encoding="utf-8") as salida:
+        json.dump({
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "resultados": resultados
+        }, salida, indent=2)
+    print(f"📄 Resultados en {args.salida}")
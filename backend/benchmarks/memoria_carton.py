@@ -0,0 +1,74 @@
+# =============================================================================
+# COMPARACIÓN DE MEMORIA: CARTON COMPACTO vs CARTON ORIGINAL
+# Uso: python benchmarks/memoria_carton.py [n_cartones]
+# =============================================================================
+
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Carton, Vocabularios
+from config import REGLAS_TAMANO, BANCO_PALABRAS
+
+
+class CartonLegado:
+    """Representación anterior: __dict__, lista de cadenas, set de marcas y contadores"""
+
+    def __init__(self, id_carton, idioma, palabras):
+        self.id = id_carton.upper()
+        self.idioma = idioma.upper()
+        self.palabras = sorted([p.upper() for p in palabras])
+        self.total_palabras = len(self.palabras)
+        self.aciertos = 0
+        self.palabras_marcadas = set()
+
+
+def _lineas(n: int, semilla: int = 7):
+    """Líneas sintéticas ya divididas, como las produce el parser (cadenas nuevas por cartón)"""
+    rng = random.Random(semilla)
+    idiomas = list(REGLAS_TAMANO)
+    for i in range(n):
+        idioma = idiomas[i % len(idiomas)]
+        palabras = rng.sample(BANCO_PALABRAS[idioma], REGLAS_TAMANO[idioma])
+        # Se copian las cadenas para imitar el resultado de str.split() sobre el archivo
+        yield f"{idioma}{i:06d}", idioma, [("" + p + " ")[:-1] for p in palabras]
+
+
+def medir(clase, n: int) -> int:
+    """Bytes retenidos por n cartones de la clase indicada"""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    if clase is Carton:
+        # Un mazo comparte los vocabularios de su carga
+        vocabularios = Vocabularios()
+        cartones = [Carton(*partes, vocabularios) for partes in _lineas(n)]
+    else:
+        cartones = [clase(*partes) for partes in _lineas(n)]
+    # Una palabra marcada por cartón, como tras el primer canto
+    for carton in cartones:
+        if isinstance(carton, Carton):
+            carton.marcar(carton.palabras[0])
+        else:
+            carton.palabras_marcadas.add(carton.palabras[0])
+            carton.aciertos += 1
+    gc.collect()
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del cartones
+    return despues - antes
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    legado = medir(CartonLegado, n)
+    compacto = medir(Carton, n)
+    print(f"Cartones:           {n}")
+    print(f"Carton original:    {legado / 1e6:10.1f} MB  ({legado / n:7.0f} B/cartón)")
+    print(f"Carton compacto:    {compacto / 1e6:10.1f} MB  ({compacto / n:7.0f} B/cartón)")
+    print(f"Reducción:          {legado / compacto:10.1f}x")
+    print(f"Estimado 1M cartones: {legado / n * 1e6 / 1e9:.2f} GB -> {compacto / n * 1e6 / 1e9:.2f} GB")
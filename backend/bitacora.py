@@ -0,0 +1,358 @@
+# =============================================================================
+# BITÁCORA DE EVENTOS POR SALA (SOLO ANEXAR) Y REPETICIÓN DETERMINISTA
+# Uso: python bitacora.py bitacoras/principal.bitacora
+#      python bitacora.py bitacoras/principal.bitacora --hasta 120 --eventos
+# =============================================================================
+#
+# Un archivo por sala con un registro por cada operación que cambia el juego:
+#   L  carga: reglas, bancos, motor y los cartones en orden de entrada (mazo ordenado)
+#   R  reparto: regla, jugadores (nombres si no son los predeterminados), cuotas,
+#      semilla y huella del plan de reparto
+#   I  inicio de juego con el orden de idiomas
+#   C  palabra cantada
+#   S  siguiente idioma
+#   D  demo: cartón ganador generado
+#   X  reinicio de la sala
+#   P  punto de restauración: la sala tal como se restauró de un snapshot al
+#      arrancar (configuración con el reparto, estado, marcas y mazo ordenado)
+# Registro: tipo (1 byte) | instante (float64) | largo (uint32) | datos.
+# La repetición parte del último L, D, X o P anterior al evento pedido: la semilla
+# reproduce el reparto (se verifica con la huella) y los cantos se aplican en lote.
+# P continúa la partida en curso: sin él, los cantos que el snapshot no alcanzó a
+# guardar antes de una caída quedarían en la repetición pero no en la sala.
+
+import argparse
+import contextlib
+import fcntl
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+
+from game_manager import GameManager
+from mazo_binario import escribir_mazo_ordenado, leer_mazo_ordenado
+from models import Carton
+from persistencia import base_juego, juego_desde_snapshot
+from reparto import nombres_jugadores
+
+_REGISTRO = struct.Struct("<cdI")
+# Datos de L y P: largo del JSON de configuración, el JSON y el mazo ordenado
+_CONFIG = struct.Struct("<I")
+# Eventos desde los que empieza una partida
+BASES = ("L", "D", "X")
+# Eventos desde los que se puede reproducir (P continúa una partida)
+ORIGENES = BASES + ("P",)
+
+
+class Evento(NamedTuple):
+    numero: int
+    tipo: str
+    instante: float
+    inicio: int
+    largo: int
+
+
+class Bitacora:
+    """
+    Archivos de eventos por sala, solo de anexado. Cada registro se vacía al
+    sistema antes de responder; las mutaciones de una sala ya llegan en orden
+    (actor de la sala y, entre workers, flock de la memoria compartida).
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._archivos: Dict[str, BinaryIO] = {}
+        self._lock = threading.Lock()
+
+    def ruta(self, sala_id: str) -> str:
+        return os.path.join(self.directorio, f"{sala_id}.bitacora")
+
+    def _anexar(self, sala_id: str, tipo: bytes, *partes: bytes):
+        with self._lock:
+            archivo = self._archivos.get(sala_id)
+            if archivo is None:
+                archivo = self._archivos[sala_id] = open(self.ruta(sala_id), "ab")
+            archivo.write(_REGISTRO.pack(tipo, time.time(), sum(len(p) for p in partes)))
+            for parte in partes:
+                archivo.write(parte)
+            archivo.flush()
+
+    def registrar_carga(self, sala_id: str, juego: GameManager):
+        """Mazo de la carga y su reparto (dos eventos: L y R)"""
+        config = json.dumps({
+            "reglas": juego.reglas_personalizadas,
+            "bancos": juego.bancos_personalizados,
+            "motor": juego.motor
+        }, ensure_ascii=False).encode("utf-8")
+        mazo = io.BytesIO()
+        escribir_mazo_ordenado(juego.mazo, mazo)
+        self._anexar(sala_id, b"L", _CONFIG.pack(len(config)), config, mazo.getbuffer())
+        plan = juego.reparto
+        predeterminados = plan.nombres == nombres_jugadores(len(plan))
+        self._anexar(sala_id, b"R", json.dumps({
+            "regla": juego.regla_reparto,
+            "jugadores": len(plan),
+            "nombres": None if predeterminados else plan.nombres,
+            "cuotas": juego.cuotas,
+            "semilla": juego.semilla,
+            "huella": plan.huella()
+        }, ensure_ascii=False).encode("utf-8"))
+
+    def registrar_inicio(self, sala_id: str, orden_idiomas: List[str]):
+        self._anexar(sala_id, b"I", json.dumps(orden_idiomas).encode("utf-8"))
+
+    def registrar_canto(self, sala_id: str, palabra: str):
+        self._anexar(sala_id, b"C", palabra.encode("utf-8"))
+
+    def registrar_siguiente(self, sala_id: str):
+        self._anexar(sala_id, b"S")
+
+    def registrar_demo(self, sala_id: str, carton: Carton):
+        self._anexar(sala_id, b"D", json.dumps({
+            "id": carton.id, "idioma": carton.idioma, "palabras": carton.palabras
+        }, ensure_ascii=False).encode("utf-8"))
+
+    def registrar_reinicio(self, sala_id: str):
+        self._anexar(sala_id, b"X")
+
+    def registrar_restauracion(self, sala_id: str, juego: GameManager):
+        """
+        Punto de restauración con el juego restaurado de un snapshot. Con varios
+        workers todos restauran la misma sala al arrancar: solo el primero lo anota.
+        """
+        ruta = self.ruta(sala_id)
+        descriptor = os.open(ruta, os.O_CREAT | os.O_RDONLY, 0o600)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            if os.fstat(descriptor).st_size:
+                with _mapear(ruta) as buffer:
+                    eventos = leer_eventos(buffer)
+                if eventos and eventos[-1].tipo == "P":
+                    return
+            base, cartones = base_juego(juego)
+            datos = json.dumps(base, ensure_ascii=False).encode("utf-8")
+            mazo = io.BytesIO()
+            if cartones:
+                escribir_mazo_ordenado(cartones, mazo)
+            self._anexar(sala_id, b"P", _CONFIG.pack(len(datos)), datos, mazo.getbuffer())
+        finally:
+            os.close(descriptor)
+
+    def cerrar_sala(self, sala_id: str):
+        """Cierra el archivo de la sala (el archivo se conserva para auditoría)"""
+        with self._lock:
+            archivo = self._archivos.pop(sala_id, None)
+        if archivo is not None:
+            archivo.close()
+
+    def cerrar(self):
+        with self._lock:
+            archivos = list(self._archivos.values())
+            self._archivos.clear()
+        for archivo in archivos:
+            archivo.close()
+
+
+# -----------------------------------------------------------------------------
+# Lectura y repetición
+# -----------------------------------------------------------------------------
+
+def leer_eventos(buffer) -> List[Evento]:
+    """Índice de los eventos (sin copiar sus datos); un registro incompleto al final se ignora"""
+    eventos = []
+    posicion = 0
+    while posicion + _REGISTRO.size <= len(buffer):
+        tipo, instante, largo = _REGISTRO.unpack_from(buffer, posicion)
+        inicio = posicion + _REGISTRO.size
+        if inicio + largo > len(buffer):
+            break
+        eventos.append(Evento(len(eventos), tipo.decode("ascii"), instante, inicio, largo))
+        posicion = inicio + largo
+    return eventos
+
+
+def partidas(eventos: List[Evento]) -> List[int]:
+    """Número del evento con que empieza cada partida"""
+    return [e.numero for e in eventos if e.tipo in BASES]
+
+
+def _texto(buffer, evento: Evento) -> str:
+    return bytes(buffer[evento.inicio:evento.inicio + evento.largo]).decode("utf-8")
+
+
+def _cargar(buffer, evento: Evento):
+    """(juego configurado, cartones en orden de entrada) de un evento L"""
+    largo_config = _CONFIG.unpack_from(buffer, evento.inicio)[0]
+    inicio_config = evento.inicio + _CONFIG.size
+    config = json.loads(bytes(buffer[inicio_config:inicio_config + largo_config]).decode("utf-8"))
+    juego = GameManager(motor=config["motor"], nivel_traza="off")
+    juego.reglas_personalizadas = config["reglas"]
+    juego.bancos_personalizados = config["bancos"]
+    mazo = buffer[inicio_config + largo_config:evento.inicio + evento.largo]
+    try:
+        cartones = leer_mazo_ordenado(mazo)
+    finally:
+        mazo.release()
+    return juego, cartones
+
+
+def _restaurado(buffer, evento: Evento) -> GameManager:
+    """Juego de un evento P"""
+    largo_base = _CONFIG.unpack_from(buffer, evento.inicio)[0]
+    inicio_base = evento.inicio + _CONFIG.size
+    base = json.loads(bytes(buffer[inicio_base:inicio_base + largo_base]).decode("utf-8"))
+    cartones = []
+    if evento.largo > _CONFIG.size + largo_base:
+        mazo = buffer[inicio_base + largo_base:evento.inicio + evento.largo]
+        try:
+            cartones = leer_mazo_ordenado(mazo)
+        finally:
+            mazo.release()
+    base["config"]["nivel_traza"] = "off"
+    return juego_desde_snapshot(cartones, base["duenos"], base["config"], base["estado"], base["marcas"])
+
+
+def _cantar(juego: GameManager, cantos: List[Evento], palabras: List[str]):
+    resultado = juego.cantar_lote(palabras, "off")
+    if "error" in resultado or resultado["aplicadas"] != len(palabras):
+        evento = cantos[resultado.get("aplicadas", 0)]
+        invalida = resultado.get("palabra_invalida")
+        motivo = resultado.get("error") or (invalida and invalida["error"]) or "el juego ya tenía ganador"
+        raise ValueError(f"El canto del evento {evento.numero} no se reproduce: {motivo}")
+
+
+def _reproducir(buffer, eventos: List[Evento], hasta: int) -> GameManager:
+    inicio = next((e.numero for e in reversed(eventos[:hasta + 1]) if e.tipo in ORIGENES), None)
+    if inicio is None:
+        raise ValueError(
+            f"No hay una carga, demo, reinicio ni punto de restauración hasta el evento {hasta}: "
+            "la partida empezó antes que la bitácora"
+        )
+    juego = GameManager(nivel_traza="off")
+    mazo: List[Carton] = []
+    # Cantos consecutivos: se aplican juntos con cantar_lote
+    cantos: List[Evento] = []
+    palabras: List[str] = []
+    for evento in eventos[inicio:hasta + 1]:
+        if evento.tipo == "C":
+            cantos.append(evento)
+            palabras.append(_texto(buffer, evento))
+            continue
+        if cantos:
+            _cantar(juego, cantos, palabras)
+            cantos, palabras = [], []
+
+        if evento.tipo == "L":
+            juego, mazo = _cargar(buffer, evento)
+        elif evento.tipo == "R":
+            reparto = json.loads(_texto(buffer, evento))
+            exito, mensaje = juego.reproducir_reparto(
+                mazo, reparto["jugadores"], reparto["regla"], reparto["semilla"],
+                reparto["nombres"], reparto["cuotas"]
+            )
+            if not exito or juego.reparto.huella() != reparto["huella"]:
+                raise ValueError(
+                    f"El reparto del evento {evento.numero} no se reproduce con la semilla {reparto['semilla']}"
+                )
+        elif evento.tipo == "I":
+            if "error" in juego.iniciar_juego(json.loads(_texto(buffer, evento))):
+                raise ValueError(f"El inicio del evento {evento.numero} no se reproduce")
+        elif evento.tipo == "S":
+            if "error" in juego.siguiente_idioma():
+                raise ValueError(f"El cambio de idioma del evento {evento.numero} no se reproduce")
+        elif evento.tipo == "D":
+            datos = json.loads(_texto(buffer, evento))
+            juego = GameManager(nivel_traza="off")
+            juego.fijar_demo(Carton(datos["id"], datos["idioma"], datos["palabras"]))
+        elif evento.tipo == "X":
+            juego = GameManager(nivel_traza="off")
+        elif evento.tipo == "P":
+            juego = _restaurado(buffer, evento)
+            mazo = juego.mazo
+        else:
+            raise ValueError(f"Tipo de evento desconocido en el evento {evento.numero}: {evento.tipo}")
+    if cantos:
+        _cantar(juego, cantos, palabras)
+    return juego
+
+
+@contextlib.contextmanager
+def _mapear(ruta: str):
+    """Vista de solo lectura del archivo con mmap (los mazos no se copian a memoria)"""
+    with open(ruta, "rb") as archivo:
+        if os.fstat(archivo.fileno()).st_size == 0:
+            raise ValueError("La bitácora está vacía")
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer = memoryview(mapa)
+    try:
+        yield buffer
+    finally:
+        buffer.release()
+        mapa.close()
+
+
+def reproducir(ruta: str, hasta: Optional[int] = None) -> GameManager:
+    """Juego de la bitácora tras el evento `hasta` (por defecto, el último)"""
+    with _mapear(ruta) as buffer:
+        eventos = leer_eventos(buffer)
+        hasta = len(eventos) - 1 if hasta is None else hasta
+        if not 0 <= hasta < len(eventos):
+            raise ValueError(f"La bitácora tiene {len(eventos)} eventos (0 a {len(eventos) - 1})")
+        return _reproducir(buffer, eventos, hasta)
+
+
+def indice(ruta: str) -> List[Evento]:
+    """Eventos de la bitácora (tipo, instante y posición de sus datos)"""
+    with _mapear(ruta) as buffer:
+        return leer_eventos(buffer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Repetición determinista de la bitácora de una sala")
+    parser.add_argument("ruta", help="Archivo .bitacora de la sala")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--hasta", type=int, help="Estado tras este número de evento")
+    grupo.add_argument("--partida", type=int, help="Estado final de esta partida (desde 0)")
+    parser.add_argument("--eventos", action="store_true", help="Lista los eventos de la bitácora")
+    args = parser.parse_args()
+
+    eventos = indice(args.ruta)
+    inicios = partidas(eventos)
+    print(f"📜 {len(eventos)} eventos, {len(inicios)} partidas")
+    if args.eventos:
+        for evento in eventos:
+            instante = datetime.fromtimestamp(evento.instante).isoformat(timespec="milliseconds")
+            print(f"   {evento.numero:>8}  {evento.tipo}  {instante}  {evento.largo} bytes")
+
+    hasta = args.hasta
+    if args.partida is not None:
+        if not 0 <= args.partida < len(inicios):
+            parser.error(f"La bitácora tiene {len(inicios)} partidas")
+        siguiente = args.partida + 1
+        hasta = inicios[siguiente] - 1 if siguiente < len(inicios) else len(eventos) - 1
+
+    inicio = time.perf_counter()
+    juego = reproducir(args.ruta, hasta)
+    duracion = time.perf_counter() - inicio
+    ganadores = [
+        {"jugador": jugador.nombre, "carton_id": carton.id}
+        for jugador in juego.jugadores for carton in jugador.cartones if carton.es_ganador()
+    ]
+    print(f"⏱️ Repetición hasta el evento {len(eventos) - 1 if hasta is None else hasta}: {duracion:.2f}s")
+    print(json.dumps({
+        "jugadores": len(juego.jugadores),
+        "cartones": sum(len(j.cartones) for j in juego.jugadores),
+        "semilla": juego.semilla,
+        "juego_activo": juego.juego_activo,
+        "orden_idiomas": juego.orden_idiomas,
+        "idioma_actual_idx": juego.idioma_actual_idx,
+        "palabras_cantadas": len(juego.palabras_cantadas),
+        "ultima_palabra": juego.palabras_cantadas[-1] if juego.palabras_cantadas else None,
+        "ganadores": ganadores
+    }, ensure_ascii=False, indent=2))
@@ -0,0 +1,55 @@
+# =============================================================================
+# CARTONES A FALTA DE K PALABRAS (CUBETAS INCREMENTALES)
+# =============================================================================
+
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import Carton, Jugador
+
+
+class CasiGanadores:
+    """
+    Cubetas por palabras restantes: `cubetas[r]` guarda los cartones a los que
+    les faltan exactamente r palabras (r <= max_k), en orden de llegada.
+    Solo se siguen los cartones cercanos a ganar, así cada marca cuesta O(1)
+    y consultar los k más cercanos no recorre todos los cartones.
+    """
+
+    def __init__(self, max_k: int):
+        self.max_k = max_k
+        # Dict como conjunto ordenado: carton -> jugador
+        self.cubetas: List[Dict[Carton, Jugador]] = [{} for _ in range(max_k + 1)]
+
+    @classmethod
+    def desde_cartones(cls, asignaciones: Iterable[Tuple[Jugador, Carton, int]], max_k: int) -> "CasiGanadores":
+        """Construcción inicial desde (jugador, carton, restantes), solo al cargar o restaurar"""
+        casi = cls(max_k)
+        for jugador, carton, restantes in asignaciones:
+            if restantes <= max_k:
+                casi.cubetas[restantes][carton] = jugador
+        return casi
+
+    def actualizar(self, jugador: Jugador, carton: Carton, restantes: int, antes: Optional[int] = None):
+        """
+        El cartón acaba de recibir una marca y le quedan `restantes` palabras
+        (`antes`: las que le faltaban, si recibió varias marcas de una vez)
+        """
+        if restantes > self.max_k:
+            return
+        antes = restantes + 1 if antes is None else antes
+        if antes <= self.max_k:
+            self.cubetas[antes].pop(carton, None)
+        self.cubetas[restantes][carton] = jugador
+
+    def conteo(self, k: int) -> Dict[int, int]:
+        return {r: len(self.cubetas[r]) for r in range(1, k + 1)}
+
+    def cercanos(self, k: int) -> Iterator[Tuple[Jugador, Carton, int]]:
+        """Cartones a los que les faltan entre 1 y k palabras, los más cercanos primero"""
+        for restantes in range(1, k + 1):
+            for carton, jugador in self.cubetas[restantes].items():
+                yield jugador, carton, restantes
+
+    def top(self, k: int, limite: int) -> List[Tuple[Jugador, Carton, int]]:
+        return list(itertools.islice(self.cercanos(k), limite))
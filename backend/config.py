@@ -36,3 +36,68 @@ BANCO_PALABRAS = {
            "SCHERM", "INTERNET", "CODE", "PYTHON", "JAVA", "DATA", "ALGORITME", "BINGO", 
            "WINNAAR", "GELUK", "VRIEND", "FAMILIE", "FEEST", "MUZIEK", "NACHT", "DAG"]
 }
+
+# Motores de marcado disponibles en GameManager
+MOTORES_MARCADO = ("indice", "bitset")
+
+# Reglas de reparto: mínimo un cartón por jugador, uno de cada idioma o
+# cuotas por idioma (N cartones de cada idioma por jugador)
+REGLAS_REPARTO = ("minimo_uno", "uno_por_idioma", "cuotas")
+
+# Niveles de traza del algoritmo (de menor a mayor detalle)
+NIVELES_TRAZA = ("off", "resumen", "completo")
+NIVEL_TRAZA_DEFECTO = "resumen"
+TRAZA_MAX_MENSAJES = 500
+
+# Salas de juego (varios juegos por proceso)
+SALA_PRINCIPAL = "principal"
+MAX_SALAS = 500
+MAX_CARTONES_SALAS = 2_000_000  # Total de cartones entre todas las salas
+INACTIVIDAD_SALA_SEG = 6 * 3600
+
+# Cambios incrementales que se conservan para servir deltas de estado
+MAX_CAMBIOS_VERSIONADOS = 1000
+# Respuestas materializadas por instantánea de lectura (estado completo, deltas por `since`)
+MAX_CUERPOS_INSTANTANEA = 32
+# Una lectura pedida en esta ventana se construye al publicar cada instantánea
+LECTURAS_CALIENTES_SEG = 10
+
+# Eventos pendientes por suscriptor del canal push (los más antiguos se descartan)
+MAX_EVENTOS_SUSCRIPTOR = 256
+
+# Validación paralela de cargas masivas (pool de procesos)
+VALIDACION_PARALELA_MIN_LINEAS = 200_000  # Por debajo se valida en un solo proceso
+LINEAS_POR_FRAGMENTO = 50_000
+PROCESOS_VALIDACION = None  # None = os.cpu_count()
+
+# Snapshots persistentes de las salas (SQLite en modo WAL)
+RUTA_SNAPSHOTS = None  # Ruta del archivo .db; None desactiva (variable de entorno BINGO_SNAPSHOTS)
+SNAPSHOT_INTERVALO_SEG = 1.0  # Los cambios se agrupan y se escriben en una transacción por intervalo
+
+# Bitácora de eventos por sala (auditoría y repetición determinista):
+# directorio de los archivos; None desactiva (variable de entorno BINGO_BITACORAS)
+RUTA_BITACORAS = None
+
+# Estado compartido entre workers (gunicorn -w N) con multiprocessing.shared_memory:
+# prefijo de los segmentos; None desactiva (variable de entorno BINGO_MEMORIA_COMPARTIDA)
+MEMORIA_COMPARTIDA = None
+MEMORIA_COMPARTIDA_LOG_BYTES = 8 * 1024 * 1024  # Registro de operaciones por sala
+MEMORIA_COMPARTIDA_INTERVALO_SEG = 0.05  # Sondeo para avisar a los suscriptores push de cada worker
+
+# Cartones a falta de k palabras: se siguen los que están a CASI_GANADORES_MAX_K o menos
+CASI_GANADORES_MAX_K = 5
+CASI_GANADORES_LIMITE = 50
+
+# Paginación de /api/jugadores: jugadores por página (por defecto sin límite)
+PAGINA_JUGADORES_MAX = 1000
+
+# Cantos en lote (/api/cantar-lote): palabras por petición
+MAX_PALABRAS_LOTE = 10_000
+
+# Generación masiva (/api/generar-cartones): cartones por idioma y petición
+MAX_CARTONES_GENERADOS = 1_000_000
+
+# Cartones duplicados al cargar (ids o palabras repetidas): "reportar" o "rechazar"
+DUPLICADOS_MODOS = ("reportar", "rechazar")
+DUPLICADOS_DEFECTO = "reportar"
+DUPLICADOS_LIMITE = 100
@@ -0,0 +1,248 @@
+# =============================================================================
+# CARTONES DUPLICADOS Y CASI DUPLICADOS (HASH DE PALABRAS ORDENADAS, MINHASH)
+# =============================================================================
+
+import itertools
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from mazo_binario import MazoMatriz
+from models import Carton
+from motor_bitset import ids_concatenados
+
+# Hashes por cartón para el informe MinHash (bandas × filas)
+MINHASH_FUNCIONES = 64
+# Pares candidatos que se verifican como máximo en el informe MinHash
+MINHASH_MAX_CANDIDATOS = 200_000
+
+_MASCARA_32 = np.uint64(0xFFFFFFFF)
+
+
+def _por_idioma(cartones: Sequence[Carton]) -> Dict[str, List[Carton]]:
+    grupos: Dict[str, List[Carton]] = defaultdict(list)
+    for carton in cartones:
+        grupos[carton.idioma].append(carton)
+    return grupos
+
+
+def _tramos(cartones: List[Carton]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ids concatenados, inicio y longitud de cada cartón en ese vector)"""
+    ids = ids_concatenados(cartones)
+    longitudes = np.fromiter((len(c._ids) for c in cartones), dtype=np.int64, count=len(cartones))
+    inicios = np.zeros(len(cartones), dtype=np.int64)
+    np.cumsum(longitudes[:-1], out=inicios[1:])
+    return ids, inicios, longitudes
+
+
+def _hash_cartones(cartones: List[Carton]) -> np.ndarray:
+    """
+    Hash de 64 bits de la tupla de palabras de cada cartón (ya ordenadas al
+    crearlo): polinomio con un coeficiente impar fijo por posición.
+    """
+    arreglos = [c._ids for c in cartones]
+    longitudes = np.fromiter(map(len, arreglos), dtype=np.int64, count=len(arreglos))
+    tipos = {a.typecode for a in arreglos}
+    if longitudes.min() == longitudes.max() and len(tipos) == 1:
+        # Caso habitual (la carga exige el mismo tamaño por idioma): matriz cartones × palabras
+        return _hash_matriz(np.frombuffer(b"".join(arreglos), dtype=np.dtype(tipos.pop())).reshape(len(arreglos), -1))
+
+    coeficientes = _coeficientes(int(longitudes.max()))
+    # La longitud también entra en el hash (un cartón sin palabras suma 0)
+    hashes = longitudes.astype(np.uint64) * coeficientes[-1]
+    ids, inicios, longitudes = _tramos(cartones)
+    posiciones = np.arange(len(ids)) - np.repeat(inicios, longitudes)
+    terminos = (ids.astype(np.uint64) + np.uint64(1)) * coeficientes[posiciones]
+    no_vacios = longitudes > 0
+    hashes[no_vacios] += np.add.reduceat(terminos, inicios[no_vacios]) if len(terminos) else 0
+    return hashes
+
+
+def _coeficientes(longitud: int) -> np.ndarray:
+    """Coeficiente impar fijo por posición (y uno más para la longitud)"""
+    rng = np.random.default_rng(0x5EED)
+    return rng.integers(1, 2 ** 62, size=longitud + 1, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+def _hash_matriz(matriz: np.ndarray) -> np.ndarray:
+    """El mismo hash para filas de igual longitud: una pasada por columna"""
+    coeficientes = _coeficientes(matriz.shape[1])
+    hashes = np.full(len(matriz), matriz.shape[1], dtype=np.uint64) * coeficientes[-1]
+    for posicion in range(matriz.shape[1]):
+        hashes += (matriz[:, posicion].astype(np.uint64) + np.uint64(1)) * coeficientes[posicion]
+    return hashes
+
+
+def _grupos_iguales(hashes: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Índices de los cartones que comparten hash (candidatos a duplicado), los
+    grupos en el orden de su primer cartón (no depende de los ids de vocabulario)
+    """
+    ordenados = np.sort(hashes)
+    if not (ordenados[1:] == ordenados[:-1]).any():
+        # Caso habitual: ningún hash repetido, sin el argsort estable
+        return
+    orden = np.argsort(hashes, kind="stable")
+    ordenados = hashes[orden]
+    iguales = np.flatnonzero(ordenados[1:] == ordenados[:-1])
+    if not len(iguales):
+        return
+    # Tramos consecutivos de hashes iguales (orden estable: cada grupo empieza por su menor índice)
+    cortes = np.flatnonzero(np.diff(iguales) != 1) + 1
+    grupos = [orden[tramo[0]:tramo[-1] + 2] for tramo in np.split(iguales, cortes)]
+    yield from sorted(grupos, key=lambda grupo: int(grupo[0]))
+
+
+def buscar_duplicados(cartones: Sequence[Carton], limite: int = 100) -> Dict:
+    """
+    Ids repetidos y cartones con exactamente las mismas palabras (mismo idioma).
+    Los candidatos por hash se confirman comparando las palabras, así una
+    colisión nunca produce un falso duplicado.
+    """
+    if isinstance(cartones, MazoMatriz):
+        return _resumen(*_duplicados_matriz(cartones), limite)
+
+    ids_repetidos = []
+    if len({c.id for c in cartones}) != len(cartones):
+        ids_repetidos = [
+            {"id": carton_id, "veces": veces}
+            for carton_id, veces in Counter(c.id for c in cartones).items() if veces > 1
+        ]
+
+    palabras_repetidas = []
+    for idioma, grupo in _por_idioma(cartones).items():
+        if len(grupo) < 2:
+            continue
+        for candidatos in _grupos_iguales(_hash_cartones(grupo)):
+            exactos: Dict[bytes, List[str]] = defaultdict(list)
+            for i in candidatos.tolist():
+                exactos[grupo[i]._ids.tobytes()].append(grupo[i].id)
+            palabras_repetidas.extend(
+                {"idioma": idioma, "ids": iguales} for iguales in exactos.values() if len(iguales) > 1
+            )
+
+    return _resumen(ids_repetidos, palabras_repetidas, limite)
+
+
+def _duplicados_matriz(mazo: MazoMatriz) -> Tuple[List[Dict], List[Dict]]:
+    """Lo mismo sobre las matrices de un mazo binario, sin crear sus cartones"""
+    ids_repetidos = []
+    if len(mazo):
+        # Ids como filas de uint64 (rellenos con ceros): el hash descarta el caso sin repetidos
+        nombres = np.concatenate(mazo.nombres)
+        ancho = -(-nombres.dtype.itemsize // 8) * 8
+        filas = np.zeros((len(nombres), ancho), dtype=np.uint8)
+        filas[:, :nombres.dtype.itemsize] = nombres.view(np.uint8).reshape(len(nombres), -1)
+        if next(_grupos_iguales(_hash_matriz(filas.view(np.uint64))), None) is not None:
+            # En el orden del mazo, como Counter sobre los cartones
+            inicios = np.cumsum([0] + [len(n) for n in mazo.nombres])[:-1]
+            ids = nombres[inicios[mazo.bloque] + mazo.fila]
+            unicos, primera, veces = np.unique(ids, return_index=True, return_counts=True)
+            repetidos = np.flatnonzero(veces > 1)
+            ids_repetidos = [
+                {"id": unicos[i].decode("utf-8"), "veces": int(veces[i])}
+                for i in repetidos[np.argsort(primera[repetidos])].tolist()
+            ]
+
+    palabras_repetidas = []
+    for idioma, matriz, nombres in zip(mazo.idiomas, mazo.matrices, mazo.nombres):
+        if len(matriz) < 2:
+            continue
+        for candidatos in _grupos_iguales(_hash_matriz(matriz)):
+            exactos: Dict[bytes, List[str]] = defaultdict(list)
+            for i in candidatos.tolist():
+                exactos[matriz[i].tobytes()].append(nombres[i].decode("utf-8"))
+            palabras_repetidas.extend(
+                {"idioma": idioma, "ids": iguales} for iguales in exactos.values() if len(iguales) > 1
+            )
+    return ids_repetidos, palabras_repetidas
+
+
+def _resumen(ids_repetidos: List[Dict], palabras_repetidas: List[Dict], limite: int) -> Dict:
+    return {
+        "total_ids_repetidos": sum(r["veces"] - 1 for r in ids_repetidos),
+        "total_palabras_repetidas": sum(len(r["ids"]) - 1 for r in palabras_repetidas),
+        "ids_repetidos": ids_repetidos[:limite],
+        "palabras_repetidas": palabras_repetidas[:limite]
+    }
+
+
+def _bandas_filas(n_hash: int, umbral: float) -> Tuple[int, int]:
+    """
+    Bandas b y filas r (b·r = n_hash) del LSH: un par con similitud s es
+    candidato con probabilidad 1-(1-s^r)^b, que sube bruscamente cerca de
+    (1/b)^(1/r). Se elige el mayor r cuyo punto de corte no supera el umbral.
+    """
+    mejor = (n_hash, 1)
+    for filas in range(1, n_hash + 1):
+        if n_hash % filas:
+            continue
+        bandas = n_hash // filas
+        if (1 / bandas) ** (1 / filas) <= umbral:
+            mejor = (bandas, filas)
+    return mejor
+
+
+def buscar_similares(
+    cartones: Sequence[Carton],
+    umbral: float,
+    limite: int = 100,
+    n_hash: int = MINHASH_FUNCIONES,
+    max_candidatos: int = MINHASH_MAX_CANDIDATOS,
+    semilla: int = 0
+) -> Dict:
+    """
+    Pares de cartones del mismo idioma con similitud de Jaccard >= umbral.
+    MinHash con bandas (LSH) propone candidatos sin comparar todos contra
+    todos; cada candidato se verifica con la similitud exacta.
+    """
+    bandas, filas = _bandas_filas(n_hash, umbral)
+    rng = np.random.default_rng(semilla)
+    pares = []
+    n_candidatos = 0
+    truncado = False
+
+    for idioma, grupo in _por_idioma(cartones).items():
+        if len(grupo) < 2:
+            continue
+        ids, inicios, _ = _tramos(grupo)
+        vocabulario = int(ids.max()) + 1
+        candidatos = set()
+        for _ in range(bandas):
+            # Cada fila de la banda es una permutación aleatoria del vocabulario
+            banda = np.zeros(len(grupo), dtype=np.uint64)
+            for _ in range(filas):
+                permutacion = rng.permutation(vocabulario).astype(np.uint64)
+                minimo = np.minimum.reduceat(permutacion[ids], inicios)
+                banda = banda * np.uint64(1_000_003) + (minimo & _MASCARA_32)
+            for iguales in _grupos_iguales(banda):
+                for par in itertools.combinations(np.sort(iguales).tolist(), 2):
+                    if len(candidatos) >= max_candidatos:
+                        truncado = True
+                        break
+                    candidatos.add(par)
+                if truncado:
+                    break
+            if truncado:
+                break
+        n_candidatos += len(candidatos)
+
+        conjuntos: Dict[int, frozenset] = {}
+        for a, b in candidatos:
+            conjunto_a = conjuntos.get(a) or conjuntos.setdefault(a, frozenset(grupo[a]._ids))
+            conjunto_b = conjuntos.get(b) or conjuntos.setdefault(b, frozenset(grupo[b]._ids))
+            jaccard = len(conjunto_a & conjunto_b) / len(conjunto_a | conjunto_b)
+            if jaccard >= umbral:
+                pares.append({"idioma": idioma, "a": grupo[a].id, "b": grupo[b].id, "jaccard": round(jaccard, 4)})
+
+    pares.sort(key=lambda p: -p["jaccard"])
+    return {
+        "umbral": umbral,
+        "bandas": bandas,
+        "filas": filas,
+        "candidatos": n_candidatos,
+        "truncado": truncado,
+        "total": len(pares),
+        "pares": pares[:limite]
+    }
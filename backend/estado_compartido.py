@@ -0,0 +1,571 @@
+# =============================================================================
+# ESTADO DE LAS SALAS COMPARTIDO ENTRE WORKERS (MULTIPROCESSING.SHARED_MEMORY)
+# =============================================================================
+#
+# Con gunicorn -w N cada worker tiene su propio GameManager. Por sala hay:
+#   - Un segmento de control: cabecera protegida por un contador de secuencia
+#     (seqlock: impar mientras se escribe) y un registro de operaciones solo
+#     de anexado. Cada carga empieza una generación nueva con un registro base.
+#       B  base: el estado completo está en el segmento de la generación
+#       I  inicio de juego con el orden de idiomas (JSON)
+#       C  palabra cantada
+#       S  siguiente idioma
+#   - Un segmento por generación con el tablero (máscara de marcas de cada
+#     cartón y ganadores, ver _Tablero), la base (jugadores, reglas, bancos,
+#     estado y marcas en JSON) y los cartones en formato de mazo binario
+#     (mazo_binario.py) en orden de reparto.
+# Si el registro se llena, el escritor compacta: publica una generación nueva
+# con el estado ya mutado, así ninguna operación queda fuera del registro.
+# Cada worker aplica sobre su GameManager las operaciones que aún no vio. Con
+# el motor de índice los cantos no se vuelven a marcar: se registran la
+# palabra, los ganadores del tablero y la rotación, y las marcas cambiadas se
+# copian del tablero una sola vez por sincronización. Con el motor bitset se
+# repite el canto (una operación vectorizada sobre la columna de la palabra).
+# Los escritores se serializan entre procesos con flock (un archivo por sala).
+
+import contextlib
+import fcntl
+import io
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from eventos import evento_palabra
+from game_manager import _avanzar_versiones
+from mazo_binario import escribir_mazo_ordenado, leer_mazo_ordenado
+from models import Carton
+from persistencia import base_juego, juego_desde_snapshot
+from salas import RegistroSalas, Sala
+from config import MEMORIA_COMPARTIDA_LOG_BYTES
+
+# Cabecera: secuencia | generación | bytes usados del registro | versión | eliminada
+_SECUENCIA = struct.Struct("<Q")
+_CAMPOS = struct.Struct("<QQQB")
+_INICIO_REGISTRO = 64
+# Cada operación: tipo | versión que produjo | largo del dato
+_OPERACION = struct.Struct("<cQI")
+# Segmento de la generación: largo de la base (JSON) | largo del mazo | cartones del tablero
+_GENERACION = struct.Struct("<QQQ")
+
+
+def _tamano_tablero(cartones: int) -> int:
+    """Ganadores anotados | máscaras (uint64) | versiones (uint64) | números (uint32), alineado a 8"""
+    return 0 if not cartones else (8 + 20 * cartones + 7) // 8 * 8
+
+
+def _abrir_segmento(nombre: str, tamano: int = 0) -> Optional[shared_memory.SharedMemory]:
+    """Abre (o crea, si se indica tamaño) un segmento; None si no existe"""
+    try:
+        segmento = shared_memory.SharedMemory(nombre, create=tamano > 0, size=tamano)
+    except FileNotFoundError:
+        return None
+    # El resource_tracker borraría el segmento al terminar este proceso aunque
+    # otros workers lo sigan usando: la vida del segmento se gestiona aquí
+    resource_tracker.unregister(segmento._name, "shared_memory")
+    return segmento
+
+
+def _borrar_segmento(nombre: str):
+    try:
+        # Sin quitarlo del resource_tracker: unlink() lo hace
+        segmento = shared_memory.SharedMemory(nombre)
+    except FileNotFoundError:
+        return
+    segmento.close()
+    segmento.unlink()
+
+
+@contextlib.contextmanager
+def _escribiendo(buffer):
+    """Sección de escritura del seqlock (el escritor ya tiene el flock de la sala)"""
+    secuencia = _SECUENCIA.unpack_from(buffer, 0)[0]
+    _SECUENCIA.pack_into(buffer, 0, secuencia + 1)
+    try:
+        yield
+    finally:
+        _SECUENCIA.pack_into(buffer, 0, secuencia + 2)
+
+
+def _instantanea(
+    buffer,
+    generacion_local: Optional[int],
+    posicion_local: int,
+    copiar: Optional[Callable[[int], Optional[Tuple]]] = None
+) -> Tuple:
+    """
+    Lectura consistente sin bloqueo: (generación, usados, versión, eliminada,
+    operaciones pendientes, copia del tablero). `copiar` lee el tablero de la
+    generación en la misma vuelta (solo si hay operaciones pendientes). Se
+    repite si un escritor cambió la secuencia.
+    """
+    while True:
+        secuencia = _SECUENCIA.unpack_from(buffer, 0)[0]
+        if secuencia & 1:
+            time.sleep(0)
+            continue
+        generacion, usados, version, eliminada = _CAMPOS.unpack_from(buffer, _SECUENCIA.size)
+        desde = posicion_local if generacion == generacion_local else 0
+        pendientes = bytes(buffer[_INICIO_REGISTRO + desde:_INICIO_REGISTRO + usados]) if usados > desde else b""
+        copia = copiar(generacion) if copiar is not None and pendientes else None
+        if _SECUENCIA.unpack_from(buffer, 0)[0] == secuencia:
+            return generacion, usados, version, eliminada, pendientes, copia
+
+
+def _operaciones(datos: bytes):
+    posicion = 0
+    while posicion < len(datos):
+        tipo, version, largo = _OPERACION.unpack_from(datos, posicion)
+        posicion += _OPERACION.size
+        yield tipo, version, datos[posicion:posicion + largo].decode("utf-8")
+        posicion += largo
+
+
+class _MazoNoDisponible(Exception):
+    """El segmento de la generación ya no existe (hubo otra carga o una compactación)"""
+
+
+class _Tablero:
+    """
+    Marcas y ganadores de una generación, en su segmento: una máscara de 64
+    bits por cartón (número de asignación, orden de reparto) y los ganadores
+    como (versión del canto, número). Quien canta lo actualiza dentro de la
+    sección del seqlock; los demás workers copian de aquí las marcas.
+    Sin cartones (motor bitset, demo o cartones de más de 64 palabras) no hay tablero.
+    """
+    __slots__ = ("generacion", "segmento", "cartones", "cuenta", "marcas", "versiones", "numeros", "completos")
+
+    def __init__(self, generacion: int, segmento: shared_memory.SharedMemory):
+        self.generacion = generacion
+        self.segmento = segmento
+        self.cartones = _GENERACION.unpack_from(segmento.buf, 0)[2]
+        self.cuenta = self.marcas = self.versiones = self.numeros = None
+        # Máscara de cada cartón completo (solo la calcula el worker que canta)
+        self.completos: Optional[np.ndarray] = None
+        if self.cartones:
+            n, inicio = self.cartones, _GENERACION.size
+            self.cuenta = np.ndarray(1, np.uint64, segmento.buf, inicio)
+            self.marcas = np.ndarray(n, np.uint64, segmento.buf, inicio + 8)
+            self.versiones = np.ndarray(n, np.uint64, segmento.buf, inicio + 8 + 8 * n)
+            self.numeros = np.ndarray(n, np.uint32, segmento.buf, inicio + 8 + 16 * n)
+
+    def copiar(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(máscaras, versiones, números de los ganadores) copiados del segmento"""
+        if not self.cartones:
+            return None
+        cuenta = min(int(self.cuenta[0]), self.cartones)
+        return self.marcas.copy(), self.versiones[:cuenta].copy(), self.numeros[:cuenta].copy()
+
+    def anotar_canto(self, juego, version: int) -> Optional[np.ndarray]:
+        """
+        Suma al tablero la última palabra cantada (un OR vectorizado sobre los
+        cartones que la contienen) y anota los cartones que completó.
+        Retorna los números marcados (dentro de la sección del seqlock).
+        """
+        if self.completos is None:
+            # Todos los bits de cada cartón (tamaños de 1 a 64: 2^t - 1 sin desbordar)
+            totales = juego.asignaciones.totales().astype(np.uint64)
+            self.completos = (np.left_shift(np.uint64(1), totales - np.uint64(1)) - np.uint64(1)) * np.uint64(2) + np.uint64(1)
+        cantada = juego.palabras_cantadas[-1]
+        numeros, bits = juego.bits_palabra(cantada["idioma"], cantada["palabra"])
+        previas = self.marcas[numeros]
+        nuevas = previas | bits
+        self.marcas[numeros] = nuevas
+        llenos = self.completos[numeros]
+        ganadores = numeros[(previas != llenos) & (nuevas == llenos)]
+        if len(ganadores):
+            cuenta = int(self.cuenta[0])
+            self.versiones[cuenta:cuenta + len(ganadores)] = version
+            self.numeros[cuenta:cuenta + len(ganadores)] = ganadores
+            self.cuenta[0] = cuenta + len(ganadores)
+        return numeros
+
+    def cerrar(self):
+        # Las vistas de NumPy retienen el buffer: se sueltan antes de cerrar el segmento
+        self.cuenta = self.marcas = self.versiones = self.numeros = None
+        self.segmento.close()
+
+
+class _SalaCompartida:
+    """Lo que este worker ya aplicó del segmento de control de una sala"""
+    __slots__ = ("control", "generacion", "posicion", "marcas", "tablero", "espejo", "lock")
+
+    def __init__(self):
+        self.control: Optional[shared_memory.SharedMemory] = None
+        self.generacion: Optional[int] = None
+        self.posicion = 0
+        # Marcas guardadas de la generación (base + cantos): posición en los snapshots
+        self.marcas = 0
+        self.tablero: Optional[_Tablero] = None
+        # Máscaras que ya tiene el juego de este worker (None: se repiten los cantos)
+        self.espejo: Optional[np.ndarray] = None
+        self.lock = threading.Lock()
+
+
+class EstadoCompartido:
+    """
+    Salas de este worker sincronizadas con los segmentos compartidos.
+    Las lecturas comparan la cabecera con lo ya aplicado (sin bloqueo) y
+    solo si hay cambios aplican las operaciones nuevas; las mutaciones se
+    hacen dentro de `escritura` y se anexan con `publicar` o `nueva_generacion`.
+    """
+
+    def __init__(self, prefijo: str, salas: RegistroSalas, capacidad: int = MEMORIA_COMPARTIDA_LOG_BYTES):
+        self.prefijo = prefijo
+        self.salas = salas
+        self.capacidad = capacidad
+        self._salas: Dict[str, _SalaCompartida] = {}
+        self._lock = threading.Lock()
+        # (sala, marcas, generación) tras aplicar cambios: mantiene los snapshots de este worker al día
+        self.al_sincronizar: Optional[Callable[[str, int, int], None]] = None
+
+    def _nombre(self, sala_id: str) -> str:
+        return f"{self.prefijo}_{sala_id}"
+
+    def _nombre_mazo(self, sala_id: str, generacion: int) -> str:
+        return f"{self.prefijo}_{sala_id}_{generacion}"
+
+    def _estado(self, sala_id: str) -> _SalaCompartida:
+        with self._lock:
+            estado = self._salas.get(sala_id)
+            if estado is None:
+                estado = self._salas[sala_id] = _SalaCompartida()
+            return estado
+
+    @contextlib.contextmanager
+    def _bloqueo(self, sala_id: str):
+        """Exclusión entre procesos (y entre hilos: cada uno abre su descriptor)"""
+        ruta = os.path.join(tempfile.gettempdir(), f"{self._nombre(sala_id)}.lock")
+        descriptor = os.open(ruta, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(descriptor)
+
+    # -------------------------------------------------------------------------
+    # Lectura
+    # -------------------------------------------------------------------------
+
+    def pendiente(self, sala_id: str) -> bool:
+        """¿Hay cambios de otros workers sin aplicar? (solo lee la cabecera)"""
+        estado = self._salas.get(sala_id)
+        if estado is None or estado.control is None:
+            return True
+        generacion, usados, _, eliminada = _CAMPOS.unpack_from(estado.control.buf, _SECUENCIA.size)
+        return eliminada or generacion != estado.generacion or usados != estado.posicion
+
+    def sincronizar(self, sala_id: str, sala: Optional[Sala]) -> Optional[Sala]:
+        """
+        La sala de este worker al día con el estado compartido (la crea si
+        otro worker la creó); None si la sala no existe en ningún worker.
+        """
+        estado = self._estado(sala_id)
+        if sala is None:
+            with estado.lock:
+                if estado.control is None:
+                    estado.control = _abrir_segmento(self._nombre(sala_id))
+                    if estado.control is None:
+                        return None
+            sala = self.salas.obtener(sala_id) or self.salas.crear(sala_id)
+        elif estado.control is None:
+            with estado.lock, self._bloqueo(sala_id):
+                self._asegurar_control(sala, estado)
+
+        if not self.pendiente(sala_id):
+            return sala
+        with estado.lock:
+            if self._aplicar_pendientes(sala, estado):
+                return sala
+        # Eliminada en otro worker: puede existir ya una sala nueva con el mismo id
+        self._soltar(sala_id)
+        self.salas.descartar(sala_id)
+        return self.sincronizar(sala_id, self.salas.obtener(sala_id))
+
+    def _aplicar_pendientes(self, sala: Sala, estado: _SalaCompartida) -> bool:
+        """Aplica las operaciones nuevas; False si la sala se eliminó"""
+        while True:
+            try:
+                generacion, usados, _, eliminada, pendientes, tablero = _instantanea(
+                    estado.control.buf, estado.generacion, estado.posicion,
+                    lambda generacion: self._tablero(sala.id, estado, generacion).copiar()
+                )
+            except _MazoNoDisponible:
+                continue
+            if eliminada:
+                return False
+            if generacion == estado.generacion and usados == estado.posicion:
+                return True
+            try:
+                self._aplicar(sala, estado, generacion, pendientes, tablero)
+            except _MazoNoDisponible:
+                continue
+            estado.generacion = generacion
+            estado.posicion = usados
+            sala.actor.publicar()
+            self._avisar(sala.id, estado)
+            return True
+
+    def _aplicar(
+        self, sala: Sala, estado: _SalaCompartida, generacion: int, pendientes: bytes, tablero: Optional[Tuple]
+    ):
+        # Los eventos salen al final: las marcas copiadas del tablero van con el último canto
+        eventos: List[Tuple[Dict, object]] = []
+        copiar = False
+        for tipo, version, dato in _operaciones(pendientes):
+            if tipo == b"B":
+                base = self._reconstruir(sala, generacion, version)
+                estado.marcas = base["marcas_guardadas"]
+                estado.espejo = sala.juego.mascaras() if tablero is not None else None
+                eventos.append(({"tipo": "reinicio", "version": sala.juego.version}, ()))
+                continue
+
+            juego = sala.juego
+            juego.version_replicada = version
+            if tipo == b"C":
+                if estado.espejo is not None and len(estado.espejo) == len(juego.asignaciones):
+                    marcas, versiones, numeros = tablero
+                    ganadores = [juego.asignaciones[n] for n in numeros[versiones == version].tolist()]
+                    resultado = juego.cantar_replicado(dato, ganadores)
+                    copiar = True
+                else:
+                    resultado = juego.cantar_palabra(dato, "off")
+                if "error" not in resultado:
+                    estado.marcas += 1
+                    if sala.eventos.hay_suscriptores():
+                        eventos.append((evento_palabra(resultado, juego.version), juego.marcados_ultimo_canto()))
+            elif tipo == b"S":
+                resultado = juego.siguiente_idioma()
+                if "error" not in resultado:
+                    eventos.append(({
+                        "tipo": "idioma",
+                        "version": juego.version,
+                        "idioma_actual": resultado["idioma_actual"],
+                        "idx": resultado["idx"]
+                    }, ()))
+            elif tipo == b"I":
+                if "error" not in juego.iniciar_juego(json.loads(dato)):
+                    eventos.append(({"tipo": "reinicio", "version": juego.version}, ()))
+            # Una operación que aquí no cambió nada no consume la versión
+            juego.version_replicada = None
+
+        if copiar:
+            # Una pasada por cartón cambiado, sin importar cuántos cantos llegaron
+            marcas = tablero[0]
+            numeros = np.flatnonzero(marcas != estado.espejo)
+            sala.juego.aplicar_marcas(numeros, marcas[numeros])
+            estado.espejo = marcas
+        for evento, marcados in eventos:
+            sala.eventos.publicar(evento, marcados)
+
+    def _tablero(self, sala_id: str, estado: _SalaCompartida, generacion: int) -> _Tablero:
+        """Tablero de la generación (se abre una vez por generación y queda abierto)"""
+        tablero = estado.tablero
+        if tablero is None or tablero.generacion != generacion:
+            segmento = _abrir_segmento(self._nombre_mazo(sala_id, generacion))
+            if segmento is None:
+                raise _MazoNoDisponible()
+            if tablero is not None:
+                tablero.cerrar()
+            tablero = estado.tablero = _Tablero(generacion, segmento)
+        return tablero
+
+    def _reconstruir(self, sala: Sala, generacion: int, version: int) -> Dict:
+        """GameManager nuevo desde la base y los cartones del segmento de la generación"""
+        segmento = _abrir_segmento(self._nombre_mazo(sala.id, generacion))
+        if segmento is None:
+            raise _MazoNoDisponible()
+        try:
+            largo_base, largo_mazo, cartones = _GENERACION.unpack_from(segmento.buf, 0)
+            inicio = _GENERACION.size + _tamano_tablero(cartones)
+            base = json.loads(bytes(segmento.buf[inicio:inicio + largo_base]).decode("utf-8"))
+            cartones = []
+            if largo_mazo:
+                mazo = segmento.buf[inicio + largo_base:inicio + largo_base + largo_mazo]
+                try:
+                    cartones = leer_mazo_ordenado(mazo)
+                finally:
+                    mazo.release()
+        finally:
+            segmento.close()
+
+        estado = {**base["estado"], "version": version}
+        juego = juego_desde_snapshot(
+            cartones, base["duenos"], base["config"], estado, [tuple(m) for m in base["marcas"]]
+        )
+        # La misma versión que en el worker que publicó la base (ETag y deltas)
+        juego.version = juego.version_base = version
+        _avanzar_versiones(version)
+        sala.juego = juego
+        self.salas.registrar_carga(sala.id)
+        return base
+
+    def _avisar(self, sala_id: str, estado: _SalaCompartida):
+        if self.al_sincronizar is not None:
+            self.al_sincronizar(sala_id, estado.marcas, estado.generacion)
+
+    # -------------------------------------------------------------------------
+    # Escritura
+    # -------------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def escritura(self, sala: Sala):
+        """
+        Mutación de la sala serializada entre workers: antes se aplican los
+        cambios pendientes y las versiones continúan después de la última publicada.
+        """
+        estado = self._estado(sala.id)
+        with estado.lock, self._bloqueo(sala.id):
+            self._asegurar_control(sala, estado)
+            if not self._aplicar_pendientes(sala, estado):
+                # Eliminada en otro worker: esta escritura la vuelve a crear
+                _cerrar_control(estado)
+                self._asegurar_control(sala, estado)
+            _avanzar_versiones(_CAMPOS.unpack_from(estado.control.buf, _SECUENCIA.size)[2])
+            yield
+
+    def _asegurar_control(self, sala: Sala, estado: _SalaCompartida):
+        """Abre el segmento de control; si no existe lo crea con el estado local (con flock)"""
+        if estado.control is not None:
+            return
+        estado.control = _abrir_segmento(self._nombre(sala.id))
+        if estado.control is None:
+            estado.control = _abrir_segmento(self._nombre(sala.id), _INICIO_REGISTRO + self.capacidad)
+            self.nueva_generacion(sala)
+
+    def publicar(self, sala: Sala, tipo: str, dato: str = "", version: Optional[int] = None):
+        """Anexa una operación ya aplicada en este worker (dentro de `escritura`)"""
+        estado = self._salas[sala.id]
+        datos = dato.encode("utf-8")
+        operacion = _OPERACION.pack(tipo.encode(), sala.juego.version if version is None else version, len(datos)) + datos
+        buffer = estado.control.buf
+        final = estado.posicion + len(operacion)
+        if final > self.capacidad:
+            # Registro lleno: la operación ya está aplicada en el juego local,
+            # una generación nueva la publica junto con todo el estado
+            print(f"🗜️ Registro compartido de la sala '{sala.id}' lleno: compactando")
+            # Los snapshots siguen numerando las marcas donde iban (no se reescriben)
+            self.nueva_generacion(sala, estado.marcas + (tipo == "C"))
+            return
+        with _escribiendo(buffer):
+            buffer[_INICIO_REGISTRO + estado.posicion:_INICIO_REGISTRO + final] = operacion
+            _CAMPOS.pack_into(buffer, _SECUENCIA.size, estado.generacion, final, sala.juego.version, 0)
+            if tipo == "C" and estado.espejo is not None:
+                numeros = estado.tablero.anotar_canto(sala.juego, sala.juego.version)
+                estado.espejo[numeros] = estado.tablero.marcas[numeros]
+        estado.posicion = final
+        # Los snapshots de este worker ya cuentan la marca (registrar_canto)
+        if tipo == "C":
+            estado.marcas += 1
+
+    def nueva_generacion(self, sala: Sala, marcas_guardadas: Optional[int] = None):
+        """
+        Publica el estado completo de la sala (carga, reinicio, demo o registro
+        lleno): los demás workers reconstruyen su juego desde la base y los
+        cartones compartidos. `marcas_guardadas` es la posición de los snapshots
+        (por defecto, las marcas de la base: la carga los reescribe completos).
+        """
+        estado = self._salas[sala.id]
+        juego = sala.juego
+        buffer = estado.control.buf
+        anterior = _CAMPOS.unpack_from(buffer, _SECUENCIA.size)[0]
+        # Basada en el reloj: también crece entre reinicios (la usan los snapshots)
+        generacion = max(time.time_ns(), anterior + 1)
+
+        base, cartones = base_juego(juego)
+        base["marcas_guardadas"] = len(base["marcas"]) if marcas_guardadas is None else marcas_guardadas
+        mascaras = juego.mascaras()
+        segmento = self._escribir_generacion(self._nombre_mazo(sala.id, generacion), base, cartones, mascaras)
+        if estado.tablero is not None:
+            estado.tablero.cerrar()
+        estado.tablero = _Tablero(generacion, segmento)
+        estado.espejo = mascaras if estado.tablero.cartones else None
+        # La base vive en el segmento de la generación: el registro siempre tiene lugar para B
+        operacion = _OPERACION.pack(b"B", juego.version, 0)
+        with _escribiendo(buffer):
+            buffer[_INICIO_REGISTRO:_INICIO_REGISTRO + len(operacion)] = operacion
+            _CAMPOS.pack_into(buffer, _SECUENCIA.size, generacion, len(operacion), juego.version, 0)
+        if anterior:
+            _borrar_segmento(self._nombre_mazo(sala.id, anterior))
+
+        estado.generacion = generacion
+        estado.posicion = len(operacion)
+        estado.marcas = base["marcas_guardadas"]
+        self._avisar(sala.id, estado)
+
+    @staticmethod
+    def _escribir_generacion(
+        nombre: str, base: Dict, cartones: List[Carton], mascaras: Optional[np.ndarray]
+    ) -> shared_memory.SharedMemory:
+        """Segmento de la generación (queda abierto: es el tablero de este worker)"""
+        n = 0 if mascaras is None else len(mascaras)
+        archivo = io.BytesIO()
+        datos = json.dumps(base).encode("utf-8")
+        archivo.write(_GENERACION.pack(0, 0, n))
+        if n:
+            # Sin ganadores anotados: los de la base ya están en sus marcas
+            archivo.write(struct.pack("<Q", 0))
+            archivo.write(mascaras.tobytes())
+            archivo.write(bytes(_tamano_tablero(n) - 8 - 8 * n))
+        archivo.write(datos)
+        largo_mazo = escribir_mazo_ordenado(cartones, archivo) if cartones else 0
+        archivo.seek(0)
+        archivo.write(_GENERACION.pack(len(datos), largo_mazo, n))
+        tamano = len(archivo.getbuffer())
+        try:
+            segmento = _abrir_segmento(nombre, tamano)
+        except FileExistsError:
+            _borrar_segmento(nombre)
+            segmento = _abrir_segmento(nombre, tamano)
+        segmento.buf[:tamano] = archivo.getbuffer()
+        return segmento
+
+    def eliminar(self, sala_id: str):
+        """Marca la sala como eliminada para los demás workers y borra sus segmentos"""
+        estado = self._estado(sala_id)
+        with estado.lock, self._bloqueo(sala_id):
+            control = estado.control or _abrir_segmento(self._nombre(sala_id))
+            if control is not None:
+                generacion, usados, version, _ = _CAMPOS.unpack_from(control.buf, _SECUENCIA.size)
+                with _escribiendo(control.buf):
+                    _CAMPOS.pack_into(control.buf, _SECUENCIA.size, generacion, usados, version, 1)
+                if generacion:
+                    _borrar_segmento(self._nombre_mazo(sala_id, generacion))
+                control.close()
+                _borrar_segmento(self._nombre(sala_id))
+            estado.control = None
+            _cerrar_control(estado)
+        with self._lock:
+            self._salas.pop(sala_id, None)
+
+    def soltar(self, sala_id: str):
+        """Deja de seguir la sala en este worker (expulsión local); el estado compartido sigue"""
+        estado = self._salas.get(sala_id)
+        if estado is not None:
+            with estado.lock:
+                self._soltar(sala_id, estado)
+
+    def _soltar(self, sala_id: str, estado: Optional[_SalaCompartida] = None):
+        with self._lock:
+            estado = estado or self._salas.get(sala_id)
+            self._salas.pop(sala_id, None)
+        if estado is not None:
+            _cerrar_control(estado)
+
+
+def _cerrar_control(estado: _SalaCompartida):
+    if estado.control is not None:
+        estado.control.close()
+    if estado.tablero is not None:
+        estado.tablero.cerrar()
+    estado.control = None
+    estado.tablero = None
+    estado.espejo = None
+    estado.generacion = None
+    estado.posicion = 0
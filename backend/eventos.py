@@ -0,0 +1,105 @@
+# =============================================================================
+# CANAL DE EVENTOS EN TIEMPO REAL (WEBSOCKET / SSE)
+# =============================================================================
+
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Carton, Jugador
+from config import MAX_EVENTOS_SUSCRIPTOR
+
+
+class Suscriptor:
+    """Cola acotada de un cliente; si se llena se descarta el evento más antiguo"""
+
+    def __init__(self, jugador: Optional[str] = None, max_eventos: int = MAX_EVENTOS_SUSCRIPTOR):
+        self.jugador = jugador
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=max_eventos)
+        self.descartados = 0
+
+    def entregar(self, evento: Dict):
+        if self.cola.full():
+            self.cola.get_nowait()
+            self.descartados += 1
+        self.cola.put_nowait(evento)
+
+    async def siguiente(self) -> Dict:
+        return await self.cola.get()
+
+
+class CanalEventos:
+    """
+    Difusión asyncio de los eventos de una sala.
+    `publicar` se puede llamar desde los hilos del threadpool de FastAPI:
+    la entrega se programa en el event loop y nunca bloquea a quien publica.
+    """
+
+    def __init__(self):
+        self._suscriptores: List[Suscriptor] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def suscribir(self, jugador: Optional[str] = None) -> Suscriptor:
+        """Debe llamarse desde el event loop (endpoint async)"""
+        self._loop = asyncio.get_running_loop()
+        suscriptor = Suscriptor(jugador)
+        with self._lock:
+            self._suscriptores.append(suscriptor)
+        return suscriptor
+
+    def desuscribir(self, suscriptor: Suscriptor):
+        with self._lock:
+            if suscriptor in self._suscriptores:
+                self._suscriptores.remove(suscriptor)
+
+    def hay_suscriptores(self) -> bool:
+        return bool(self._suscriptores)
+
+    def publicar(self, evento: Dict, marcados: Iterable[Tuple[Jugador, Carton]] = ()):
+        """
+        Difunde un evento. Los suscriptores por jugador reciben además
+        solo las marcas de sus propios cartones.
+        """
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        if not suscriptores or self._loop is None:
+            return
+
+        por_jugador: Dict[str, List[Dict]] = {}
+        if any(s.jugador is not None for s in suscriptores):
+            nombres = {s.jugador for s in suscriptores if s.jugador is not None}
+            for jugador, carton in marcados:
+                if jugador.nombre in nombres:
+                    por_jugador.setdefault(jugador.nombre, []).append({
+                        "carton_id": carton.id,
+                        "aciertos": carton.aciertos
+                    })
+
+        entregas = []
+        for suscriptor in suscriptores:
+            if suscriptor.jugador is None:
+                entregas.append((suscriptor, evento))
+            else:
+                entregas.append((suscriptor, {**evento, "marcados": por_jugador.get(suscriptor.jugador, [])}))
+
+        self._loop.call_soon_threadsafe(self._entregar, entregas)
+
+    @staticmethod
+    def _entregar(entregas: List[Tuple[Suscriptor, Dict]]):
+        for suscriptor, evento in entregas:
+            suscriptor.entregar(evento)
+
+
+def evento_palabra(resultado: Dict, version: int) -> Dict:
+    """Evento compacto a partir del resultado de cantar_palabra"""
+    return {
+        "tipo": "palabra",
+        "version": version,
+        "palabra": resultado["palabra"],
+        "idioma": resultado["idioma"],
+        "cambio_ronda": resultado["cambio_ronda"],
+        "idioma_nuevo": resultado["idioma_nuevo"],
+        "reinicio_loop": resultado["reinicio_loop"],
+        "ganadores": resultado["ganadores"]
+    }
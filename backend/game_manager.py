@@ -1,8 +1,137 @@
+import io
+import itertools
 import random
-import re
-from typing import List, Dict, Optional, Tuple
-from models import Carton, Jugador
-from config import REGLAS_TAMANO, NOMBRES_IDIOMAS, BANCO_PALABRAS
+import secrets
+from array import array
+from collections import deque
+from typing import Callable, List, Dict, Optional, Sequence, Set, Tuple, Iterable, Union
+
+import numpy as np
+
+from models import Carton, Jugador, Vocabulario, Vocabularios
+from parser_cartones import parsear_cartones_paralelo, ErrorValidacionCarton
+from bancos import RegistroBancos
+from motor_bitset import MotorBitset, FilasMarcadas
+from casi_ganadores import CasiGanadores
+from serializacion import dumps
+from duplicados import buscar_duplicados, buscar_similares
+from mazo_binario import MazoBinario, MazoMatriz
+from reparto import Asignaciones, PlanReparto, nombres_jugadores, plan_por_duenos, repartir_minimo_uno, repartir_por_cuotas
+from metricas import Fases, FASES_CARGA, FASES_CANTO, CARTONES_CARGADOS, PALABRAS_CANTADAS, MARCAS_APLICADAS
+from trazas import Traza, TRAZA_RESUMEN, TRAZA_COMPLETO, nivel_traza_valido
+from config import (
+    REGLAS_TAMANO, NOMBRES_IDIOMAS, BANCO_PALABRAS, MOTORES_MARCADO,
+    NIVEL_TRAZA_DEFECTO, MAX_CAMBIOS_VERSIONADOS, CASI_GANADORES_MAX_K,
+    DUPLICADOS_DEFECTO, DUPLICADOS_LIMITE
+)
+
+SEPARADOR = "=" * 60
+
+# Contador de versiones compartido por todos los juegos del proceso:
+# un juego nuevo nunca repite una versión (ni un ETag) de uno anterior
+_versiones = itertools.count(1)
+# Ids de los cartones aleatorios sueltos (/api/generar-carton-aleatorio)
+_ids_aleatorios = itertools.count(1)
+
+
+def _avanzar_versiones(minima: int):
+    """Evita repetir versiones anteriores a un reinicio del proceso (snapshots restaurados)"""
+    global _versiones
+    _versiones = itertools.count(max(next(_versiones), minima + 1))
+
+
+class IndiceMatriz(dict):
+    """
+    Índice invertido de un idioma de un mazo binario: la entrada de cada
+    palabra, (números, posiciones), se calcula la primera vez que se pide con
+    una comparación sobre la matriz de ids del idioma y queda guardada.
+    """
+
+    def __init__(self, matriz: np.ndarray, numeros: np.ndarray, vocab: Vocabulario):
+        super().__init__()
+        self.matriz = matriz
+        # Número de asignación de cada fila de la matriz (-1: sin repartir)
+        self.numeros = numeros
+        self.vocab = vocab
+
+    def get(self, palabra: str, defecto=None):
+        entrada = dict.get(self, palabra)
+        if entrada is None:
+            entrada = self[palabra] = self._entrada(palabra)
+        return entrada if entrada[0] else defecto
+
+    def _entrada(self, palabra: str) -> Tuple[array, array]:
+        id_palabra = self.vocab.ids.get(palabra)
+        if id_palabra is None:
+            return array('I'), array('H')
+        filas, posiciones = np.nonzero(self.matriz == id_palabra)
+        # Filas ordenadas: una palabra repetida en un cartón solo cuenta en su primera posición
+        primera = np.ones(len(filas), dtype=bool)
+        primera[1:] = filas[1:] != filas[:-1]
+        numeros = self.numeros[filas[primera]]
+        posiciones = posiciones[primera]
+        repartidos = numeros >= 0
+        numeros, posiciones = numeros[repartidos], posiciones[repartidos]
+        # En orden de número, como el índice construido de una vez
+        orden = np.argsort(numeros, kind="stable")
+        return (
+            array('I', numeros[orden].astype(np.uint32).tobytes()),
+            array('H', posiciones[orden].astype(np.uint16).tobytes())
+        )
+
+
+class MarcasIndice:
+    """
+    Marcas del motor índice con un mazo binario: una máscara de 64 bits y las
+    palabras restantes por número de asignación, así marcar no crea cartones.
+    Cada cartón apunta aquí (motor, fila = número) en cuanto existe.
+    """
+
+    def __init__(self, asignaciones: Asignaciones):
+        self.asignaciones = asignaciones
+        self.totales = asignaciones.totales().astype(np.int64)
+        self.mascaras = np.zeros(len(asignaciones), dtype=np.uint64)
+        self.restantes = self.totales.copy()
+        for numero, carton in asignaciones.creados():
+            self.mascaras[numero] = carton.marcas
+            self.restantes[numero] -= carton.marcas.bit_count()
+            self._enlazar(numero, carton)
+        asignaciones.al_crear(self._enlazar)
+
+    def _enlazar(self, numero: int, carton: Carton):
+        carton.motor = self
+        carton.fila = numero
+
+    def par(self, numero: int) -> Tuple[Jugador, Carton]:
+        return self.asignaciones[numero]
+
+    def marcar(self, numeros: np.ndarray, bits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Suma el bit de la palabra a cada número (uno por cartón, ya deduplicado
+        en el índice). Retorna (números marcados, números que completaron).
+        """
+        previas = self.mascaras[numeros]
+        nuevas = previas | bits
+        cambio = nuevas != previas
+        marcados = numeros[cambio]
+        self.mascaras[marcados] = nuevas[cambio]
+        self.restantes[marcados] -= 1
+        return marcados, marcados[self.restantes[marcados] == 0]
+
+    def copiar(self, numeros: np.ndarray, mascaras: np.ndarray) -> np.ndarray:
+        """Reemplaza las máscaras de esos números; retorna las palabras que les faltaban antes"""
+        antes = self.restantes[numeros]
+        self.mascaras[numeros] = mascaras
+        self.restantes[numeros] = self.totales[numeros] - np.bitwise_count(mascaras)
+        return antes
+
+    def palabras_marcadas(self, carton: Carton) -> set:
+        mascara = int(self.mascaras[carton.fila])
+        palabras = carton.palabras
+        return {palabras[k] for k in range(len(palabras)) if mascara >> k & 1}
+
+    def aciertos(self, carton: Carton) -> int:
+        return carton.total_palabras - int(self.restantes[carton.fila])
 
 
 class GameManager:
@@ -11,26 +140,78 @@ class GameManager:
     Estrategia DAC preservada en las clases Carton y Jugador.
     """
     # Autoría Propia: Cecilia Montes
-    def __init__(self):
+    def __init__(self, motor: str = "indice", nivel_traza: str = NIVEL_TRAZA_DEFECTO):
         self.jugadores: List[Jugador] = []
         self.orden_idiomas: List[str] = []
         self.idioma_actual_idx: int = 0
         self.palabras_cantadas: List[Dict] = []
         self.juego_activo: bool = False
-        self.trace_algoritmo: List[str] = []
-        self.bancos_personalizados: Dict = {}  
+        if not nivel_traza_valido(nivel_traza):
+            raise ValueError(f"Nivel de traza desconocido: {nivel_traza}")
+        self.nivel_traza = nivel_traza
+        self.traza = Traza(nivel_traza)
+        # Bancos compilados (frozenset + ids) compartidos por carga, canto y generación
+        self.bancos = RegistroBancos()
         self.reglas_personalizadas: Dict = {}  
+        # Índice invertido: idioma -> palabra -> (números de asignación, posiciones en el cartón)
+        # Los arrays no crean objetos por entrada: el recolector no los recorre
+        self.asignaciones = Asignaciones([])
+        self.indice_invertido: Optional[Dict[str, Dict[str, Tuple[array, array]]]] = None
+        # Con un mazo binario las marcas del índice viven en vectores (no en los cartones)
+        self.marcas_indice: Optional[MarcasIndice] = None
+        # Motor de marcado: "indice" (índice invertido) o "bitset" (matriz NumPy)
+        if motor not in MOTORES_MARCADO:
+            raise ValueError(f"Motor de marcado desconocido: {motor}")
+        self.motor = motor
+        self.motor_bitset: Optional[MotorBitset] = None
+        # Cartones a falta de 1..CASI_GANADORES_MAX_K palabras, actualizados en cada canto
+        self.casi_ganadores: Optional[CasiGanadores] = None
+        # Informe de ids y palabras repetidas de la última carga
+        self.duplicados: Optional[Dict] = None
+        # Semilla del reparto y del orden de idiomas: con la misma semilla y el
+        # mismo mazo (orden de entrada, en `mazo`) el juego es reproducible
+        self.semilla: Optional[int] = None
+        self._rng = random.Random()
+        self.mazo: Sequence[Carton] = []
+        self.regla_reparto: Optional[str] = None
+        # Plan del último reparto (posiciones en `mazo` por jugador) y sus cuotas por idioma
+        self.reparto: Optional[PlanReparto] = None
+        self.cuotas: Optional[Dict[str, int]] = None
+        # Índice nombre -> jugador: (lista indexada, tamaño, dict); se rehace si cambia la lista
+        self._por_nombre: Tuple[Optional[List[Jugador]], int, Dict[str, Jugador]] = (None, 0, {})
+        # Versionado del estado para ETag y deltas (/api/estado?since=N)
+        self.version: int = next(_versiones)
+        self.version_base: int = self.version
+        self.cambios: deque = deque(maxlen=MAX_CAMBIOS_VERSIONADOS)
+        # Versión del próximo cambio si viene replicado de otro worker (misma versión y ETag en todos)
+        self.version_replicada: Optional[int] = None
+
+    @property
+    def bancos_personalizados(self) -> Dict:
+        return self.bancos.personalizados
+
+    @bancos_personalizados.setter
+    def bancos_personalizados(self, valor: Dict):
+        # Al cambiar los bancos se invalidan los compilados
+        self.bancos.configurar(valor)
 
     # Autoría Propia: Cecilia Montes
-    def _log(self, mensaje: str):
-        """Registra un mensaje de traza del algoritmo"""
-        print(f"[ALGORITMO] {mensaje}")
-        self.trace_algoritmo.append(mensaje)
+    def _log(self, mensaje: str, *args):
+        """Registra un mensaje de traza detallado (formato diferido)"""
+        self.traza.registrar(TRAZA_COMPLETO, mensaje, args)
+
+    def _log_resumen(self, mensaje: str, *args):
+        """Registra un mensaje de traza de resumen (formato diferido)"""
+        self.traza.registrar(TRAZA_RESUMEN, mensaje, args)
+
+    @property
+    def trace_algoritmo(self) -> List[str]:
+        return self.traza.como_lista()
 
     # Autoría Propia: Cecilia Montes
-    def _reset_trace(self):
-        """Limpia el log de trazas para nueva operación"""
-        self.trace_algoritmo = []
+    def _reset_trace(self, nivel_traza: Optional[str] = None):
+        """Limpia el log de trazas para nueva operación (nivel opcional por petición)"""
+        self.traza.reiniciar(nivel_traza or self.nivel_traza)
 
     # Algoritmo de Búsqueda Binaria tomado de:
     # [1] T. H. Cormen, C. E. Leiserson, R. L. Rivest, and C. Stein, 
@@ -41,31 +222,35 @@ class GameManager:
         Búsqueda binaria de palabra en lista ordenada.
         Retorna (encontrado, posicion) donde posicion es -1 si no se encuentra.
         """
-        self._log(f"🔍 Iniciando búsqueda binaria de '{palabra_buscar}'")
-        self._log(f"   Lista tiene {len(palabras_ordenadas)} elementos")
+        self._log("🔍 Iniciando búsqueda binaria de '%s'", palabra_buscar)
+        self._log("   Lista tiene %s elementos", len(palabras_ordenadas))
         
         izq, der = 0, len(palabras_ordenadas) - 1
         iteracion = 0
+        detalle = self.traza.activo(TRAZA_COMPLETO)
         
         while izq <= der:
             iteracion += 1
             medio = (izq + der) // 2
             palabra_medio = palabras_ordenadas[medio]
             
-            self._log(f"   Iteración {iteracion}: izq={izq}, der={der}, medio={medio}")
-            self._log(f"   Comparando '{palabra_buscar}' con '{palabra_medio}'")
+            if detalle:
+                self._log("   Iteración %s: izq=%s, der=%s, medio=%s", iteracion, izq, der, medio)
+                self._log("   Comparando '%s' con '%s'", palabra_buscar, palabra_medio)
             
             if palabra_medio == palabra_buscar:
-                self._log(f"   ✅ ¡Palabra encontrada en posición {medio}!")
+                self._log("   ✅ ¡Palabra encontrada en posición %s!", medio)
                 return True, medio
             elif palabra_medio < palabra_buscar:
-                self._log(f"   ⬆️ Búsqueda en mitad superior")
+                if detalle:
+                    self._log("   ⬆️ Búsqueda en mitad superior")
                 izq = medio + 1
             else:
-                self._log(f"   ⬇️ Búsqueda en mitad inferior")
+                if detalle:
+                    self._log("   ⬇️ Búsqueda en mitad inferior")
                 der = medio - 1
         
-        self._log(f"   ❌ Palabra no encontrada después de {iteracion} iteraciones")
+        self._log("   ❌ Palabra no encontrada después de %s iteraciones", iteracion)
         return False, -1
 
     # Algoritmo de Merge Sort tomado de:
@@ -77,13 +262,13 @@ class GameManager:
         if len(arr) <= 1:
             return arr
         
-        self._log(f"📊 Dividiendo lista de {len(arr)} elementos")
+        self._log("📊 Dividiendo lista de %s elementos", len(arr))
         
         medio = len(arr) // 2
         izq = self.merge_sort(arr[:medio])
         der = self.merge_sort(arr[medio:])
         
-        self._log(f"🔗 Fusionando sublistas: izq({len(izq)}) + der({len(der)})")
+        self._log("🔗 Fusionando sublistas: izq(%s) + der(%s)", len(izq), len(der))
         return self._merge(izq, der)
 
     # Autoría Propia: Cecilia Montes
@@ -108,13 +293,23 @@ class GameManager:
     # Autoría Propia: Cecilia Montes
     def cargar_cartones_masivos(
         self, 
-        contenido: str, 
+        contenido: Union[str, Iterable[str], MazoBinario], 
         n_jugadores: int,
         reglas_dinamicas: Dict,
         bancos_config: Dict,
-        rule_type: str
+        rule_type: str,
+        modo_duplicados: str = DUPLICADOS_DEFECTO,
+        semilla: Optional[int] = None,
+        nombres: Optional[List[str]] = None,
+        cuotas: Optional[Dict[str, int]] = None
     ) -> Tuple[bool, str, Optional[int]]:
-        """Carga y valida cartones desde archivo TXT (formato con espacios: ID palabra1 palabra2 ...)"""
+        """
+        Carga y valida cartones desde archivo TXT (formato con espacios: ID palabra1 palabra2 ...).
+        `contenido` puede ser el texto completo, un iterable de líneas (streaming)
+        o un MazoBinario ya abierto (sin parseo de texto). Sin `semilla` se sortea una;
+        `nombres` reemplaza a Jugador_1..Jugador_n y `cuotas` aplica a la regla "cuotas".
+        """
+        fases = Fases(FASES_CARGA)
         self._reset_trace()
         
         # GUARDAR los bancos y reglas personalizados
@@ -126,53 +321,45 @@ class GameManager:
         print("=" * 60)
         
         try:
-            lineas = contenido.strip().split('\n')
-            cartones_cargados = []
-            linea_num = 0
-            
-            print(f"📄 Archivo tiene {len(lineas)} líneas")
+            if nombres:
+                n_jugadores = len(nombres)
             print(f"👥 Repartiendo entre {n_jugadores} jugadores")
             print(f"📋 Regla: {rule_type}")
             print(f"🌐 Idiomas configurados: {', '.join(reglas_dinamicas.keys())}")
             
-            for linea in lineas:
-                linea_num += 1
-                linea = linea.strip()
-                
-                if not linea or linea.startswith('#'):
-                    continue
-                
-                partes = linea.split()
-                if len(partes) < 2:
-                    print(f"❌ ERROR: Formato inválido en línea {linea_num}")
-                    return False, f"Formato inválido en línea {linea_num}", linea_num
-                
-                carton_id = partes[0].strip()
-                match = re.match(r'^([A-Z]{2})\d+', carton_id)
-                if not match:
-                    print(f"❌ ERROR: No se puede extraer idioma del ID '{carton_id}' (línea {linea_num})")
-                    return False, f"Formato de ID inválido en línea {linea_num}", linea_num
-                idioma = match.group(1).upper()
-                palabras = [p.strip().upper() for p in partes[1:]]
-                
-                if idioma not in reglas_dinamicas:
-                    print(f"❌ ERROR: Idioma '{idioma}' no configurado en línea {linea_num}")
-                    return False, f"Idioma '{idioma}' no está configurado", linea_num
-                
-                esperadas = reglas_dinamicas[idioma]['max_palabras']
-                if len(palabras) != esperadas:
-                    print(f"❌ ERROR: Cartón requiere {esperadas} palabras, recibió {len(palabras)} (línea {linea_num})")
-                    return False, f"El cartón requiere exactamente {esperadas} palabras", linea_num
-                
-                if idioma in bancos_config:
-                    banco = bancos_config[idioma]
-                    for palabra in palabras:
-                        if palabra not in banco:
-                            print(f"❌ ERROR: '{palabra}' no existe en banco de {idioma} (línea {linea_num})")
-                            return False, f"La palabra '{palabra}' no pertenece al idioma {idioma}", linea_num
-                
-                carton = Carton(carton_id, idioma, palabras)
-                cartones_cargados.append(carton)
+            # Vocabularios propios de esta carga: se liberan junto con el mazo que reemplaza
+            vocabularios = Vocabularios()
+            try:
+                if isinstance(contenido, MazoBinario):
+                    print(f"📦 Mazo binario: {len(contenido)} cartones")
+                    cartones_cargados = contenido.cartones(
+                        reglas_dinamicas, self.bancos.conjuntos_personalizados(), vocabularios
+                    )
+                else:
+                    # Entrada en streaming: texto completo o cualquier iterable de líneas
+                    lineas = io.StringIO(contenido) if isinstance(contenido, str) else contenido
+                    cartones_cargados = list(parsear_cartones_paralelo(
+                        lineas, reglas_dinamicas, self.bancos.conjuntos_personalizados(),
+                        vocabularios=vocabularios
+                    ))
+                    vocabularios.unificar(cartones_cargados)
+            except ErrorValidacionCarton as e:
+                return False, e.mensaje, e.linea
+            # El parser valida cada línea al leerla: lectura y validación son una sola fase
+            fases.marcar("parseo_validacion")
+
+            self.duplicados = buscar_duplicados(cartones_cargados, DUPLICADOS_LIMITE)
+            fases.marcar("duplicados")
+            ids_repetidos = self.duplicados["total_ids_repetidos"]
+            palabras_repetidas = self.duplicados["total_palabras_repetidas"]
+            if ids_repetidos or palabras_repetidas:
+                mensaje = (
+                    f"Cartones duplicados: {ids_repetidos} ids repetidos y "
+                    f"{palabras_repetidas} cartones con las mismas palabras que otro"
+                )
+                print(f"⚠️ {mensaje}")
+                if modo_duplicados == "rechazar":
+                    return False, mensaje, None
             
             print(f"✅ {len(cartones_cargados)} cartones validados correctamente")
             
@@ -182,133 +369,314 @@ class GameManager:
             
             if rule_type == "uno_por_idioma":
                 print("📌 Estrategia: Un cartón de cada idioma por jugador")
-                exito, mensaje = self._repartir_uno_por_idioma(cartones_cargados, n_jugadores, reglas_dinamicas)
+            elif rule_type == "cuotas":
+                print(f"📌 Estrategia: Cuotas por idioma y jugador {cuotas}")
             else:
                 print("📌 Estrategia: Mínimo un cartón por jugador")
-                exito, mensaje = self._repartir_minimo_uno(cartones_cargados, n_jugadores)
+            self.sembrar(semilla)
+            print(f"🌱 Semilla: {self.semilla}")
+            exito, mensaje = self.repartir(
+                cartones_cargados, n_jugadores, rule_type, reglas_dinamicas, nombres, cuotas
+            )
             
             if not exito:
                 return False, mensaje, None
+            fases.marcar("reparto")
+            
+            self._preparar_motor()
+            fases.marcar("indices")
+            CARTONES_CARGADOS.sumar(len(cartones_cargados))
             
             print("\n" + "=" * 60)
             print("✅ CARGA COMPLETADA EXITOSAMENTE")
             print("=" * 60)
             
-            return True, f"Se cargaron {len(cartones_cargados)} cartones para {n_jugadores} jugadores", None
+            self.registrar_cambio_completo()
+            return True, f"Se cargaron {len(cartones_cargados)} cartones para {len(self.jugadores)} jugadores", None
             
+        except UnicodeDecodeError:
+            print("❌ ERROR: El archivo no está en formato UTF-8")
+            return False, "El archivo no está en formato UTF-8", None
         except Exception as e:
             print(f"❌ ERROR INESPERADO: {str(e)}")
             return False, f"Error al procesar: {str(e)}", None
 
+    def sembrar(self, semilla: Optional[int] = None) -> int:
+        """Fija la semilla del reparto y del orden de idiomas (sin semilla se sortea una)"""
+        self.semilla = semilla if semilla is not None else secrets.randbits(63)
+        self._rng = random.Random(self.semilla)
+        return self.semilla
+
+    def repartir(
+        self,
+        cartones: Sequence[Carton],
+        n_jugadores: int,
+        rule_type: str,
+        reglas: Dict,
+        nombres: Optional[List[str]] = None,
+        cuotas: Optional[Dict[str, int]] = None
+    ) -> Tuple[bool, str]:
+        """Reparte según la regla con la semilla fijada; `cartones` queda en `mazo` en su orden de entrada"""
+        self.mazo = cartones
+        self.regla_reparto = rule_type
+        try:
+            nombres = nombres_jugadores(n_jugadores, nombres)
+        except ValueError as e:
+            return False, str(e)
+        if rule_type == "uno_por_idioma":
+            return self._repartir_uno_por_idioma(cartones, nombres, reglas)
+        if rule_type == "cuotas":
+            return self._repartir_cuotas(cartones, nombres, cuotas or {})
+        return self._repartir_minimo_uno(cartones, nombres)
+
+    def reproducir_reparto(
+        self,
+        cartones: Sequence[Carton],
+        n_jugadores: int,
+        rule_type: str,
+        semilla: int,
+        nombres: Optional[List[str]] = None,
+        cuotas: Optional[Dict[str, int]] = None
+    ) -> Tuple[bool, str]:
+        """Reparto e índices de una carga ya validada (repetición de la bitácora)"""
+        self.sembrar(semilla)
+        exito, mensaje = self.repartir(cartones, n_jugadores, rule_type, self.reglas_personalizadas, nombres, cuotas)
+        if exito:
+            self._preparar_motor()
+            self.registrar_cambio_completo()
+        return exito, mensaje
+
     # Autoría Propia: Cecilia Montes
-    def _repartir_minimo_uno(self, cartones: List[Carton], n_jugadores: int) -> Tuple[bool, str]:
+    def _repartir_minimo_uno(self, cartones: Sequence[Carton], nombres: List[str]) -> Tuple[bool, str]:
         """Reparte cartones asegurando mínimo uno por jugador"""
-        self._log(f"🔄 Mezclando {len(cartones)} cartones aleatoriamente...")
-        random.shuffle(cartones)
-        
-        if len(cartones) < n_jugadores:
-            return False, "No hay suficientes cartones para todos los jugadores"
-        
-        self.jugadores = []
-        self._log(f"👤 Creando {n_jugadores} jugadores...")
-        
-        for i in range(n_jugadores):
-            jugador = Jugador(f"Jugador_{i+1}", [])
-            self.jugadores.append(jugador)
-            self._log(f"   ✓ {jugador.nombre} creado")
-        
-        # Primera ronda: asegurar 1 cartón por jugador
-        self._log("\n🎯 Primera fase: Asignando 1 cartón a cada jugador")
-        for i, jugador in enumerate(self.jugadores):
-            carton = cartones[i]
-            jugador.cartones.append(carton)
-            self._log(f"   → {jugador.nombre} recibe cartón {carton.id} ({carton.idioma})")
-        
-        # Segunda ronda: repartir cartones restantes
-        cartones_restantes = cartones[n_jugadores:]
-        self._log(f"\n🎯 Segunda fase: Repartiendo {len(cartones_restantes)} cartones restantes")
-        
-        idx_jugador = 0
-        for carton in cartones_restantes:
-            self.jugadores[idx_jugador].cartones.append(carton)
-            self._log(f"   → {self.jugadores[idx_jugador].nombre} recibe cartón {carton.id} ({carton.idioma})")
-            idx_jugador = (idx_jugador + 1) % n_jugadores
-        
-        self._log("\n📊 Resumen de reparto:")
-        for jugador in self.jugadores:
-            self._log(f"   {jugador.nombre}: {len(jugador.cartones)} cartones")
-        
-        return True, "Cartones repartidos exitosamente"
+        self._log_resumen("🔄 Mezclando %s cartones aleatoriamente...", len(cartones))
+        try:
+            plan = repartir_minimo_uno(len(cartones), nombres, self.semilla)
+        except ValueError as e:
+            return False, str(e)
+        self.cuotas = None
+        return self._aplicar_reparto(plan)
 
     # Autoría Propia: Cecilia Montes
-    def _repartir_uno_por_idioma(self, cartones: List[Carton], n_jugadores: int, reglas: Dict) -> Tuple[bool, str]:
+    def _repartir_uno_por_idioma(self, cartones: Sequence[Carton], nombres: List[str], reglas: Dict) -> Tuple[bool, str]:
         """Reparte asegurando un cartón de cada idioma por jugador"""
-        self._log("🌐 Organizando cartones por idioma...")
-        
-        por_idioma = {}
-        for carton in cartones:
-            if carton.idioma not in por_idioma:
-                por_idioma[carton.idioma] = []
-            por_idioma[carton.idioma].append(carton)
-        
-        for idioma, lista in por_idioma.items():
-            self._log(f"   {idioma}: {len(lista)} cartones")
-        
-        # Validar que hay suficientes cartones de cada idioma
-        for idioma in reglas.keys():
-            if idioma not in por_idioma or len(por_idioma[idioma]) < n_jugadores:
-                return False, f"No hay suficientes cartones del idioma {idioma}"
-        
-        self.jugadores = []
-        self._log(f"\n👥 Creando {n_jugadores} jugadores...")
-        
-        for i in range(n_jugadores):
-            jugador = Jugador(f"Jugador_{i+1}", [])
-            self.jugadores.append(jugador)
-        
-        self._log("\n🎯 Asignando un cartón de cada idioma a cada jugador:")
-        for idioma, cartones_idioma in por_idioma.items():
-            random.shuffle(cartones_idioma)
-            self._log(f"\n   Idioma {idioma}:")
-            
-            for i, jugador in enumerate(self.jugadores):
-                if i < len(cartones_idioma):
-                    carton = cartones_idioma[i]
-                    jugador.cartones.append(carton)
-                    self._log(f"      → {jugador.nombre} recibe {carton.id}")
-        
-        self._log("\n📊 Resumen final:")
-        for jugador in self.jugadores:
-            idiomas_asignados = [c.idioma for c in jugador.cartones]
-            self._log(f"   {jugador.nombre}: {len(jugador.cartones)} cartones ({', '.join(idiomas_asignados)})")
-        
+        # Cada jugador recibe sus cartones en el orden en que los idiomas aparecen en el mazo
+        if isinstance(cartones, MazoMatriz):
+            idiomas = list(cartones.idiomas)
+        else:
+            idiomas = list(dict.fromkeys(c.idioma for c in cartones))
+        idiomas += [idioma for idioma in reglas if idioma not in idiomas]
+        return self._repartir_cuotas(cartones, nombres, dict.fromkeys(idiomas, 1))
+
+    def _repartir_cuotas(self, cartones: Sequence[Carton], nombres: List[str], cuotas: Dict[str, int]) -> Tuple[bool, str]:
+        """Reparte `cuotas[idioma]` cartones de cada idioma a cada jugador"""
+        self._log_resumen("🌐 Organizando cartones por idioma...")
+        if isinstance(cartones, MazoMatriz):
+            idiomas = cartones.idioma_por_carton()
+        else:
+            idiomas = [c.idioma for c in cartones]
+        try:
+            plan = repartir_por_cuotas(idiomas, cuotas, nombres, self.semilla)
+        except (ValueError, TypeError) as e:
+            return False, str(e)
+        self.cuotas = dict(cuotas)
+        for idioma, cuota in cuotas.items():
+            self._log_resumen("   %s: %s por jugador", idioma, cuota)
+        return self._aplicar_reparto(plan)
+
+    def _aplicar_reparto(self, plan: PlanReparto) -> Tuple[bool, str]:
+        """Crea los jugadores del plan (vistas de sus tramos, sin registrar cada cartón)"""
+        self._log_resumen("👤 Creando %s jugadores...", len(plan))
+        self.reparto = plan
+        self.jugadores = plan.jugadores(self.mazo)
+
+        self._log_resumen("\n📊 Resumen de reparto:")
+        self._log_resumen("   %s cartones repartidos entre %s jugadores", len(plan.orden), len(plan))
+        if self.traza.activo(TRAZA_COMPLETO):
+            for jugador in self.jugadores:
+                self._log("   %s: %s cartones", jugador.nombre, len(jugador.cartones))
+
         return True, "Cartones repartidos exitosamente"
 
+    def _preparar_motor(self):
+        """Construye la estructura de marcado del motor seleccionado"""
+        self.invalidar_indices()
+        self.asignaciones = Asignaciones(self.jugadores)
+        if self.motor == "bitset":
+            # Los idiomas con banco personalizado reutilizan sus ids como columnas
+            vocabularios = {
+                idioma: self.bancos.banco(idioma).ids
+                for idioma in self.bancos.personalizados
+            }
+            self.motor_bitset = MotorBitset(self.asignaciones, vocabularios)
+            print(f"🧮 Motor bitset construido para {len(self.motor_bitset.matrices)} idiomas")
+        else:
+            self._construir_indice_invertido()
+        self._construir_casi_ganadores()
+
+    def invalidar_indices(self):
+        """Descarta las estructuras de marcado (p. ej. si se reemplazan los jugadores)"""
+        if self.motor_bitset is not None:
+            # Las marcas pasan a los cartones: se crean los marcados que aún no existen
+            for matriz in self.motor_bitset.matrices.values():
+                for fila in np.flatnonzero(matriz.restantes != matriz.longitudes).tolist():
+                    matriz.par(fila)
+        if self.marcas_indice is not None:
+            for numero in np.flatnonzero(self.marcas_indice.mascaras).tolist():
+                self.marcas_indice.par(numero)
+        self.asignaciones.al_crear(None)
+        for _, carton in self.asignaciones.creados():
+            if carton.motor is not None:
+                carton.palabras_marcadas = carton.palabras_marcadas
+                carton.motor = None
+        self.asignaciones = Asignaciones([])
+        self.indice_invertido = None
+        self.marcas_indice = None
+        self.motor_bitset = None
+        self.casi_ganadores = None
+
+    def restaurar(self, jugadores: List[Jugador], marcas: Iterable[Tuple[str, str]], version: int):
+        """
+        Reconstruye el juego desde un snapshot: asigna los jugadores, prepara el
+        motor y vuelve a aplicar las palabras marcadas (idioma, palabra) en orden.
+        """
+        self.jugadores = jugadores
+        self._preparar_motor()
+        if self.motor_bitset is not None:
+            for idioma, palabra in marcas:
+                self.motor_bitset.marcar(idioma, palabra)
+        else:
+            self._restaurar_marcas_indice(marcas)
+        self._construir_casi_ganadores()
+        _avanzar_versiones(version)
+        self.registrar_cambio_completo()
+
+    def _restaurar_marcas_indice(self, marcas: Iterable[Tuple[str, str]]):
+        """
+        Aplica todas las marcas de una vez: las máscaras se acumulan por número de
+        asignación en un vector y luego se copian a los cartones (un paso por cartón,
+        no uno por palabra y cartón como al cantar).
+        """
+        if (self.asignaciones.totales() > 64).any():
+            # Las máscaras no caben en 64 bits: se aplican palabra a palabra
+            self._reset_trace("off")
+            for idioma, palabra in marcas:
+                self._marcar_con_indice(idioma, palabra, [])
+            self._reset_trace()
+            return
+
+        acumuladas = np.zeros(len(self.asignaciones), dtype=np.uint64)
+        for idioma, palabra in marcas:
+            numeros, bits = self.bits_palabra(idioma, palabra)
+            acumuladas[numeros] |= bits
+        if self.marcas_indice is not None:
+            numeros = np.flatnonzero(acumuladas)
+            self.marcas_indice.copiar(numeros, self.marcas_indice.mascaras[numeros] | acumuladas[numeros])
+            return
+        for numero in np.flatnonzero(acumuladas).tolist():
+            self.asignaciones[numero][1].marcas |= int(acumuladas[numero])
+
+    def _construir_casi_ganadores(self):
+        """Cubetas iniciales de cartones cercanos a ganar (recorrido completo, fuera del canto)"""
+        if self.motor_bitset is not None:
+            cercanos = (
+                (*matriz.par(f), int(matriz.restantes[f]))
+                for matriz in self.motor_bitset.matrices.values()
+                for f in np.flatnonzero(matriz.restantes <= CASI_GANADORES_MAX_K).tolist()
+            )
+        else:
+            asignaciones = self.asignaciones
+            if self.marcas_indice is not None:
+                restantes = self.marcas_indice.restantes
+            else:
+                # Un cartón que aún no existe no tiene marcas: le faltan todas sus palabras
+                restantes = asignaciones.totales()
+                for numero, carton in asignaciones.creados():
+                    restantes[numero] -= carton.aciertos
+            cercanos = (
+                (*asignaciones[numero], int(restantes[numero]))
+                for numero in np.flatnonzero(restantes <= CASI_GANADORES_MAX_K).tolist()
+            )
+        self.casi_ganadores = CasiGanadores.desde_cartones(cercanos, CASI_GANADORES_MAX_K)
+
+    def _construir_indice_invertido(self):
+        """
+        Construye el índice invertido idioma -> palabra -> (números, posiciones) de
+        los cartones que la contienen: `asignaciones[número]` es el (jugador, carton)
+        y `posicion` el bit de la palabra en el cartón.
+        Los números siguen el orden de los jugadores para conservar el orden de
+        los ganadores; los ids salen de las asignaciones (con un mazo binario,
+        de sus matrices) sin recorrer los cartones.
+        """
+        if self.asignaciones.jugadores is not self.jugadores:
+            self.asignaciones = Asignaciones(self.jugadores)
+        if isinstance(self.asignaciones.mazo, MazoMatriz):
+            # Mazo binario: cada palabra se indexa sobre la matriz de su idioma al cantarla
+            self.indice_invertido = {
+                idioma: IndiceMatriz(matriz, numeros, vocab)
+                for idioma, matriz, numeros, vocab in self.asignaciones.matrices()
+            }
+            if self.marcas_indice is None and not (self.asignaciones.totales() > 64).any():
+                self.marcas_indice = MarcasIndice(self.asignaciones)
+            print(f"🗂️ Índice invertido preparado para {len(self.indice_invertido)} idiomas")
+            return
+
+        indice: Dict[str, Dict[str, Tuple[array, array]]] = {}
+        for idioma, numeros_idioma, ids, longitudes, palabras in self.asignaciones.por_idioma():
+            # Todas las (palabra, número, posición) del idioma en vectores, agrupadas por palabra
+            numeros = np.repeat(numeros_idioma, longitudes)
+            inicios = np.repeat(np.cumsum(longitudes) - longitudes, longitudes)
+            posiciones = (np.arange(len(ids), dtype=np.int64) - inicios).astype(np.uint16)
+
+            # Orden alfabético: una palabra repetida queda contigua y solo cuenta la primera
+            primera = np.ones(len(ids), dtype=bool)
+            primera[1:] = (ids[1:] != ids[:-1]) | (numeros[1:] != numeros[:-1])
+            ids, numeros, posiciones = ids[primera], numeros[primera], posiciones[primera]
+
+            # Orden estable: dentro de cada palabra se conserva el orden de los jugadores
+            orden = np.argsort(ids, kind="stable")
+            ids, numeros, posiciones = ids[orden], numeros[orden], posiciones[orden]
+            cortes = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+            indice[idioma] = {
+                palabras[int(ids[inicio])]: (
+                    array('I', numeros[inicio:fin].tobytes()),
+                    array('H', posiciones[inicio:fin].tobytes())
+                )
+                for inicio, fin in zip(np.r_[0, cortes], np.r_[cortes, len(ids)])
+                if fin > inicio
+            }
+        self.indice_invertido = indice
+        print(f"🗂️ Índice invertido construido para {len(indice)} idiomas")
+
     # Autoría Propia: Cecilia Montes
-    def iniciar_juego(self) -> Dict:
-        """Inicia el juego sorteando orden de idiomas"""
+    def iniciar_juego(self, orden_idiomas: Optional[List[str]] = None) -> Dict:
+        """Inicia el juego sorteando orden de idiomas (o con el orden indicado, al replicar)"""
+        fases = Fases(FASES_CARGA)
         self._reset_trace()
-        self._log("=" * 60)
-        self._log("🎮 INICIANDO JUEGO")
-        self._log("=" * 60)
+        self._log_resumen(SEPARADOR)
+        self._log_resumen("🎮 INICIANDO JUEGO")
+        self._log_resumen(SEPARADOR)
         
         if not self.jugadores:
             return {"error": "No hay jugadores registrados"}
         
-        idiomas_unicos = set()
-        for jugador in self.jugadores:
-            for carton in jugador.cartones:
-                idiomas_unicos.add(carton.idioma)
+        idiomas_unicos = set(Asignaciones(self.jugadores).idiomas())
         
-        self._log(f"🌐 Idiomas detectados: {', '.join(idiomas_unicos)}")
+        self._log_resumen("🌐 Idiomas detectados: %s", ', '.join(idiomas_unicos))
         
-        self.orden_idiomas = list(idiomas_unicos)
-        random.shuffle(self.orden_idiomas)
+        if orden_idiomas is not None:
+            self.orden_idiomas = list(orden_idiomas)
+        else:
+            # Ordenados antes de mezclar: el orden de un set de str cambia entre procesos
+            self.orden_idiomas = sorted(idiomas_unicos)
+            self._rng.shuffle(self.orden_idiomas)
         self.idioma_actual_idx = 0
         self.juego_activo = True
         self.palabras_cantadas = []
+        self.registrar_cambio_completo()
         
-        self._log(f"\n✅ Juego iniciado con idioma: {self.orden_idiomas[0]}")
+        self._log_resumen("\n✅ Juego iniciado con idioma: %s", self.orden_idiomas[0])
+        fases.marcar("iniciar_juego")
         
         return {
             "message": "Juego iniciado",
@@ -321,14 +689,17 @@ class GameManager:
         }
 
     # Autoría Propia: Jaren Pazmiño
-    # Implementa búsqueda binaria para verificar palabras en cartones
+    # Usa el índice invertido para visitar solo los cartones con la palabra
     # Incluye loop infinito de rondas hasta que haya ganador
-    def cantar_palabra(self, palabra: str) -> Dict:
-        """Canta una palabra y verifica ganadores"""
-        self._reset_trace()
-        self._log("=" * 60)
-        self._log(f"📢 CANTANDO PALABRA: '{palabra}'")
-        self._log("=" * 60)
+    def cantar_palabra(self, palabra: str, nivel_traza: Optional[str] = None) -> Dict:
+        """Canta una palabra y verifica ganadores (nivel_traza opcional para esta petición)"""
+        if nivel_traza is not None and not nivel_traza_valido(nivel_traza):
+            return {"error": f"Nivel de traza inválido: {nivel_traza}"}
+        fases = Fases(FASES_CANTO)
+        self._reset_trace(nivel_traza)
+        self._log_resumen(SEPARADOR)
+        self._log_resumen("📢 CANTANDO PALABRA: '%s'", palabra)
+        self._log_resumen(SEPARADOR)
         
         if not self.juego_activo:
             return {"error": "El juego no está activo"}
@@ -336,13 +707,11 @@ class GameManager:
         palabra = palabra.upper()
         idioma_actual = self.orden_idiomas[self.idioma_actual_idx]
         
-        self._log(f"🌐 Idioma actual: {idioma_actual}")
+        self._log_resumen("🌐 Idioma actual: %s", idioma_actual)
         
         # VALIDAR que la palabra pertenece al banco del idioma actual
-        banco_actual = self.bancos_personalizados.get(idioma_actual, BANCO_PALABRAS.get(idioma_actual, []))
-        
-        if palabra not in banco_actual:
-            self._log(f"❌ Palabra '{palabra}' NO pertenece al idioma {idioma_actual}")
+        if not self.bancos.contiene(idioma_actual, palabra):
+            self._log_resumen("❌ Palabra '%s' NO pertenece al idioma %s", palabra, idioma_actual)
             return {
                 "error": f"La palabra '{palabra}' no pertenece al banco del idioma {idioma_actual}",
                 "palabra_invalida": True,
@@ -350,8 +719,9 @@ class GameManager:
                 "trace": self.trace_algoritmo
             }
         
-        self._log(f"✅ Palabra '{palabra}' es válida para {idioma_actual}")
-        self._log(f"🔍 Buscando ganadores con búsqueda binaria...")
+        fases.marcar("banco")
+        self._log_resumen("✅ Palabra '%s' es válida para %s", palabra, idioma_actual)
+        self._log_resumen("🔍 Buscando ganadores (motor: %s)...", self.motor)
         
         self.palabras_cantadas.append({
             "idioma": idioma_actual,
@@ -360,31 +730,53 @@ class GameManager:
         
         ganadores = []
         
-        for jugador in self.jugadores:
-            self._log(f"\n👤 Revisando jugador: {jugador.nombre}")
-            
-            for carton in jugador.cartones:
-                if carton.idioma != idioma_actual:
-                    continue
-                
-                self._log(f"   📋 Cartón {carton.id} ({carton.idioma})")
-                
-                # Ordenar palabras para búsqueda binaria
-                palabras_ordenadas = sorted(carton.palabras)
-                encontrado, pos = self.busqueda_binaria_palabra(palabras_ordenadas, palabra)
-                
-                if encontrado and palabra not in carton.palabras_marcadas:
-                    carton.palabras_marcadas.add(palabra)
-                    carton.aciertos += 1
-                    self._log(f"   ✅ Palabra marcada! Aciertos: {carton.aciertos}/{carton.total_palabras}")
-                    
-                    if carton.aciertos == carton.total_palabras:
-                        ganadores.append({
-                            "jugador": jugador.nombre,
-                            "carton_id": carton.id
-                        })
-                        self._log(f"   🏆 ¡¡¡BINGO!!! {jugador.nombre} gana con cartón {carton.id}")
+        if self.motor == "bitset" and self.motor_bitset is not None:
+            # Una sola operación vectorizada sobre la columna de la palabra
+            marcados, cartones_ganadores = self.motor_bitset.marcar(idioma_actual, palabra)
+            self._log_resumen("🧮 Cartones marcados (bitset): %s", len(marcados))
+            self._actualizar_casi_filas(marcados)
+            for jugador, carton in cartones_ganadores:
+                ganadores.append({
+                    "jugador": jugador.nombre,
+                    "carton_id": carton.id
+                })
+                self._log_resumen("   🏆 ¡¡¡BINGO!!! %s gana con cartón %s", jugador.nombre, carton.id)
+        else:
+            marcados = self._marcar_con_indice(idioma_actual, palabra, ganadores)
+        # Ambos motores detectan ganadores y actualizan casi ganadores al marcar: una sola fase
+        fases.marcar("marcado")
+        PALABRAS_CANTADAS.sumar(1, idioma_actual)
+        MARCAS_APLICADAS.sumar(len(marcados))
         
+        return self._cerrar_canto(palabra, idioma_actual, marcados, ganadores, fases)
+
+    def cantar_replicado(self, palabra: str, ganadores: List[Tuple[Jugador, Carton]]) -> Dict:
+        """
+        Canto que otro worker ya aplicó (estado compartido): solo registra la
+        palabra, los ganadores y la rotación de idioma. Las marcas de los
+        cartones llegan copiadas con aplicar_marcas, sin volver a marcarlas.
+        """
+        self._reset_trace("off")
+        if not self.juego_activo:
+            return {"error": "El juego no está activo"}
+        fases = Fases(FASES_CANTO)
+        palabra = palabra.upper()
+        idioma_actual = self.orden_idiomas[self.idioma_actual_idx]
+        self.palabras_cantadas.append({
+            "idioma": idioma_actual,
+            "palabra": palabra
+        })
+        PALABRAS_CANTADAS.sumar(1, idioma_actual)
+        ganadores_canto = [
+            {"jugador": jugador.nombre, "carton_id": carton.id}
+            for jugador, carton in ganadores
+        ]
+        return self._cerrar_canto(palabra, idioma_actual, [], ganadores_canto, fases)
+
+    def _cerrar_canto(
+        self, palabra: str, idioma_actual: str, marcados, ganadores: List[Dict], fases: Fases
+    ) -> Dict:
+        """Rotación de idioma, fin del juego y registro del cambio tras marcar una palabra"""
         # CAMBIO AUTOMÁTICO DE RONDA - LOOP INFINITO hasta que haya ganador
         cambio_ronda = False
         idioma_nuevo = None
@@ -400,17 +792,18 @@ class GameManager:
             if self.idioma_actual_idx >= len(self.orden_idiomas):
                 self.idioma_actual_idx = 0
                 reinicio_loop = True
-                self._log(f"\n🔄 REINICIANDO LOOP DE IDIOMAS")
+                self._log_resumen("\n🔄 REINICIANDO LOOP DE IDIOMAS")
             
             idioma_nuevo = self.orden_idiomas[self.idioma_actual_idx]
             cambio_ronda = True
             
-            self._log(f"\n⏭️ CAMBIO AUTOMÁTICO DE RONDA")
-            self._log(f"   Idioma anterior: {idioma_anterior}")
-            self._log(f"   Nuevo idioma: {idioma_nuevo}")
-            self._log(f"   Progreso: {self.idioma_actual_idx + 1}/{len(self.orden_idiomas)}")
+            self._log_resumen("\n⏭️ CAMBIO AUTOMÁTICO DE RONDA")
+            self._log_resumen("   Idioma anterior: %s", idioma_anterior)
+            self._log_resumen("   Nuevo idioma: %s", idioma_nuevo)
+            self._log_resumen("   Progreso: %s/%s", self.idioma_actual_idx + 1, len(self.orden_idiomas))
             if reinicio_loop:
-                self._log(f"   ♻️ Se reinició el ciclo de idiomas")
+                self._log_resumen("   ♻️ Se reinició el ciclo de idiomas")
+        fases.marcar("rotacion")
         
         resultado = {
             "palabra": palabra,
@@ -426,29 +819,254 @@ class GameManager:
         
         if ganadores:
             self.juego_activo = False
-            self._log("\n🎉 ¡JUEGO TERMINADO CON GANADOR!")
+            self._log_resumen("\n🎉 ¡JUEGO TERMINADO CON GANADOR!")
+        
+        self._registrar_cambio({
+            "palabra": self.palabras_cantadas[-1],
+            "marcados": marcados,
+            "ganadores": ganadores
+        })
+        fases.marcar("registro")
         
         return resultado
 
+    def cantar_lote(
+        self,
+        palabras: List[str],
+        nivel_traza: str = "off",
+        al_cantar: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Canta las palabras en orden con las mismas reglas que cantar_palabra
+        (rotación de idioma y reinicio del ciclo). Se detiene en el primer
+        ganador o en la primera palabra inválida. La traza solo se incluye si
+        se pide un nivel; `al_cantar` recibe cada resultado (eventos push).
+        """
+        if not nivel_traza_valido(nivel_traza):
+            return {"error": f"Nivel de traza inválido: {nivel_traza}"}
+        if not self.juego_activo:
+            return {"error": "El juego no está activo"}
+
+        resultados = []
+        ganadores = []
+        palabra_invalida = None
+        for palabra in palabras:
+            resultado = self.cantar_palabra(palabra, nivel_traza)
+            if "error" in resultado:
+                palabra_invalida = {"indice": len(resultados), "palabra": palabra, "error": resultado["error"]}
+                break
+            salida = {
+                "palabra": resultado["palabra"],
+                "idioma": resultado["idioma"],
+                "marcados": len(self.marcados_ultimo_canto())
+            }
+            if resultado["reinicio_loop"]:
+                salida["reinicio_loop"] = True
+            if nivel_traza != "off":
+                salida["trace"] = resultado["trace"]
+            resultados.append(salida)
+            if al_cantar is not None:
+                al_cantar(resultado)
+            if resultado["hay_ganador"]:
+                ganadores = resultado["ganadores"]
+                break
+
+        return {
+            "aplicadas": len(resultados),
+            "recibidas": len(palabras),
+            "resultados": resultados,
+            "hay_ganador": len(ganadores) > 0,
+            "ganadores": ganadores,
+            "juego_terminado": not self.juego_activo,
+            "idioma_actual": self.orden_idiomas[self.idioma_actual_idx],
+            "palabra_invalida": palabra_invalida
+        }
+
+    def _marcar_con_indice(self, idioma_actual: str, palabra: str, ganadores: List[Dict]) -> Iterable[Tuple[Jugador, Carton]]:
+        """
+        Marca la palabra visitando solo los cartones que la contienen (índice invertido).
+        Retorna los (jugador, carton) marcados en esta llamada.
+        """
+        if self.indice_invertido is None:
+            self._construir_indice_invertido()
+        numeros, posiciones = self.indice_invertido.get(idioma_actual, {}).get(palabra, ((), ()))
+        self._log_resumen("🗂️ Cartones que contienen '%s': %s", palabra, len(numeros))
+        detalle = self.traza.activo(TRAZA_COMPLETO)
+        if self.marcas_indice is not None:
+            return self._marcar_vectores(idioma_actual, palabra, ganadores, detalle)
+        asignaciones = self.asignaciones
+        casi = self.casi_ganadores
+        marcados = []
+
+        for numero, posicion in zip(numeros, posiciones):
+            jugador, carton = asignaciones[numero]
+            bit = 1 << posicion
+            if carton.marcas & bit:
+                continue
+            marcados.append((jugador, carton))
+
+            carton.marcas |= bit
+            if detalle:
+                self._log("   ✅ %s - Cartón %s: %s/%s", jugador.nombre, carton.id, carton.aciertos, carton.total_palabras)
+
+            restantes = carton.total_palabras - carton.marcas.bit_count()
+            if restantes <= CASI_GANADORES_MAX_K and casi is not None:
+                casi.actualizar(jugador, carton, restantes)
+
+            if restantes == 0:
+                ganadores.append({
+                    "jugador": jugador.nombre,
+                    "carton_id": carton.id
+                })
+                self._log_resumen("   🏆 ¡¡¡BINGO!!! %s gana con cartón %s", jugador.nombre, carton.id)
+
+        return marcados
+
+    def _marcar_vectores(self, idioma: str, palabra: str, ganadores: List[Dict], detalle: bool) -> FilasMarcadas:
+        """Marcado del índice con un mazo binario: un OR sobre las máscaras, sin crear cartones"""
+        marcas = self.marcas_indice
+        numeros, bits = self.bits_palabra(idioma, palabra)
+        filas, completos = marcas.marcar(numeros.astype(np.int64), bits)
+        marcados = FilasMarcadas(marcas, filas)
+        if detalle:
+            for jugador, carton in marcados:
+                self._log("   ✅ %s - Cartón %s: %s/%s", jugador.nombre, carton.id, carton.aciertos, carton.total_palabras)
+        self._actualizar_casi_filas(marcados)
+        for jugador, carton in map(marcas.par, completos.tolist()):
+            ganadores.append({
+                "jugador": jugador.nombre,
+                "carton_id": carton.id
+            })
+            self._log_resumen("   🏆 ¡¡¡BINGO!!! %s gana con cartón %s", jugador.nombre, carton.id)
+        return marcados
+
+    def bits_palabra(self, idioma: str, palabra: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(números de asignación, bit de la palabra en cada cartón) según el índice invertido"""
+        numeros, posiciones = self.indice_invertido.get(idioma, {}).get(palabra, ((), ()))
+        if not numeros:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), np.frombuffer(posiciones, dtype=np.uint16).astype(np.uint64))
+        return np.frombuffer(numeros, dtype=np.uint32), bits
+
+    def mascaras(self) -> Optional[np.ndarray]:
+        """
+        Marcas de cada asignación (orden de reparto) como máscaras de 64 bits
+        para el estado compartido. None con el motor bitset, sin índice o con
+        cartones de más de 64 palabras.
+        """
+        if self.motor_bitset is not None or self.indice_invertido is None:
+            return None
+        if self.marcas_indice is not None:
+            return self.marcas_indice.mascaras.copy()
+        if (self.asignaciones.totales() > 64).any():
+            return None
+        # Un cartón que aún no existe no tiene marcas
+        mascaras = np.zeros(len(self.asignaciones), dtype=np.uint64)
+        for numero, carton in self.asignaciones.creados():
+            mascaras[numero] = carton.marcas
+        return mascaras
+
+    def aplicar_marcas(self, numeros: np.ndarray, mascaras: np.ndarray) -> Iterable[Tuple[Jugador, Carton]]:
+        """
+        Copia las máscaras que calculó otro worker (por número de asignación)
+        y actualiza los casi ganadores: una pasada por cartón cambiado aunque
+        se repliquen varios cantos (los que empatan en una cubeta quedan en
+        orden de número). Los cambiados quedan en el último canto registrado
+        (deltas y eventos).
+        """
+        if self.marcas_indice is not None:
+            return self._aplicar_marcas_vectores(numeros, mascaras)
+        asignaciones = self.asignaciones
+        casi = self.casi_ganadores
+        cambiados = []
+        for numero, mascara in zip(numeros.tolist(), mascaras.tolist()):
+            jugador, carton = asignaciones[numero]
+            antes = carton.total_palabras - carton.marcas.bit_count()
+            carton.marcas = mascara
+            cambiados.append((jugador, carton))
+            restantes = carton.total_palabras - mascara.bit_count()
+            if restantes <= CASI_GANADORES_MAX_K and casi is not None:
+                casi.actualizar(jugador, carton, restantes, antes)
+        self._anotar_cambiados(cambiados)
+        return cambiados
+
+    def _aplicar_marcas_vectores(self, numeros: np.ndarray, mascaras: np.ndarray) -> FilasMarcadas:
+        """aplicar_marcas con las marcas del índice en vectores: solo pasan a Python los casi ganadores"""
+        marcas = self.marcas_indice
+        antes = marcas.copiar(numeros, mascaras)
+        restantes = marcas.restantes[numeros]
+        cambiados = FilasMarcadas(marcas, numeros)
+        if self.casi_ganadores is not None:
+            cerca = restantes <= CASI_GANADORES_MAX_K
+            for numero, quedan, faltaban in zip(
+                numeros[cerca].tolist(), restantes[cerca].tolist(), antes[cerca].tolist()
+            ):
+                self.casi_ganadores.actualizar(*marcas.par(numero), quedan, faltaban)
+        self._anotar_cambiados(cambiados)
+        return cambiados
+
+    def _anotar_cambiados(self, cambiados):
+        """Los cartones copiados quedan en el último canto registrado"""
+        MARCAS_APLICADAS.sumar(len(cambiados))
+        for cambio in reversed(self.cambios):
+            if "palabra" in cambio:
+                previos = cambio["marcados"]
+                cambio["marcados"] = [*previos, *cambiados] if len(previos) else cambiados
+                break
+
+    def _actualizar_casi_filas(self, marcados: FilasMarcadas):
+        """
+        Solo los cartones marcados que quedaron a CASI_GANADORES_MAX_K o menos
+        pasan a Python (filas del bitset o números de las marcas del índice)
+        """
+        if self.casi_ganadores is None or not len(marcados):
+            return
+        matriz = marcados.matriz
+        restantes = matriz.restantes[marcados.filas]
+        cerca = restantes <= CASI_GANADORES_MAX_K
+        for fila, quedan in zip(marcados.filas[cerca].tolist(), restantes[cerca].tolist()):
+            self.casi_ganadores.actualizar(*matriz.par(fila), quedan)
+
+    def get_casi_ganadores(self, k: int, limite: int) -> Dict:
+        """Cartones a los que les faltan entre 1 y k palabras (los más cercanos primero)"""
+        if self.casi_ganadores is None:
+            self._construir_casi_ganadores()
+        cercanos = self.casi_ganadores.top(k, limite)
+        return {
+            "k": k,
+            "conteo": self.casi_ganadores.conteo(k),
+            "cartones": [
+                {
+                    "jugador": jugador.nombre,
+                    "carton_id": carton.id,
+                    "idioma": carton.idioma,
+                    "restantes": restantes,
+                    "faltantes": sorted(set(carton.palabras) - carton.palabras_marcadas)
+                }
+                for jugador, carton, restantes in cercanos
+            ]
+        }
+
     # Autoría Propia: Cecilia Montes
     def siguiente_idioma(self) -> Dict:
         """Avanza al siguiente idioma"""
         self._reset_trace()
-        self._log("=" * 60)
-        self._log("⏭️ CAMBIANDO DE IDIOMA")
-        self._log("=" * 60)
+        self._log_resumen(SEPARADOR)
+        self._log_resumen("⏭️ CAMBIANDO DE IDIOMA")
+        self._log_resumen(SEPARADOR)
         
         if self.idioma_actual_idx + 1 >= len(self.orden_idiomas):
-            self._log("❌ No hay más idiomas disponibles")
+            self._log_resumen("❌ No hay más idiomas disponibles")
             return {"error": "No hay más idiomas"}
         
         idioma_anterior = self.orden_idiomas[self.idioma_actual_idx]
         self.idioma_actual_idx += 1
         idioma_nuevo = self.orden_idiomas[self.idioma_actual_idx]
         
-        self._log(f"📤 Idioma anterior: {idioma_anterior}")
-        self._log(f"📥 Nuevo idioma: {idioma_nuevo}")
-        self._log(f"📊 Progreso: {self.idioma_actual_idx + 1}/{len(self.orden_idiomas)}")
+        self._log_resumen("📤 Idioma anterior: %s", idioma_anterior)
+        self._log_resumen("📥 Nuevo idioma: %s", idioma_nuevo)
+        self._log_resumen("📊 Progreso: %s/%s", self.idioma_actual_idx + 1, len(self.orden_idiomas))
+        self._registrar_cambio({})
         
         return {
             "idioma_actual": idioma_nuevo,
@@ -460,19 +1078,13 @@ class GameManager:
     # Autoría Propia: Cecilia Montes
     def get_estado_juego(self) -> Dict:
         """Obtiene el estado completo del juego"""
-        idioma_actual = None
-        if self.orden_idiomas:
-            codigo = self.orden_idiomas[self.idioma_actual_idx]
-            idioma_actual = {
-                "codigo": codigo,
-                "nombre": NOMBRES_IDIOMAS.get(codigo, codigo),
-                "indice": self.idioma_actual_idx
-            }
+        idioma_actual = self._idioma_actual_dict()
         
         # Usar bancos personalizados si existen, sino los de config.py
         bancos_a_enviar = self.bancos_personalizados if self.bancos_personalizados else BANCO_PALABRAS
         
         return {
+            "version": self.version,
             "juego_activo": self.juego_activo,
             "idioma_actual": idioma_actual,
             "orden_idiomas": self.orden_idiomas,
@@ -487,27 +1099,245 @@ class GameManager:
             "banco_palabras": bancos_a_enviar
         }
 
+    def get_estado_json(self, incluir_jugadores: bool = True) -> bytes:
+        """
+        get_estado_juego ya serializado (mismas claves y orden): cada cartón aporta
+        su JSON en caché y los bancos se codifican una sola vez por carga.
+        Sin `incluir_jugadores` se omite la lista (se pagina con /api/jugadores).
+        """
+        cabecera = dumps({
+            "version": self.version,
+            "juego_activo": self.juego_activo,
+            "idioma_actual": self._idioma_actual_dict(),
+            "orden_idiomas": self.orden_idiomas,
+            "idiomas_orden": [
+                {"codigo": c, "nombre": NOMBRES_IDIOMAS.get(c, c)}
+                for c in self.orden_idiomas
+            ],
+            "idx_idioma": self.idioma_actual_idx,
+            "palabras_cantadas": self.palabras_cantadas,
+            "total_jugadores": len(self.jugadores)
+        })
+        partes = [cabecera[:-1]]
+        if incluir_jugadores:
+            partes += [b',"jugadores":[', b",".join(j.to_json() for j in self.jugadores), b"]"]
+        partes += [b',"banco_palabras":', self.bancos.json_publico(), b"}"]
+        return b"".join(partes)
+
+    def palabras_marcadas(self) -> Set[Tuple[str, str]]:
+        """
+        (idioma, palabra) marcadas en algún cartón de los jugadores (snapshots).
+        Con el motor bitset o con las marcas del índice en vectores salen de las
+        matrices, sin crear los cartones de un mazo binario.
+        """
+        if self.motor_bitset is not None:
+            return {
+                (idioma, palabra)
+                for idioma, matriz in self.motor_bitset.matrices.items()
+                for palabra, idx in matriz.vocabulario.items()
+                if matriz.cantadas[idx] and matriz.bits[idx].any()
+            }
+        if self.marcas_indice is not None:
+            marcadas = set()
+            for idioma, matriz, numeros, vocab in self.asignaciones.matrices():
+                filas = np.flatnonzero(numeros >= 0)
+                mascaras = self.marcas_indice.mascaras[numeros[filas]]
+                presentes = np.zeros(len(vocab.palabras), dtype=bool)
+                # Una columna (posición del cartón) a la vez: sin expandir las máscaras a bits
+                for posicion in range(matriz.shape[1]):
+                    con_marca = (mascaras >> np.uint64(posicion)) & np.uint64(1) != 0
+                    presentes[matriz[filas[con_marca], posicion]] = True
+                marcadas.update((idioma, vocab.palabras[i]) for i in np.flatnonzero(presentes).tolist())
+            return marcadas
+        return {
+            (carton.idioma, palabra)
+            for jugador in self.jugadores for carton in jugador.cartones if carton.aciertos
+            for palabra in carton.palabras_marcadas
+        }
+
+    def _cartones(self) -> List[Carton]:
+        return [carton for jugador in self.jugadores for carton in jugador.cartones]
+
+    def get_duplicados(self) -> Dict:
+        """Ids y conjuntos de palabras repetidos entre los cartones actuales"""
+        return buscar_duplicados(self._cartones(), DUPLICADOS_LIMITE)
+
+    def get_similares(self, umbral: float, limite: int) -> Dict:
+        """Pares de cartones con similitud de Jaccard >= umbral (MinHash, bajo demanda)"""
+        return buscar_similares(self._cartones(), umbral, limite)
+
+    def buscar_jugador(self, nombre: str) -> Optional[Jugador]:
+        """Jugador por nombre en O(1); el índice se rehace solo cuando cambia la lista de jugadores"""
+        lista, tamano, por_nombre = self._por_nombre
+        if lista is not self.jugadores or tamano != len(self.jugadores):
+            por_nombre = {}
+            for jugador in self.jugadores:
+                # Con nombres repetidos gana el primero, como la búsqueda lineal
+                por_nombre.setdefault(jugador.nombre, jugador)
+            self._por_nombre = (self.jugadores, len(self.jugadores), por_nombre)
+        return por_nombre.get(nombre)
+
+    def get_jugadores_json(
+        self,
+        cursor: int = 0,
+        limite: Optional[int] = None,
+        campos: Optional[List[str]] = None,
+        idioma: Optional[str] = None,
+        ganador: Optional[bool] = None
+    ) -> bytes:
+        """
+        Página de jugadores desde `cursor` (posición en la lista, estable hasta la
+        siguiente carga). Con filtros solo aparecen los cartones que los cumplen y
+        se omiten los jugadores sin ninguno; `siguiente` es el cursor de la
+        próxima página o null al terminar.
+        """
+        filtrar = idioma is not None or ganador is not None
+        jugadores = self.jugadores
+        pagina = []
+        posicion = cursor
+        while posicion < len(jugadores) and (limite is None or len(pagina) < limite):
+            jugador = jugadores[posicion]
+            posicion += 1
+            cartones = None
+            if filtrar:
+                cartones = [
+                    c for c in jugador.cartones
+                    if (idioma is None or c.idioma == idioma)
+                    and (ganador is None or (c.aciertos == c.total_palabras) == ganador)
+                ]
+                if not cartones:
+                    continue
+            pagina.append(jugador.to_json(cartones, campos))
+        siguiente = posicion if posicion < len(jugadores) else None
+        return b"".join((
+            b'{"jugadores":[', b",".join(pagina),
+            b'],"total":', dumps(len(jugadores)),
+            b',"siguiente":', dumps(siguiente), b"}"
+        ))
+
+    def _idioma_actual_dict(self) -> Optional[Dict]:
+        if not self.orden_idiomas:
+            return None
+        codigo = self.orden_idiomas[self.idioma_actual_idx]
+        return {
+            "codigo": codigo,
+            "nombre": NOMBRES_IDIOMAS.get(codigo, codigo),
+            "indice": self.idioma_actual_idx
+        }
+
+    def registrar_cambio_completo(self):
+        """
+        Nueva versión que no se puede expresar como delta (carga, inicio, demo):
+        los clientes con una versión anterior recibirán el estado completo.
+        """
+        self.version = self._nueva_version()
+        self.version_base = self.version
+        self.cambios.clear()
+
+    def _nueva_version(self) -> int:
+        """
+        Siguiente versión de este juego. Una replicada se usa tal cual y solo
+        adelanta el contador del proceso: nunca lo rebobina.
+        """
+        version, self.version_replicada = self.version_replicada, None
+        if version is None:
+            return next(_versiones)
+        _avanzar_versiones(version)
+        return version
+
+    def _registrar_cambio(self, cambio: Dict):
+        """Nueva versión incremental; el cambio se guarda para servir deltas"""
+        self.version = self._nueva_version()
+        cambio["version"] = self.version
+        if len(self.cambios) == self.cambios.maxlen:
+            # El cambio más antiguo se descarta: ya no se puede servir delta desde antes
+            self.version_base = self.cambios[0]["version"]
+        self.cambios.append(cambio)
+
+    def marcados_ultimo_canto(self) -> Iterable[Tuple[Jugador, Carton]]:
+        """(jugador, carton) marcados por el último cambio registrado, si fue un canto"""
+        if not self.cambios:
+            return ()
+        return self.cambios[-1].get("marcados", ())
+
+    def get_cambios_desde(self, desde: int) -> Dict:
+        """
+        Delta del estado desde la versión `desde`: palabras cantadas, cartones
+        marcados y ganadores producidos después. Si esa versión ya no está
+        disponible se retorna el estado completo.
+        """
+        if desde < self.version_base:
+            return {**self.get_estado_juego(), "completo": True, "desde": desde}
+        
+        palabras = []
+        marcados: Dict[int, Tuple[Jugador, Carton]] = {}
+        ganadores = []
+        for cambio in self.cambios:
+            if cambio["version"] <= desde:
+                continue
+            if "palabra" in cambio:
+                palabras.append(cambio["palabra"])
+                for jugador, carton in cambio["marcados"]:
+                    marcados[id(carton)] = (jugador, carton)
+                ganadores.extend(cambio["ganadores"])
+        
+        return {
+            "version": self.version,
+            "desde": desde,
+            "completo": False,
+            "juego_activo": self.juego_activo,
+            "idioma_actual": self._idioma_actual_dict(),
+            "idx_idioma": self.idioma_actual_idx,
+            "palabras_cantadas": palabras,
+            "cartones_marcados": [
+                {
+                    "jugador": jugador.nombre,
+                    "carton_id": carton.id,
+                    "aciertos": carton.aciertos,
+                    "palabras_marcadas": list(carton.palabras_marcadas)
+                }
+                for jugador, carton in marcados.values()
+            ],
+            "ganadores": ganadores
+        }
+
+    def fijar_demo(self, carton: Carton):
+        """Juego terminado con un único jugador que gana con `carton` (demo/testing)"""
+        idioma = carton.idioma
+        # Marcar como ganador
+        carton.palabras_marcadas = set(carton.palabras)
+
+        self.invalidar_indices()
+        self.jugadores = plan_por_duenos(["Demo"], [0]).jugadores([carton])
+        self.reparto = None
+        self.orden_idiomas = [idioma]
+        self.idioma_actual_idx = 0
+        self.juego_activo = False
+        self.palabras_cantadas = [{"idioma": idioma, "palabra": p} for p in carton.palabras]
+        self.registrar_cambio_completo()
+
     # Autoría Propia: Cecilia Montes
     def generar_carton_aleatorio(self, idioma: str) -> Optional[Carton]:
         """Genera un cartón aleatorio"""
         self._reset_trace()
-        self._log(f"🎲 Generando cartón aleatorio para idioma: {idioma}")
+        self._log_resumen("🎲 Generando cartón aleatorio para idioma: %s", idioma)
         
         if idioma not in REGLAS_TAMANO:
-            self._log(f"❌ Idioma '{idioma}' no válido")
+            self._log_resumen("❌ Idioma '%s' no válido", idioma)
             return None
         
-        banco = BANCO_PALABRAS.get(idioma, [])
+        banco = self.bancos.banco(idioma)
         if not banco:
-            self._log(f"❌ No hay banco de palabras para '{idioma}'")
+            self._log_resumen("❌ No hay banco de palabras para '%s'", idioma)
             return None
         
         n_palabras = REGLAS_TAMANO[idioma]
-        self._log(f"📊 Seleccionando {n_palabras} palabras de {len(banco)} disponibles")
+        self._log_resumen("📊 Seleccionando %s palabras de %s disponibles", n_palabras, len(banco))
         
-        palabras = random.sample(banco, min(n_palabras, len(banco)))
-        carton_id = f"RANDOM_{idioma}_{random.randint(1000, 9999)}"
+        palabras = random.sample(banco.lista, min(n_palabras, len(banco)))
+        # Secuencial: un id aleatorio de 4 dígitos podía repetirse
+        carton_id = f"RANDOM_{idioma}_{next(_ids_aleatorios):04d}"
         
-        self._log(f"✅ Cartón generado: {carton_id}")
+        self._log_resumen("✅ Cartón generado: %s", carton_id)
         
         return Carton(carton_id, idioma, palabras)
\ No newline at end of file
@@ -0,0 +1,147 @@
+# =============================================================================
+# GENERADOR MASIVO DE CARTONES ÚNICOS (VECTORIZADO, MEMORIA ACOTADA)
+# Uso: python generador.py --por-idioma 250000 --salida mazo.txt
+#      python generador.py --por-idioma 1000 --tamanos SP=24 EN=14 --banco SP=banco_SP.txt
+# =============================================================================
+
+import argparse
+import itertools
+import math
+import sys
+import time
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from bancos import RegistroBancos
+from config import REGLAS_TAMANO
+
+# Elementos (cartones × palabras del banco) por lote: acota la memoria
+ELEMENTOS_POR_LOTE = 4_000_000
+# Líneas por bloque al escribir o enviar el TXT
+LINEAS_POR_BLOQUE = 4096
+
+
+class HashesVistos:
+    """
+    Hashes de 64 bits de los cartones ya emitidos, en un array ordenado
+    (8 bytes por cartón). Un cartón se acepta solo si su hash es nuevo: una
+    colisión de hash puede descartar un cartón distinto, nunca duplicar uno.
+    """
+
+    def __init__(self, tamano: int, rng: np.random.Generator):
+        # Coeficientes impares aleatorios: hash polinomial sobre los ids ordenados
+        self.coeficientes = rng.integers(1, 2 ** 63, size=tamano, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.vistos = np.empty(0, dtype=np.uint64)
+
+    def nuevos(self, ids: np.ndarray) -> np.ndarray:
+        """Máscara de las filas de `ids` (ordenadas) que no se han visto; las registra"""
+        hashes = (ids.astype(np.uint64) * self.coeficientes).sum(axis=1, dtype=np.uint64)
+        mascara = np.zeros(len(hashes), dtype=bool)
+        mascara[np.unique(hashes, return_index=True)[1]] = True
+        if len(self.vistos):
+            posiciones = np.minimum(np.searchsorted(self.vistos, hashes), len(self.vistos) - 1)
+            mascara &= self.vistos[posiciones] != hashes
+        # Dos tramos ya ordenados: el sort estable (timsort) los mezcla en tiempo lineal
+        self.vistos = np.sort(np.concatenate((self.vistos, np.sort(hashes[mascara]))), kind="stable")
+        return mascara
+
+
+def generar_idioma(n_banco: int, tamano: int, n: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+    """
+    Genera n cartones distintos de `tamano` palabras tomadas de un banco de
+    n_banco palabras, en lotes de filas con los ids ordenados (uint16).
+    """
+    if tamano > n_banco:
+        raise ValueError(f"El banco tiene {n_banco} palabras y el cartón requiere {tamano}")
+    posibles = math.comb(n_banco, tamano)
+    if n > posibles:
+        raise ValueError(f"Solo existen {posibles} cartones distintos de {tamano} palabras con {n_banco} palabras")
+
+    vistos = HashesVistos(tamano, rng)
+    por_lote = max(1, ELEMENTOS_POR_LOTE // n_banco)
+    faltan = n
+    while faltan:
+        lote = min(faltan, por_lote)
+        # Las `tamano` claves aleatorias menores eligen una muestra sin reemplazo por fila
+        claves = rng.random((lote, n_banco), dtype=np.float32)
+        ids = np.argpartition(claves, tamano - 1, axis=1)[:, :tamano].astype(np.uint16)
+        ids.sort(axis=1)
+        ids = ids[vistos.nuevos(ids)]
+        faltan -= len(ids)
+        yield ids
+
+
+def lineas_cartones(
+    bancos: Dict[str, Sequence[str]],
+    reglas: Dict[str, int],
+    n_por_idioma: int,
+    semilla: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Líneas en el formato de /api/cargar-masivo ("SP000001 palabra1 palabra2 ..."),
+    idioma por idioma, con ids secuenciales. `bancos` debe estar ordenado
+    y sin repetidos (BancoCompilado.lista) para que los ids ordenados
+    correspondan a palabras ordenadas.
+    """
+    rng = np.random.default_rng(semilla)
+    digitos = max(6, len(str(n_por_idioma)))
+    for idioma, tamano in reglas.items():
+        palabras = np.array(bancos[idioma], dtype=object)
+        numero = itertools.count(1)
+        for ids in generar_idioma(len(palabras), tamano, n_por_idioma, rng):
+            for fila in palabras[ids].tolist():
+                yield f"{idioma}{next(numero):0{digitos}d} {' '.join(fila)}\n"
+
+
+def bloques(lineas: Iterator[str], por_bloque: int = LINEAS_POR_BLOQUE) -> Iterator[str]:
+    """Agrupa líneas en bloques de texto (escritura o respuesta en streaming)"""
+    while True:
+        bloque = "".join(itertools.islice(lineas, por_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+def bancos_para(reglas: Dict[str, int], registro: RegistroBancos) -> Dict[str, Sequence[str]]:
+    """Listas ordenadas de los bancos de cada idioma (solo los que existen)"""
+    bancos = {}
+    for idioma in reglas:
+        banco = registro.banco(idioma)
+        if banco is None:
+            raise ValueError(f"No hay banco de palabras para '{idioma}'")
+        bancos[idioma] = banco.lista
+    return bancos
+
+
+def _pares(valores):
+    return dict(v.split("=", 1) for v in valores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador masivo de cartones únicos")
+    parser.add_argument("--por-idioma", type=int, required=True, help="Cartones por idioma")
+    parser.add_argument("--tamanos", nargs="+", default=[], help="Palabras por cartón, p. ej. SP=24 EN=14")
+    parser.add_argument("--banco", nargs="+", default=[], help="Banco por idioma desde TXT, p. ej. SP=banco_SP.txt")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--salida", help="Archivo TXT de salida (por defecto la salida estándar)")
+    args = parser.parse_args()
+
+    reglas = {k.upper(): int(v) for k, v in _pares(args.tamanos).items()} or dict(REGLAS_TAMANO)
+    personalizados = {}
+    for idioma, ruta in _pares(args.banco).items():
+        with open(ruta, encoding="utf-8") as archivo:
+            personalizados[idioma.upper()] = [l.strip().upper() for l in archivo if l.strip()]
+    bancos = bancos_para(reglas, RegistroBancos(personalizados))
+
+    inicio = time.perf_counter()
+    salida = open(args.salida, "w", encoding="utf-8") if args.salida else sys.stdout
+    try:
+        for bloque in bloques(lineas_cartones(bancos, reglas, args.por_idioma, args.semilla)):
+            salida.write(bloque)
+    finally:
+        if args.salida:
+            salida.close()
+    if args.salida:
+        total = args.por_idioma * len(reglas)
+        print(f"✅ {total} cartones únicos escritos en {args.salida} ({time.perf_counter() - inicio:.1f}s)")
@@ -1,7 +1,16 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+import asyncio
+import atexit
+import contextlib
+import itertools
+import json
+import os
+import threading
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple
 
 # Modelo para configuración de idiomas
 class IdiomaConfig(BaseModel):
@@ -11,10 +20,33 @@ class IdiomaConfig(BaseModel):
 import uvicorn
 
 from game_manager import GameManager
-from models import Carton, Jugador
-from config import REGLAS_TAMANO, NOMBRES_IDIOMAS, BANCO_PALABRAS
+from salas import RegistroSalas, Sala
+from actor import Instantanea
+from persistencia import Persistencia
+from estado_compartido import EstadoCompartido
+from bitacora import Bitacora, reproducir, indice, partidas
+from eventos import evento_palabra
+from serializacion import dumps
+from generador import lineas_cartones, bloques, bancos_para
+from metricas import REGISTRO, MedidorHTTP
+from trazas import nivel_traza_valido
+from parser_cartones import leer_lineas_por_bloques
+from mazo_binario import MazoBinario, MAGIA
+from models import CAMPOS_CARTON
+from config import (
+    REGLAS_TAMANO, NOMBRES_IDIOMAS, BANCO_PALABRAS, MOTORES_MARCADO, REGLAS_REPARTO,
+    NIVEL_TRAZA_DEFECTO, SALA_PRINCIPAL, RUTA_SNAPSHOTS, RUTA_BITACORAS,
+    CASI_GANADORES_MAX_K, CASI_GANADORES_LIMITE, PAGINA_JUGADORES_MAX, MAX_PALABRAS_LOTE,
+    MAX_CARTONES_GENERADOS, DUPLICADOS_MODOS, DUPLICADOS_DEFECTO,
+    MEMORIA_COMPARTIDA, MEMORIA_COMPARTIDA_INTERVALO_SEG
+)
+
+class RespuestaJSON(Response):
+    """Respuesta con cuerpo JSON ya serializado (bytes de serializacion.dumps o cachés)"""
+    media_type = "application/json"
 
 app = FastAPI(title="Bingo API - Sistema DAC")
+app.add_middleware(MedidorHTTP)
 
 # CORS para React
 app.add_middleware(
@@ -25,8 +57,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Instancia global del juego (en producción usar Redis/DB)
-game = GameManager()
+# Registro de salas: un GameManager por sala
+salas = RegistroSalas()
+
+# Snapshots en SQLite: las salas guardadas se restauran al arrancar
+ruta_snapshots = os.environ.get("BINGO_SNAPSHOTS", RUTA_SNAPSHOTS)
+persistencia = Persistencia(ruta_snapshots) if ruta_snapshots else None
+
+# Bitácora de eventos por sala: auditoría y repetición determinista (bitacora.py)
+ruta_bitacoras = os.environ.get("BINGO_BITACORAS", RUTA_BITACORAS)
+bitacora = Bitacora(ruta_bitacoras) if ruta_bitacoras else None
+
+# Varios workers (gunicorn -w N): el estado de cada sala se comparte por memoria compartida
+prefijo_compartido = os.environ.get("BINGO_MEMORIA_COMPARTIDA", MEMORIA_COMPARTIDA)
+compartido = EstadoCompartido(prefijo_compartido, salas) if prefijo_compartido else None
+if compartido is not None and persistencia is not None:
+    compartido.al_sincronizar = persistencia.fijar_posicion
+
+
+def _sala_cerrada(sala_id: str, expulsada: bool = False):
+    """Sala eliminada o expulsada de este worker"""
+    if bitacora is not None:
+        bitacora.cerrar_sala(sala_id)
+    if expulsada:
+        # Expulsar una sala no la borra: la conservan los demás workers y su snapshot
+        if compartido is not None:
+            compartido.soltar(sala_id)
+        return
+    if compartido is not None:
+        compartido.eliminar(sala_id)
+    if persistencia is not None:
+        persistencia.borrar(sala_id)
+
+
+salas.al_cerrar = _sala_cerrada
+salas.al_expulsar = lambda sala_id: _sala_cerrada(sala_id, expulsada=True)
+if persistencia is not None:
+    if bitacora is not None:
+        # La bitácora continúa desde la sala restaurada (puede ir por detrás de la bitácora tras una caída)
+        persistencia.al_restaurar = bitacora.registrar_restauracion
+    persistencia.restaurar(salas)
+    atexit.register(persistencia.cerrar)
+if bitacora is not None:
+    atexit.register(bitacora.cerrar)
+
+
+_restaurando = threading.Lock()
+
+
+def _restaurar_expulsada(sala_id: str):
+    with _restaurando:
+        if salas.recuperar(sala_id):
+            persistencia.restaurar_sala(salas, sala_id)
+
+
+async def _sala(sala_id: str) -> Optional[Sala]:
+    """Sala de este worker, al día con los cambios hechos en los demás (los aplica su actor)"""
+    if compartido is None and persistencia is not None and salas.expulsada(sala_id):
+        # Expulsada por los límites de memoria: vuelve desde su snapshot
+        # (con varios workers la reconstruye la memoria compartida)
+        await asyncio.to_thread(_restaurar_expulsada, sala_id)
+    encontrada = salas.obtener(sala_id)
+    if compartido is None or not compartido.pendiente(sala_id):
+        return encontrada
+    if encontrada is None:
+        return await asyncio.to_thread(compartido.sincronizar, sala_id, None)
+    return await encontrada.actor.ejecutar(lambda: compartido.sincronizar(sala_id, encontrada))
+
+
+def escritura(sala: Sala):
+    """Contexto de toda mutación de la sala (serializada entre workers si hay memoria compartida)"""
+    return compartido.escritura(sala) if compartido is not None else contextlib.nullcontext()
+
+
+def publicar_operacion(sala: Sala, tipo: str, dato: str = "", version: Optional[int] = None):
+    """Anexa la operación recién aplicada al registro compartido de la sala"""
+    if compartido is not None:
+        compartido.publicar(sala, tipo, dato, version)
+
+
+def nueva_generacion(sala: Sala):
+    """Publica el estado completo de la sala tras una carga o un reinicio"""
+    if compartido is not None:
+        compartido.nueva_generacion(sala)
+
+
+async def _vigilar_compartido(sala_id: str):
+    """Aplica los cambios de otros workers aunque nadie consulte la sala (canales push)"""
+    while True:
+        await asyncio.sleep(MEMORIA_COMPARTIDA_INTERVALO_SEG)
+        await _sala(sala_id)
+
+
+async def obtener_sala(sala: str = Query(SALA_PRINCIPAL, description="Id de la sala de juego")) -> Sala:
+    """Dependencia: resuelve la sala indicada en la petición (por defecto la principal)"""
+    encontrada = await _sala(sala)
+    if encontrada is None:
+        raise HTTPException(status_code=404, detail="Sala no encontrada")
+    return encontrada
+
+
+async def leer(sala: Sala, clave, construir, por_carga: bool = False) -> Response:
+    """
+    Lectura del juego desde la instantánea publicada (sin cola si ya está
+    construida); si falta la arma el actor, que nunca ve una mutación a medias.
+    """
+    _, cuerpo = await sala.actor.consultar(clave, lambda _: construir(), por_carga)
+    return RespuestaJSON(cuerpo)
 
 # =============================================================================
 # MODELOS PYDANTIC
@@ -42,10 +179,18 @@ class JugadorManual(BaseModel):
 
 class CantarPalabra(BaseModel):
     palabra: str
+    nivel_traza: Optional[str] = None  # off | resumen | completo
+
+class CantarLote(BaseModel):
+    palabras: List[str] = Field(..., min_length=1, max_length=MAX_PALABRAS_LOTE)
+    nivel_traza: str = "off"  # off | resumen | completo
 
 class ConfigInicio(BaseModel):
     n_jugadores: int
 
+class NuevaSala(BaseModel):
+    id: Optional[str] = None
+
 # =============================================================================
 # ENDPOINTS
 # =============================================================================
@@ -60,6 +205,11 @@ def root():
         "version": "1.0"
     }
 
+@app.get("/metrics")
+def metricas():
+    """Métricas en formato de texto de Prometheus (latencias, fases y contadores)"""
+    return Response(REGISTRO.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/config")
 def get_config():
     """Obtiene las reglas y configuración del juego"""
@@ -69,11 +219,49 @@ def get_config():
         "banco_palabras": BANCO_PALABRAS
     }
 
+@app.get("/api/salas")
+def listar_salas():
+    """Lista las salas activas (la más reciente primero)"""
+    return {"salas": salas.listar()}
+
+@app.post("/api/salas")
+async def crear_sala(data: NuevaSala):
+    """Crea una sala nueva; si no se indica id se genera uno"""
+    if data.id is not None and not RegistroSalas.id_valido(data.id):
+        raise HTTPException(status_code=400, detail="Id de sala inválido")
+    if data.id is not None and await _sala(data.id) is not None:
+        raise HTTPException(status_code=409, detail="La sala ya existe")
+    sala = salas.crear(data.id)
+    if compartido is not None:
+        def publicar_sala():
+            with compartido.escritura(sala):
+                compartido.nueva_generacion(sala)
+        await sala.actor.ejecutar(publicar_sala)
+    return {"message": "Sala creada", "sala": sala.to_dict()}
+
+@app.delete("/api/salas/{sala_id}")
+async def eliminar_sala(sala_id: str):
+    """Elimina una sala y su juego"""
+    if await _sala(sala_id) is None or not await asyncio.to_thread(salas.eliminar, sala_id):
+        raise HTTPException(status_code=404, detail="Sala no encontrada")
+    return {"message": "Sala eliminada"}
+
 @app.post("/api/reset")
-def reset_game():
-    """Reinicia el juego"""
-    global game
-    game = GameManager()
+async def reset_game(sala: Sala = Depends(obtener_sala)):
+    """Reinicia el juego de la sala"""
+    def reiniciar():
+        # La sala se conserva (su actor y su canal): solo cambia el juego
+        with escritura(sala):
+            sala.juego = GameManager()
+            salas.registrar_carga(sala.id)
+            if persistencia is not None:
+                persistencia.borrar(sala.id)
+            if bitacora is not None:
+                bitacora.registrar_reinicio(sala.id)
+            nueva_generacion(sala)
+        sala.eventos.publicar({"tipo": "reinicio", "version": sala.juego.version})
+
+    await sala.actor.ejecutar(reiniciar)
     return {"message": "Juego reiniciado"}
 
 @app.post("/api/cargar-masivo")
@@ -82,14 +270,39 @@ async def cargar_masivo(
     n_jugadores: int = 5,
     config_idiomas: str = Form(...),
     bancos_idiomas: str = Form("{}"),
-    rule_type: str = Form("minimo_uno")  # minimo_uno | uno_por_idioma
+    rule_type: str = Form("minimo_uno"),  # minimo_uno | uno_por_idioma | cuotas
+    motor: str = Form("indice"),  # indice | bitset
+    nivel_traza: str = Form(NIVEL_TRAZA_DEFECTO),  # off | resumen | completo
+    duplicados: str = Form(DUPLICADOS_DEFECTO),  # reportar | rechazar
+    semilla: Optional[int] = Form(None, ge=0),  # reparto reproducible (por defecto, aleatoria)
+    jugadores: str = Form(""),  # nombres de los jugadores (JSON), reemplaza a n_jugadores
+    cuotas: str = Form(""),  # cartones de cada idioma por jugador (JSON), regla "cuotas"
+    sala: Sala = Depends(obtener_sala)
 ):
-    """Carga cartones desde archivo TXT con configuración de idiomas personalizada"""
+    """
+    Carga cartones desde archivo TXT con configuración de idiomas personalizada.
+    También acepta un mazo binario (mazo_binario.py), que se detecta por su cabecera.
+    """
     try:
-        contenido = await file.read()
-        contenido_str = contenido.decode('utf-8')
-        
-        import json
+        if motor not in MOTORES_MARCADO:
+            raise HTTPException(status_code=400, detail={
+                "error": f"Motor de marcado inválido: {motor}",
+                "linea": None
+            })
+        if not nivel_traza_valido(nivel_traza):
+            raise HTTPException(status_code=400, detail={
+                "error": f"Nivel de traza inválido: {nivel_traza}",
+                "linea": None
+            })
+        if duplicados not in DUPLICADOS_MODOS:
+            raise HTTPException(status_code=400, detail={
+                "error": f"Modo de duplicados inválido: {duplicados}",
+                "linea": None
+            })
+        try:
+            nombres, cuotas_idioma = _reparto_personalizado(rule_type, jugadores, cuotas)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail={"error": str(e), "linea": None})
         idiomas_config = json.loads(config_idiomas)
         
         reglas_dinamicas = {}
@@ -134,29 +347,52 @@ async def cargar_masivo(
             bancos_config = {}
             print("ERROR: No se pudieron leer bancos de palabras")
 
-        exito, mensaje, error_linea = game.cargar_cartones_masivos(
-            contenido_str, 
-            n_jugadores,
-            reglas_dinamicas,
-            bancos_config,
-            rule_type
-        )
-        
-        if not exito:
-            raise HTTPException(status_code=400, detail={
-                "error": mensaje,
-                "linea": error_linea
-            })
-
-        inicio = game.iniciar_juego()
-        if "error" in inicio:
-            raise HTTPException(status_code=400, detail=inicio["error"])
-        
-        return {
-            "success": True,
-            "message": mensaje,
-            "estado": game.get_estado_juego()
-        }
+        await file.seek(0)
+        binario = await file.read(len(MAGIA)) == MAGIA
+        await file.seek(0)
+        if binario:
+            # Mazo binario: registros de ancho fijo mapeados con mmap, sin parseo de texto
+            try:
+                contenido = MazoBinario.desde_archivo(file.file)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail={"error": str(e), "linea": None})
+        else:
+            # Lectura por bloques: el archivo nunca se carga completo en memoria
+            contenido = leer_lineas_por_bloques(file.file)
+
+        # La carga es una mutación más: la ejecuta el actor de la sala, fuera del event loop
+        def cargar():
+            with escritura(sala):
+                game = sala.juego
+                game.motor = motor
+                game.nivel_traza = nivel_traza
+                try:
+                    exito, mensaje, error_linea = game.cargar_cartones_masivos(
+                        contenido, 
+                        n_jugadores,
+                        reglas_dinamicas,
+                        bancos_config,
+                        rule_type,
+                        duplicados,
+                        semilla,
+                        nombres,
+                        cuotas_idioma
+                    )
+                finally:
+                    if binario:
+                        contenido.cerrar()
+                
+                if not exito:
+                    raise HTTPException(status_code=400, detail={
+                        "error": mensaje,
+                        "linea": error_linea
+                    })
+
+                return _iniciar_tras_carga(sala, mensaje)
+
+        return await sala.actor.ejecutar(cargar)
+    except HTTPException:
+        raise
     except UnicodeDecodeError:
         raise HTTPException(status_code=400, detail={
             "error": "El archivo no está en formato UTF-8",
@@ -173,10 +409,112 @@ async def cargar_masivo(
             "linea": None
         })
 
+def _reparto_personalizado(
+    rule_type: str, jugadores: Optional[str], cuotas: Optional[str]
+) -> Tuple[Optional[List[str]], Optional[Dict[str, int]]]:
+    """Regla, lista de jugadores (JSON: ["Ana", ...]) y cuotas (JSON: {"SP": 2, "EN": 1}) validadas"""
+    if rule_type not in REGLAS_REPARTO:
+        raise ValueError(f"Regla de reparto inválida: {rule_type}")
+    try:
+        nombres = json.loads(jugadores) if jugadores else None
+        por_idioma = json.loads(cuotas) if cuotas else None
+    except json.JSONDecodeError:
+        raise ValueError("Los jugadores y las cuotas deben ser JSON válido")
+    if nombres is not None and not (isinstance(nombres, list) and all(isinstance(n, str) for n in nombres)):
+        raise ValueError("jugadores debe ser una lista de nombres")
+    if por_idioma is not None:
+        if not isinstance(por_idioma, dict) or not all(
+            isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in por_idioma.values()
+        ):
+            raise ValueError("cuotas debe indicar un número de cartones por idioma")
+        por_idioma = {idioma.upper(): n for idioma, n in por_idioma.items()}
+    if rule_type == "cuotas" and not por_idioma:
+        raise ValueError("La regla cuotas requiere las cuotas por idioma")
+    return nombres, por_idioma
+
+def _iniciar_tras_carga(sala: Sala, mensaje: str) -> Response:
+    """Inicia el juego recién cargado, lo publica a los demás workers, guarda el snapshot y avisa"""
+    game = sala.juego
+    salas.registrar_carga(sala.id)
+    inicio = game.iniciar_juego()
+    if "error" in inicio:
+        raise HTTPException(status_code=400, detail=inicio["error"])
+    if bitacora is not None:
+        bitacora.registrar_carga(sala.id, game)
+        bitacora.registrar_inicio(sala.id, game.orden_idiomas)
+    nueva_generacion(sala)
+    if persistencia is not None:
+        persistencia.guardar_completo(sala.id, game)
+    sala.eventos.publicar({"tipo": "reinicio", "version": game.version})
+
+    return RespuestaJSON(
+        dumps({"success": True, "message": mensaje, "duplicados": game.duplicados})[:-1]
+        + b',"estado":' + game.get_estado_json() + b"}"
+    )
+
+@app.post("/api/generar-cartones")
+async def generar_cartones(
+    n_por_idioma: int = Query(..., ge=1, le=MAX_CARTONES_GENERADOS, description="Cartones únicos por idioma"),
+    destino: str = Query("jugadores", description="jugadores (carga en la sala) | txt (descarga)"),
+    n_jugadores: int = Query(5, ge=1),
+    rule_type: str = Query("minimo_uno"),  # minimo_uno | uno_por_idioma | cuotas
+    semilla: Optional[int] = Query(None, ge=0),
+    jugadores: Optional[str] = Query(None, description='Nombres de los jugadores en JSON, p. ej. ["Ana","Luis"]'),
+    cuotas: Optional[str] = Query(None, description='Cartones de cada idioma por jugador en JSON, p. ej. {"SP":2}'),
+    sala: Sala = Depends(obtener_sala)
+):
+    """Genera cartones únicos con los tamaños configurados y los reparte o los descarga como TXT"""
+    if destino not in ("jugadores", "txt"):
+        raise HTTPException(status_code=400, detail=f"Destino inválido: {destino}")
+    try:
+        nombres, cuotas_idioma = _reparto_personalizado(rule_type, jugadores, cuotas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def preparar():
+        game = sala.juego
+        # Tamaños de la última carga de la sala, o los predefinidos
+        reglas_dinamicas = game.reglas_personalizadas or {
+            codigo: {"max_palabras": tamano, "nombre": NOMBRES_IDIOMAS.get(codigo, codigo)}
+            for codigo, tamano in REGLAS_TAMANO.items()
+        }
+        tamanos = {codigo: regla["max_palabras"] for codigo, regla in reglas_dinamicas.items()}
+        try:
+            bancos = bancos_para(tamanos, game.bancos)
+            lineas = lineas_cartones(bancos, tamanos, n_por_idioma, semilla)
+            # El primer lote valida que existan suficientes cartones distintos
+            primera = next(lineas)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return reglas_dinamicas, itertools.chain([primera], lineas)
+
+    if destino == "txt":
+        _, lineas = await asyncio.to_thread(preparar)
+        return StreamingResponse(
+            bloques(lineas),
+            media_type="text/plain; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="cartones.txt"'}
+        )
+
+    def repartir():
+        with escritura(sala):
+            reglas_dinamicas, lineas = preparar()
+            game = sala.juego
+            exito, mensaje, error_linea = game.cargar_cartones_masivos(
+                lineas, n_jugadores, reglas_dinamicas, game.bancos_personalizados, rule_type,
+                semilla=semilla, nombres=nombres, cuotas=cuotas_idioma
+            )
+            if not exito:
+                raise HTTPException(status_code=400, detail={"error": mensaje, "linea": error_linea})
+            return _iniciar_tras_carga(sala, mensaje)
+
+    return await sala.actor.ejecutar(repartir)
+
 @app.post("/api/generar-carton-aleatorio/{idioma}")
-def generar_carton_aleatorio(idioma: str):
+async def generar_carton_aleatorio(idioma: str, sala: Sala = Depends(obtener_sala)):
     """Genera un cartón aleatorio para un idioma"""
-    carton = game.generar_carton_aleatorio(idioma.upper())
+    # Reinicia la traza del juego: es una mutación más de la sala
+    carton = await sala.actor.ejecutar(lambda: sala.juego.generar_carton_aleatorio(idioma.upper()))
     
     if not carton:
         raise HTTPException(status_code=400, detail="Idioma inválido")
@@ -184,65 +522,320 @@ def generar_carton_aleatorio(idioma: str):
     return carton.to_dict()
 
 @app.post("/api/iniciar-juego")
-def iniciar_juego():
+async def iniciar_juego(sala: Sala = Depends(obtener_sala)):
     """Inicia el juego sorteando idiomas"""
-    resultado = game.iniciar_juego()
-    
-    if "error" in resultado:
-        raise HTTPException(status_code=400, detail=resultado["error"])
-    
-    return resultado
+    def iniciar():
+        with escritura(sala):
+            resultado = sala.juego.iniciar_juego()
+            
+            if "error" in resultado:
+                raise HTTPException(status_code=400, detail=resultado["error"])
+            publicar_operacion(sala, "I", json.dumps(sala.juego.orden_idiomas))
+            if bitacora is not None:
+                bitacora.registrar_inicio(sala.id, sala.juego.orden_idiomas)
+        
+        if persistencia is not None:
+            persistencia.guardar_estado(sala.id, sala.juego)
+        sala.eventos.publicar({"tipo": "reinicio", "version": sala.juego.version})
+        return resultado
+
+    return await sala.actor.ejecutar(iniciar)
 
 @app.post("/api/cantar-palabra")
-def cantar_palabra(data: CantarPalabra):
+async def cantar_palabra(data: CantarPalabra, sala: Sala = Depends(obtener_sala)):
     """Canta una palabra y verifica ganadores"""
-    resultado = game.cantar_palabra(data.palabra)
-    
-    if "error" in resultado:
-        raise HTTPException(status_code=400, detail=resultado["error"])
-    
-    return resultado
+    def cantar():
+        with escritura(sala):
+            game = sala.juego
+            resultado = game.cantar_palabra(data.palabra, data.nivel_traza)
+            
+            if "error" in resultado:
+                raise HTTPException(status_code=400, detail=resultado["error"])
+            publicar_operacion(sala, "C", resultado["palabra"])
+            if bitacora is not None:
+                bitacora.registrar_canto(sala.id, resultado["palabra"])
+        
+        if persistencia is not None:
+            persistencia.registrar_canto(sala.id, game)
+        if sala.eventos.hay_suscriptores():
+            sala.eventos.publicar(evento_palabra(resultado, game.version), game.marcados_ultimo_canto())
+        return RespuestaJSON(dumps(resultado))
+
+    return await sala.actor.ejecutar(cantar)
+
+@app.post("/api/cantar-lote")
+async def cantar_lote(data: CantarLote, sala: Sala = Depends(obtener_sala)):
+    """Canta una lista de palabras en orden y se detiene en el primer ganador"""
+    def publicar(resultado):
+        publicar_operacion(sala, "C", resultado["palabra"])
+        if bitacora is not None:
+            bitacora.registrar_canto(sala.id, resultado["palabra"])
+        if sala.eventos.hay_suscriptores():
+            sala.eventos.publicar(evento_palabra(resultado, sala.juego.version), sala.juego.marcados_ultimo_canto())
+
+    def cantar():
+        with escritura(sala):
+            game = sala.juego
+            resultado = game.cantar_lote(data.palabras, data.nivel_traza, publicar)
+        if "error" in resultado:
+            raise HTTPException(status_code=400, detail=resultado["error"])
+
+        if persistencia is not None:
+            persistencia.registrar_canto(sala.id, game, resultado["aplicadas"])
+        return RespuestaJSON(dumps(resultado))
+
+    return await sala.actor.ejecutar(cantar)
 
 @app.post("/api/siguiente-idioma")
-def siguiente_idioma():
+async def siguiente_idioma(sala: Sala = Depends(obtener_sala)):
     """Avanza al siguiente idioma"""
-    return game.siguiente_idioma()
+    def avanzar():
+        with escritura(sala):
+            resultado = sala.juego.siguiente_idioma()
+            if "error" not in resultado:
+                publicar_operacion(sala, "S")
+                if bitacora is not None:
+                    bitacora.registrar_siguiente(sala.id)
+        if "error" not in resultado:
+            if persistencia is not None:
+                persistencia.guardar_estado(sala.id, sala.juego)
+            sala.eventos.publicar({
+                "tipo": "idioma",
+                "version": sala.juego.version,
+                "idioma_actual": resultado["idioma_actual"],
+                "idx": resultado["idx"]
+            })
+        return resultado
+
+    return await sala.actor.ejecutar(avanzar)
+
+def _etag_coincide(request: Request, etag: str) -> bool:
+    """Compara el ETag actual con la cabecera If-None-Match (admite lista y '*')"""
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    candidatos = [c.strip() for c in cabecera.split(",")]
+    return "*" in candidatos or etag in candidatos or f"W/{etag}" in candidatos
+
+def _etag_estado(version: int, jugadores: bool) -> str:
+    return f'"{version}"' if jugadores else f'"{version}-sin-jugadores"'
 
 @app.get("/api/estado")
-def get_estado():
-    """Obtiene el estado completo del juego"""
-    return game.get_estado_juego()
+async def get_estado(
+    request: Request,
+    since: Optional[int] = Query(None, description="Versión conocida por el cliente: retorna solo los cambios posteriores"),
+    jugadores: bool = Query(True, description="Incluir la lista de jugadores (false: paginar con /api/jugadores)"),
+    sala: Sala = Depends(obtener_sala)
+):
+    """
+    Obtiene el estado del juego (completo, o delta desde la versión `since`)
+    desde la instantánea publicada tras la última mutación, sin bloqueo.
+    """
+    instantanea = sala.actor.instantanea
+    etag = _etag_estado(instantanea.version, jugadores)
+    if _etag_coincide(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    if since is None:
+        clave = "completo" if jugadores else "resumen"
+        construir = lambda _: sala.juego.get_estado_json(jugadores)
+    else:
+        relativa = _delta_relativo(since, instantanea)
+        if relativa is not None:
+            # Un cliente al día pide "sin cambios" y, tras la próxima mutación,
+            # "solo el último": ambos se construyen al publicar
+            for clave in (("desde", "actual"), ("desde", "anterior")):
+                sala.actor.anotar(clave, _construir_delta_relativo(sala, clave))
+            cuerpo = instantanea.cuerpos.get(relativa)
+            if cuerpo is not None:
+                return RespuestaJSON(cuerpo, headers={"ETag": etag})
+        clave, construir = ("desde", since), lambda _: dumps(sala.juego.get_cambios_desde(since))
+    # Una vez por versión (y `since`): los demás lectores reciben los mismos bytes
+    instantanea, cuerpo = await sala.actor.consultar(clave, construir)
+    return RespuestaJSON(cuerpo, headers={"ETag": _etag_estado(instantanea.version, jugadores)})
+
+def _delta_relativo(since: int, instantanea: Instantanea) -> Optional[Tuple[str, str]]:
+    """Clave del delta relativo a la instantánea (sin cambios o solo el último), si aplica"""
+    if since == instantanea.version:
+        return ("desde", "actual")
+    if since == instantanea.anterior:
+        return ("desde", "anterior")
+    return None
+
+def _construir_delta_relativo(sala: Sala, relativa: Tuple[str, str]):
+    if relativa[1] == "actual":
+        return lambda instantanea: dumps(sala.juego.get_cambios_desde(instantanea.version))
+    return lambda instantanea: dumps(sala.juego.get_cambios_desde(instantanea.anterior))
+
+@app.websocket("/api/eventos")
+async def eventos_ws(websocket: WebSocket, sala: str = SALA_PRINCIPAL, jugador: Optional[str] = None):
+    """Canal push por WebSocket; con `jugador` solo llegan las marcas de sus cartones"""
+    encontrada = await _sala(sala)
+    if encontrada is None:
+        await websocket.close(code=4404)
+        return
+    
+    await websocket.accept()
+    suscriptor = encontrada.eventos.suscribir(jugador)
+    vigilante = asyncio.create_task(_vigilar_compartido(sala)) if compartido is not None else None
+    try:
+        while True:
+            evento = await suscriptor.siguiente()
+            await websocket.send_json(evento)
+            if evento["tipo"] == "sala_cerrada":
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if vigilante is not None:
+            vigilante.cancel()
+        encontrada.eventos.desuscribir(suscriptor)
+
+@app.get("/api/eventos/sse")
+async def eventos_sse(request: Request, jugador: Optional[str] = None, sala: Sala = Depends(obtener_sala)):
+    """Canal push por Server-Sent Events (misma semántica que el WebSocket)"""
+    suscriptor = sala.eventos.suscribir(jugador)
+    
+    async def flujo():
+        vigilante = asyncio.create_task(_vigilar_compartido(sala.id)) if compartido is not None else None
+        try:
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(suscriptor.siguiente(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+                if evento["tipo"] == "sala_cerrada":
+                    break
+        finally:
+            if vigilante is not None:
+                vigilante.cancel()
+            sala.eventos.desuscribir(suscriptor)
+    
+    return StreamingResponse(flujo(), media_type="text/event-stream")
+
+@app.get("/api/casi-ganadores")
+async def get_casi_ganadores(
+    k: int = Query(2, ge=1, le=CASI_GANADORES_MAX_K, description="Palabras que faltan como máximo"),
+    limite: int = Query(CASI_GANADORES_LIMITE, ge=1, le=1000),
+    sala: Sala = Depends(obtener_sala)
+):
+    """Cartones a los que les faltan k palabras o menos (los más cercanos primero)"""
+    return await leer(sala, ("casi", k, limite), lambda: dumps(sala.juego.get_casi_ganadores(k, limite)))
+
+def _campos_carton(campos: Optional[str]) -> Optional[List[str]]:
+    """Valida la proyección `campos=id,aciertos,...` (None: cartón completo)"""
+    if campos is None:
+        return None
+    lista = [c.strip() for c in campos.split(",") if c.strip()]
+    desconocidos = [c for c in lista if c not in CAMPOS_CARTON]
+    if not lista or desconocidos:
+        raise HTTPException(status_code=400, detail={
+            "error": f"Campos inválidos: {', '.join(desconocidos) or campos}",
+            "validos": list(CAMPOS_CARTON)
+        })
+    return lista
+
+@app.get("/api/duplicados")
+async def get_duplicados(sala: Sala = Depends(obtener_sala)):
+    """Ids repetidos y cartones con las mismas palabras entre los cartones cargados"""
+    return await leer(sala, "duplicados", lambda: dumps(sala.juego.get_duplicados()), por_carga=True)
+
+@app.get("/api/duplicados/similares")
+async def get_similares(
+    umbral: float = Query(0.8, gt=0, le=1, description="Similitud de Jaccard mínima"),
+    limite: int = Query(100, ge=1, le=1000),
+    sala: Sala = Depends(obtener_sala)
+):
+    """Pares de cartones casi iguales (MinHash + verificación exacta), calculados bajo demanda"""
+    return await leer(sala, ("similares", umbral, limite), lambda: dumps(sala.juego.get_similares(umbral, limite)), por_carga=True)
+
+def _ruta_bitacora(sala_id: str) -> str:
+    """Archivo de la bitácora de la sala (puede existir aunque la sala ya no)"""
+    if bitacora is None:
+        raise HTTPException(status_code=404, detail="Bitácora desactivada")
+    if not RegistroSalas.id_valido(sala_id):
+        raise HTTPException(status_code=400, detail="Id de sala inválido")
+    ruta = bitacora.ruta(sala_id)
+    if not os.path.exists(ruta):
+        raise HTTPException(status_code=404, detail="La sala no tiene bitácora")
+    return ruta
+
+@app.get("/api/bitacora")
+async def get_bitacora(sala: str = Query(SALA_PRINCIPAL, description="Id de la sala de juego")):
+    """Cantidad de eventos de la bitácora de la sala y el evento con que empieza cada partida"""
+    ruta = _ruta_bitacora(sala)
+    try:
+        eventos = await asyncio.to_thread(indice, ruta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"eventos": len(eventos), "partidas": partidas(eventos), "bytes": os.path.getsize(ruta)}
+
+@app.get("/api/bitacora/reproducir")
+async def reproducir_bitacora(
+    sala: str = Query(SALA_PRINCIPAL, description="Id de la sala de juego"),
+    hasta: Optional[int] = Query(None, ge=0, description="Estado tras este número de evento (por defecto, el último)"),
+    jugadores: bool = False
+):
+    """Estado del juego reconstruido desde la bitácora (auditoría de una partida)"""
+    ruta = _ruta_bitacora(sala)
+    try:
+        juego = await asyncio.to_thread(reproducir, ruta, hasta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RespuestaJSON(juego.get_estado_json(jugadores))
 
 @app.get("/api/jugadores")
-def get_jugadores():
-    """Lista todos los jugadores con sus cartones"""
-    return {
-        "jugadores": [j.to_dict() for j in game.jugadores],
-        "total": len(game.jugadores)
-    }
+async def get_jugadores(
+    cursor: int = Query(0, ge=0, description="Posición del primer jugador (valor `siguiente` de la página anterior)"),
+    limite: Optional[int] = Query(None, ge=1, le=PAGINA_JUGADORES_MAX, description="Jugadores por página (sin límite por defecto)"),
+    campos: Optional[str] = Query(None, description="Campos de cada cartón separados por coma, p. ej. id,aciertos"),
+    idioma: Optional[str] = Query(None, description="Solo cartones de este idioma"),
+    ganador: Optional[bool] = Query(None, description="Solo cartones ganadores (true) o no ganadores (false)"),
+    sala: Sala = Depends(obtener_sala)
+):
+    """Lista los jugadores con sus cartones (paginado, proyectado y filtrado)"""
+    lista_campos = _campos_carton(campos)
+    idioma = idioma.upper() if idioma else None
+    clave = ("jugadores", cursor, limite, tuple(lista_campos or ()), idioma, ganador)
+    return await leer(sala, clave, lambda: sala.juego.get_jugadores_json(cursor, limite, lista_campos, idioma, ganador))
 
 @app.get("/api/jugador/{nombre}")
-def get_jugador(nombre: str):
+async def get_jugador(
+    nombre: str,
+    campos: Optional[str] = Query(None, description="Campos de cada cartón separados por coma"),
+    sala: Sala = Depends(obtener_sala)
+):
     """Obtiene información de un jugador específico"""
-    for jugador in game.jugadores:
-        if jugador.nombre == nombre:
-            return jugador.to_dict()
-    
-    raise HTTPException(status_code=404, detail="Jugador no encontrado")
+    lista_campos = _campos_carton(campos)
+
+    def construir():
+        jugador = sala.juego.buscar_jugador(nombre)
+        if jugador is None:
+            raise HTTPException(status_code=404, detail="Jugador no encontrado")
+        return jugador.to_json(campos=lista_campos)
+
+    return await leer(sala, ("jugador", nombre, tuple(lista_campos or ())), construir)
 
 @app.get("/api/debug/primer-carton")
-def debug_primer_carton():
+async def debug_primer_carton(sala: Sala = Depends(obtener_sala)):
     """Devuelve el primer jugador y uno de sus cartones para inspección rápida."""
-    if not game.jugadores:
-        raise HTTPException(status_code=400, detail="No hay jugadores cargados")
-    jugador = game.jugadores[0]
-    if not jugador.cartones:
-        raise HTTPException(status_code=400, detail="El primer jugador no tiene cartones")
-    carton = jugador.cartones[0]
-    return {
-        "jugador": jugador.nombre,
-        "carton": carton.to_dict()
-    }
+    def construir():
+        game = sala.juego
+        if not game.jugadores:
+            raise HTTPException(status_code=400, detail="No hay jugadores cargados")
+        jugador = game.jugadores[0]
+        if not jugador.cartones:
+            raise HTTPException(status_code=400, detail="El primer jugador no tiene cartones")
+        carton = jugador.cartones[0]
+        return dumps({
+            "jugador": jugador.nombre,
+            "carton": carton.to_dict()
+        })
+
+    return await leer(sala, "primer_carton", construir)
 
 # =============================================================================
 # ENDPOINT DE DEMO PARA PROBAR GANADOR RÁPIDO
@@ -251,31 +844,37 @@ def debug_primer_carton():
 # Autoría Propia: Darwin Pacheco
 
 @app.post("/api/debug/bingo-demo")
-def bingo_demo(idioma: str = "SP"):
+async def bingo_demo(idioma: str = "SP", sala: Sala = Depends(obtener_sala)):
     """Genera un estado de juego con un ganador inmediato (demo/testing)."""
     idioma = idioma.upper()
-    carton = game.generar_carton_aleatorio(idioma)
-    if not carton:
-        raise HTTPException(status_code=400, detail="Idioma inválido para demo")
 
-    # Marcar como ganador
-    carton.aciertos = carton.total_palabras
-    carton.palabras_marcadas = set(carton.palabras)
+    def preparar_demo():
+        with escritura(sala):
+            game = sala.juego
+            carton = game.generar_carton_aleatorio(idioma)
+            if not carton:
+                raise HTTPException(status_code=400, detail="Idioma inválido para demo")
+
+            game.fijar_demo(carton)
+            if bitacora is not None:
+                bitacora.registrar_demo(sala.id, carton)
+            nueva_generacion(sala)
+            if persistencia is not None:
+                persistencia.guardar_completo(
+                    sala.id, game, [(c["idioma"], c["palabra"]) for c in game.palabras_cantadas]
+                )
+        sala.eventos.publicar({"tipo": "reinicio", "version": game.version})
 
-    game.jugadores = [Jugador("Demo", [carton])]
-    game.orden_idiomas = [idioma]
-    game.idioma_actual_idx = 0
-    game.juego_activo = False
-    game.palabras_cantadas = [{"idioma": idioma, "palabra": p} for p in carton.palabras]
+        return {
+            "palabra": carton.palabras[0],
+            "hay_ganador": True,
+            "ganadores": [{"jugador": "Demo", "carton_id": carton.id}],
+            "idioma": idioma,
+            "juego_terminado": True,
+            "estado": game.get_estado_juego()
+        }
 
-    return {
-        "palabra": carton.palabras[0],
-        "hay_ganador": True,
-        "ganadores": [{"jugador": "Demo", "carton_id": carton.id}],
-        "idioma": idioma,
-        "juego_terminado": True,
-        "estado": game.get_estado_juego()
-    }
+    return await sala.actor.ejecutar(preparar_demo)
 
 # =============================================================================
 # MAIN
@@ -0,0 +1,488 @@
+# =============================================================================
+# MAZO BINARIO DE CARTONES (REGISTROS DE ANCHO FIJO, LECTURA CON MMAP)
+# Uso: python mazo_binario.py cartones.txt mazo.bin
+#      python mazo_binario.py cartones.txt mazo.bin --tamanos SP=24 --banco SP=banco_SP.txt
+# =============================================================================
+#
+# Formato (little endian):
+#   MAGIA (8 bytes) | versión uint32 | largo de la cabecera uint32 | cabecera JSON
+#   Después, una sección por idioma (en el orden de la cabecera, cada una
+#   alineada a 8 bytes) con un registro de ancho fijo por cartón: id en bytes
+#   rellenos con ceros + `tamano` × uint16, índices en el banco del idioma
+#   (palabras en orden alfabético) guardado en la cabecera.
+#   Si los idiomas del archivo original estaban intercalados ("intercalado"
+#   en la cabecera), al final va un uint8 por cartón con el índice de su
+#   sección, en el orden original; así la carga respeta el orden del TXT.
+#   La versión 1 no tenía esa tabla: sus cartones quedan agrupados por idioma.
+
+import argparse
+import io
+import json
+import mmap
+import struct
+import threading
+import time
+from array import array
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Carton, Vocabulario, Vocabularios
+from motor_bitset import ids_concatenados
+from parser_cartones import ErrorValidacionCarton
+
+MAGIA = b"BINGOMAZ"
+VERSION = 2
+VERSIONES_LEGIBLES = (1, 2)
+_PREAMBULO = struct.Struct("<II")
+# Mazo ordenado: largo del mazo | número de cartones, luego el mazo y un byte por cartón.
+# Desde la versión 2 el orden va dentro del mazo y el número de cartones es 0.
+_ORDENADO = struct.Struct("<QQ")
+_ALINEACION = 8
+
+
+def _alinear(posicion: int) -> int:
+    return -(-posicion // _ALINEACION) * _ALINEACION
+
+
+def tipo_registro(ancho_id: int, tamano: int) -> np.dtype:
+    """Registro de un cartón: id de ancho fijo y los índices de sus palabras"""
+    return np.dtype([("id", f"S{ancho_id}"), ("palabras", "<u2", (tamano,))])
+
+
+def es_mazo_binario(inicio: bytes) -> bool:
+    return inicio[:len(MAGIA)] == MAGIA
+
+
+# -----------------------------------------------------------------------------
+# Escritura
+# -----------------------------------------------------------------------------
+
+def _seccion(idioma: str, cartones: List[Carton]) -> Tuple[List[str], np.ndarray]:
+    """(banco ordenado, registros) de los cartones de un idioma"""
+    tamano = len(cartones[0]._ids)
+    if any(len(c._ids) != tamano for c in cartones):
+        raise ValueError(f"Los cartones de {idioma} no tienen todos el mismo número de palabras")
+
+    vocab = cartones[0].vocab
+    if any(c.vocab is not vocab for c in cartones):
+        # Cartones de cargas distintas: se llevan a un vocabulario común
+        comunes = Vocabularios()
+        cartones = [Carton.desde_ordenadas(c.id, c.idioma, c.palabras, comunes) for c in cartones]
+        vocab = comunes.de(idioma)
+    ids_carton = np.array([c.id.encode("utf-8") for c in cartones])
+    return _registros(idioma, ids_concatenados(cartones), tamano, ids_carton, vocab.palabras)
+
+
+def _registros(
+    idioma: str, ids: np.ndarray, tamano: int, ids_carton: np.ndarray, lista: List[str]
+) -> Tuple[List[str], np.ndarray]:
+    """(banco ordenado, registros) desde los ids de vocabulario de una sección, cartón tras cartón"""
+    usados = np.flatnonzero(np.bincount(ids)) if len(ids) else np.empty(0, dtype=np.int64)
+    if len(usados) > 0x10000:
+        raise ValueError(f"El idioma {idioma} usa más de 65536 palabras distintas")
+    # Banco del mazo: las palabras usadas en orden alfabético, el mismo orden de cada cartón
+    palabras = [lista[i] for i in usados.tolist()]
+    orden = sorted(range(len(palabras)), key=palabras.__getitem__)
+    posicion = np.zeros(int(usados[-1]) + 1 if len(usados) else 0, dtype=np.uint16)
+    posicion[usados[orden]] = np.arange(len(orden), dtype=np.uint16)
+
+    ancho_id = max(2, ids_carton.dtype.itemsize)
+    ancho_id += ancho_id % 2  # los uint16 quedan alineados dentro del registro
+    registros = np.zeros(len(ids_carton), dtype=tipo_registro(ancho_id, tamano))
+    registros["id"] = ids_carton
+    registros["palabras"] = posicion[ids].reshape(len(ids_carton), tamano)
+    return [palabras[i] for i in orden], registros
+
+
+def escribir_mazo(cartones: Iterable[Carton], salida: BinaryIO) -> int:
+    """Escribe cartones ya validados como mazo binario; retorna cuántos escribió"""
+    if isinstance(cartones, MazoMatriz):
+        # Las secciones salen de las matrices: los cartones no se crean
+        orden = cartones.bloque.tobytes()
+        secciones = [
+            (idioma, *_registros(idioma, matriz.reshape(-1), matriz.shape[1], nombres, vocab.palabras))
+            for idioma, matriz, nombres, vocab in zip(
+                cartones.idiomas, cartones.matrices, cartones.nombres, cartones.vocabs
+            )
+        ]
+    else:
+        grupos: Dict[str, List[Carton]] = {}
+        numeros: Dict[str, int] = {}
+        # Sección (idiomas en orden de primera aparición) de cada cartón, en el orden de entrada
+        orden = bytearray()
+        for carton in cartones:
+            numero = numeros.get(carton.idioma)
+            if numero is None:
+                if len(numeros) == 0x100:
+                    raise ValueError("El mazo binario admite como máximo 256 idiomas")
+                numero = numeros[carton.idioma] = len(numeros)
+                grupos[carton.idioma] = []
+            orden.append(numero)
+            grupos[carton.idioma].append(carton)
+        secciones = [(idioma, *_seccion(idioma, grupo)) for idioma, grupo in grupos.items()]
+
+    # Con las secciones numeradas por aparición, el archivo ya estaba agrupado si no decrecen
+    secuencia = np.frombuffer(orden, dtype=np.uint8)
+    intercalado = bool((secuencia[1:] < secuencia[:-1]).any())
+    cabecera = json.dumps({"intercalado": intercalado, "idiomas": [
+        {
+            "codigo": idioma,
+            "tamano": registros.dtype["palabras"].shape[0],
+            "ancho_id": registros.dtype["id"].itemsize,
+            "n_cartones": len(registros),
+            "banco": banco
+        }
+        for idioma, banco, registros in secciones
+    ]}, ensure_ascii=False).encode("utf-8")
+
+    salida.write(MAGIA + _PREAMBULO.pack(VERSION, len(cabecera)) + cabecera)
+    escrito = len(MAGIA) + _PREAMBULO.size + len(cabecera)
+    for _, _, registros in secciones:
+        salida.write(b"\0" * (_alinear(escrito) - escrito))
+        salida.write(registros.tobytes())
+        escrito = _alinear(escrito) + registros.nbytes
+    if intercalado:
+        salida.write(orden)
+    return len(orden)
+
+
+def escribir_mazo_ordenado(cartones: List[Carton], salida: BinaryIO) -> int:
+    """
+    Mazo binario con su largo delante (registros de la bitácora y segmentos
+    compartidos); el mazo ya guarda el orden original. Retorna los bytes escritos.
+    """
+    mazo = io.BytesIO()
+    escribir_mazo(cartones, mazo)
+    salida.write(_ORDENADO.pack(mazo.tell(), 0))
+    salida.write(mazo.getbuffer())
+    return _ORDENADO.size + mazo.tell()
+
+
+def leer_mazo_ordenado(buffer, vocabularios: Optional[Vocabularios] = None) -> Sequence[Carton]:
+    """Cartones de escribir_mazo_ordenado, en el orden original"""
+    largo, n_cartones = _ORDENADO.unpack_from(buffer, 0)
+    mazo = MazoBinario(buffer[_ORDENADO.size:_ORDENADO.size + largo])
+    try:
+        tramos = [len(seccion) for seccion in mazo.secciones]
+        cartones = mazo.construir(vocabularios)
+    finally:
+        mazo.cerrar()
+    if not n_cartones:
+        return cartones
+    # Registros de la versión 1: un byte por cartón con su sección tras el mazo.
+    # Cada sección conserva el orden relativo de su idioma
+    idiomas = bytes(buffer[_ORDENADO.size + largo:_ORDENADO.size + largo + n_cartones])
+    secciones = []
+    inicio = 0
+    for tramo in tramos:
+        secciones.append(iter(cartones[inicio:inicio + tramo]))
+        inicio += tramo
+    return [next(secciones[i]) for i in idiomas]
+
+
+# -----------------------------------------------------------------------------
+# Lectura
+# -----------------------------------------------------------------------------
+
+class SeccionMazo:
+    """Cartones de un idioma: vista NumPy sobre el archivo (sin objetos por cartón)"""
+    __slots__ = ("idioma", "banco", "registros", "inicio")
+
+    def __init__(self, idioma: str, banco: List[str], registros: np.ndarray, inicio: int):
+        self.idioma = idioma
+        self.banco = banco
+        self.registros = registros
+        # Cartones de las secciones anteriores (posición en el mazo agrupado por idioma)
+        self.inicio = inicio
+
+    @property
+    def tamano(self) -> int:
+        return self.registros.dtype["palabras"].shape[0]
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+
+class MazoBinario:
+    """
+    Mazo binario abierto con mmap: cabecera en memoria y registros como vistas
+    NumPy de solo lectura. Al cargar se copian a un MazoMatriz en el orden del
+    archivo original (`orden`, si los idiomas estaban intercalados).
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        if not es_mazo_binario(bytes(buffer[:len(MAGIA)])):
+            raise ValueError("El archivo no es un mazo binario de cartones")
+        try:
+            version, largo = _PREAMBULO.unpack_from(buffer, len(MAGIA))
+            if version not in VERSIONES_LEGIBLES:
+                raise ValueError(f"Versión de mazo binario no soportada: {version}")
+            posicion = len(MAGIA) + _PREAMBULO.size
+            cabecera = json.loads(bytes(buffer[posicion:posicion + largo]).decode("utf-8"))
+            posicion += largo
+
+            self.secciones: List[SeccionMazo] = []
+            inicio = 0
+            for datos in cabecera["idiomas"]:
+                tipo = tipo_registro(int(datos["ancho_id"]), int(datos["tamano"]))
+                posicion = _alinear(posicion)
+                registros = np.frombuffer(buffer, dtype=tipo, count=int(datos["n_cartones"]), offset=posicion)
+                posicion += registros.nbytes
+                self.secciones.append(SeccionMazo(datos["codigo"], datos["banco"], registros, inicio))
+                inicio += len(registros)
+
+            # Sección de cada cartón en el orden original (None: ya estaban agrupados)
+            self.orden: Optional[np.ndarray] = None
+            if cabecera.get("intercalado"):
+                self.orden = np.frombuffer(buffer, dtype=np.uint8, count=inicio, offset=posicion)
+                conteos = np.bincount(self.orden, minlength=len(self.secciones))
+                if len(conteos) != len(self.secciones) or (conteos != [len(s) for s in self.secciones]).any():
+                    raise ValueError("la tabla de orden no coincide con las secciones")
+        except (KeyError, TypeError, struct.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Cabecera de mazo binario inválida: {e}")
+        except ValueError as e:
+            # np.frombuffer con un archivo truncado
+            raise ValueError(f"Mazo binario inválido: {e}")
+
+    @classmethod
+    def desde_archivo(cls, archivo: BinaryIO) -> "MazoBinario":
+        """Mapea un archivo abierto en binario (los temporales de subida también)"""
+        archivo.seek(0)
+        return cls(mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def abrir(cls, ruta: str) -> "MazoBinario":
+        with open(ruta, "rb") as archivo:
+            return cls.desde_archivo(archivo)
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.secciones)
+
+    def posicion(self, seccion: int, fila: int) -> int:
+        """Posición (desde 1) en el archivo original del cartón `fila` de una sección"""
+        if self.orden is None:
+            return self.secciones[seccion].inicio + fila + 1
+        return int(np.flatnonzero(self.orden == seccion)[fila]) + 1
+
+    def cerrar(self):
+        # Las vistas de NumPy se sueltan antes de cerrar el mmap
+        self.secciones = []
+        self.orden = None
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        elif isinstance(self._buffer, memoryview):
+            self._buffer.release()
+
+    def __enter__(self) -> "MazoBinario":
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def validar(self, reglas_dinamicas: Dict, bancos_config: Dict):
+        """
+        Mismas reglas que el TXT, vectorizadas por sección: idioma configurado,
+        tamaño exacto y palabras del banco personalizado. El "número de línea"
+        de los errores es la posición del cartón en el archivo original.
+        """
+        for numero, seccion in enumerate(self.secciones):
+            idioma = seccion.idioma
+            if idioma not in reglas_dinamicas:
+                raise ErrorValidacionCarton(f"Idioma '{idioma}' no está configurado", self.posicion(numero, 0))
+            esperadas = reglas_dinamicas[idioma]['max_palabras']
+            if seccion.tamano != esperadas:
+                raise ErrorValidacionCarton(f"El cartón requiere exactamente {esperadas} palabras", self.posicion(numero, 0))
+            if not len(seccion):
+                continue
+
+            matriz = seccion.registros["palabras"]
+            # Índices dentro del banco y en orden alfabético (la búsqueda binaria lo exige)
+            fuera = matriz.max(axis=1) >= len(seccion.banco)
+            desordenados = (matriz[:, 1:] < matriz[:, :-1]).any(axis=1)
+            invalidos = np.flatnonzero(fuera | desordenados)
+            if len(invalidos):
+                raise ErrorValidacionCarton(
+                    "Registro de cartón corrupto en el mazo binario", self.posicion(numero, int(invalidos[0]))
+                )
+
+            if idioma in bancos_config:
+                banco = bancos_config[idioma]
+                ajenas = np.fromiter((p not in banco for p in seccion.banco), dtype=bool, count=len(seccion.banco))
+                if ajenas.any():
+                    usan_ajenas = np.flatnonzero(ajenas[matriz].any(axis=1))
+                    if len(usan_ajenas):
+                        fila = int(usan_ajenas[0])
+                        palabra = next(seccion.banco[i] for i in matriz[fila].tolist() if ajenas[i])
+                        raise ErrorValidacionCarton(
+                            f"La palabra '{palabra}' no pertenece al idioma {idioma}", self.posicion(numero, fila)
+                        )
+
+    def cartones(
+        self,
+        reglas_dinamicas: Dict,
+        bancos_config: Dict,
+        vocabularios: Optional[Vocabularios] = None
+    ) -> "MazoMatriz":
+        """Valida el mazo y lo copia con los ids de los vocabularios de la carga"""
+        try:
+            self.validar(reglas_dinamicas, bancos_config)
+        except ErrorValidacionCarton as e:
+            print(f"❌ ERROR: {e.mensaje} (cartón {e.linea})")
+            raise
+
+        return self.construir(vocabularios)
+
+    def construir(self, vocabularios: Optional[Vocabularios] = None) -> "MazoMatriz":
+        """Mazo sin validar (mazos escritos por este mismo servidor), sin crear sus cartones"""
+        if vocabularios is None:
+            vocabularios = Vocabularios()
+        # Un bloque por idioma: las secciones de un mismo idioma se concatenan
+        bloques: Dict[str, int] = {}
+        matrices: List[List[np.ndarray]] = []
+        nombres: List[List[np.ndarray]] = []
+        bloque_seccion = np.zeros(len(self.secciones), dtype=np.uint8)
+        filas_seccion = []
+        for numero, seccion in enumerate(self.secciones):
+            bloque = bloques.setdefault(seccion.idioma, len(bloques))
+            if bloque == len(matrices):
+                matrices.append([])
+                nombres.append([])
+            bloque_seccion[numero] = bloque
+            filas_seccion.append(sum(map(len, matrices[bloque])) + np.arange(len(seccion), dtype=np.int64))
+            # Banco del mazo -> ids del vocabulario: una tabla y una indexación por sección (copia fuera del mmap)
+            vocab = vocabularios.de(seccion.idioma)
+            tabla = np.array(vocab.ids_de(seccion.banco), dtype=np.dtype(vocab.tipo))
+            matrices[bloque].append(tabla[np.ascontiguousarray(seccion.registros["palabras"])])
+            nombres[bloque].append(np.array(seccion.registros["id"]))
+
+        vocabs = [vocabularios.de(idioma) for idioma in bloques]
+        # Bloque y fila de cada cartón en el mazo agrupado por sección...
+        bloque = np.repeat(bloque_seccion, [len(s) for s in self.secciones])
+        fila = np.concatenate(filas_seccion) if filas_seccion else np.empty(0, dtype=np.int64)
+        if self.orden is not None:
+            # ...y en el orden del archivo original
+            agrupado = np.empty(len(self.orden), dtype=np.int64)
+            agrupado[np.argsort(self.orden, kind="stable")] = np.arange(len(self.orden))
+            bloque, fila = bloque[agrupado], fila[agrupado]
+        return MazoMatriz(
+            list(bloques), vocabs,
+            [np.concatenate(partes).astype(np.dtype(vocab.tipo), copy=False) for partes, vocab in zip(matrices, vocabs)],
+            [np.concatenate(partes) for partes in nombres],
+            bloque, fila
+        )
+
+
+class MazoMatriz(Sequence):
+    """
+    Mazo de un archivo binario: por idioma, la matriz cartones × palabras con
+    los ids del vocabulario de la carga. Se recorre como una lista de Carton en
+    el orden original, pero cada cartón se crea la primera vez que se pide (y
+    desde entonces es el mismo objeto); reparto, índices y duplicados trabajan
+    sobre las matrices sin crear ninguno.
+    """
+
+    def __init__(
+        self,
+        idiomas: List[str],
+        vocabs: List[Vocabulario],
+        matrices: List[np.ndarray],
+        nombres: List[np.ndarray],
+        bloque: np.ndarray,
+        fila: np.ndarray
+    ):
+        # Un bloque por idioma, en orden de primera aparición en el mazo
+        self.idiomas = idiomas
+        self.vocabs = vocabs
+        self.matrices = matrices
+        self.nombres = nombres
+        # Bloque y fila de cada cartón del mazo
+        self.bloque = bloque
+        self.fila = fila
+        # Aviso al crear un cartón (el motor bitset le asigna su fila)
+        self.al_crear: Optional[Callable[[int, Carton], None]] = None
+        self._cartones: List[Optional[Carton]] = [None] * len(bloque)
+        self._creados: List[int] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cartones)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        carton = self._cartones[i]
+        return carton if carton is not None else self._crear(i)
+
+    def __iter__(self) -> Iterator[Carton]:
+        for i, carton in enumerate(self._cartones):
+            yield carton if carton is not None else self._crear(i)
+
+    def _crear(self, i: int) -> Carton:
+        with self._lock:
+            i = range(len(self._cartones))[i]
+            carton = self._cartones[i]
+            if carton is None:
+                bloque, fila = int(self.bloque[i]), int(self.fila[i])
+                matriz = self.matrices[bloque]
+                carton = Carton.desde_ids(
+                    self.nombres[bloque][fila].decode("utf-8"), self.idiomas[bloque],
+                    array(matriz.dtype.char, matriz[fila].tobytes()), self.vocabs[bloque]
+                )
+                self._cartones[i] = carton
+                self._creados.append(i)
+                if self.al_crear is not None:
+                    self.al_crear(i, carton)
+            return carton
+
+    def creados(self) -> List[Tuple[int, Carton]]:
+        """(posición, cartón) de los cartones ya creados"""
+        with self._lock:
+            return [(i, self._cartones[i]) for i in self._creados]
+
+    def idioma_por_carton(self) -> List[str]:
+        return np.array(self.idiomas, dtype=object)[self.bloque].tolist()
+
+    def totales(self, posiciones: np.ndarray) -> np.ndarray:
+        """Palabras de los cartones en esas posiciones"""
+        tamanos = np.array([matriz.shape[1] for matriz in self.matrices], dtype=np.int64)
+        return tamanos[self.bloque[posiciones]]
+
+
+def _pares(valores):
+    return dict(v.split("=", 1) for v in valores)
+
+
+if __name__ == "__main__":
+    from bancos import RegistroBancos
+    from config import REGLAS_TAMANO
+    from parser_cartones import leer_lineas_por_bloques, parsear_cartones_paralelo
+
+    parser = argparse.ArgumentParser(description="Convierte cartones en TXT a un mazo binario")
+    parser.add_argument("entrada", help="Archivo TXT (formato de /api/cargar-masivo)")
+    parser.add_argument("salida", help="Mazo binario de salida")
+    parser.add_argument("--tamanos", nargs="+", default=[], help="Palabras por cartón, p. ej. SP=24 EN=14")
+    parser.add_argument("--banco", nargs="+", default=[], help="Banco por idioma desde TXT, p. ej. SP=banco_SP.txt")
+    args = parser.parse_args()
+
+    reglas = {
+        k.upper(): {"max_palabras": int(v), "nombre": k.upper()}
+        for k, v in (_pares(args.tamanos) or REGLAS_TAMANO).items()
+    }
+    personalizados = {}
+    for idioma, ruta in _pares(args.banco).items():
+        with open(ruta, encoding="utf-8") as archivo:
+            personalizados[idioma.upper()] = [l.strip().upper() for l in archivo if l.strip()]
+
+    inicio = time.perf_counter()
+    try:
+        with open(args.entrada, "rb") as entrada:
+            cartones = list(parsear_cartones_paralelo(
+                leer_lineas_por_bloques(entrada), reglas, RegistroBancos(personalizados).conjuntos_personalizados()
+            ))
+        with open(args.salida, "wb") as salida:
+            total = escribir_mazo(cartones, salida)
+    except (ErrorValidacionCarton, ValueError) as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"✅ {total} cartones escritos en {args.salida} ({time.perf_counter() - inicio:.1f}s)")
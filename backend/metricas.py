@@ -0,0 +1,173 @@
+# =============================================================================
+# MÉTRICAS EN FORMATO DE TEXTO DE PROMETHEUS (SIN DEPENDENCIAS)
+# =============================================================================
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# Límites (segundos) de los histogramas de latencia
+BUCKETS_SEGUNDOS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: Tuple[str, ...], valores: Tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Contador:
+    """Contador monótono con etiquetas opcionales"""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, cantidad: float = 1, *valores: str):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            valores = list(self._valores.items())
+        if not valores and not self.etiquetas:
+            valores = [((), 0)]
+        for etiquetas, valor in valores:
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {valor}")
+        return lineas
+
+
+class Histograma:
+    """
+    Histograma con límites fijos. Observar solo incrementa el bucket que
+    corresponde (búsqueda binaria); los acumulados se calculan al exponer.
+    """
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (), buckets=BUCKETS_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = tuple(buckets)
+        # etiquetas -> [conteo por bucket (+Inf al final), suma]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *valores: str):
+        posicion = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][posicion] += 1
+            serie[1] += valor
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = [(etiquetas, list(conteos), suma) for etiquetas, (conteos, suma) in self._series.items()]
+        for etiquetas, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="+Inf"' if limite == float("inf") else f'le="{limite!r}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, etiquetas, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {suma}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {acumulado}")
+        return lineas
+
+
+class Fases:
+    """Cronómetro de fases consecutivas: cada `marcar` observa el tiempo desde la anterior"""
+
+    __slots__ = ("histograma", "_inicio")
+
+    def __init__(self, histograma: Histograma):
+        self.histograma = histograma
+        self._inicio = time.perf_counter()
+
+    def marcar(self, fase: str):
+        ahora = time.perf_counter()
+        self.histograma.observar(ahora - self._inicio, fase)
+        self._inicio = ahora
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self.metricas: List = []
+
+    def contador(self, *args, **kwargs) -> Contador:
+        metrica = Contador(*args, **kwargs)
+        self.metricas.append(metrica)
+        return metrica
+
+    def histograma(self, *args, **kwargs) -> Histograma:
+        metrica = Histograma(*args, **kwargs)
+        self.metricas.append(metrica)
+        return metrica
+
+    def exponer(self) -> str:
+        """Texto para /metrics (solo se formatea cuando alguien lo pide)"""
+        lineas = []
+        for metrica in self.metricas:
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+LATENCIA_HTTP = REGISTRO.histograma(
+    "bingo_peticion_duracion_segundos", "Latencia de las peticiones HTTP",
+    ("metodo", "ruta", "estado")
+)
+FASES_CARGA = REGISTRO.histograma(
+    "bingo_carga_fase_duracion_segundos", "Duración de cada fase de la carga masiva", ("fase",)
+)
+FASES_CANTO = REGISTRO.histograma(
+    "bingo_canto_fase_duracion_segundos", "Duración de cada fase al cantar una palabra", ("fase",)
+)
+CARTONES_CARGADOS = REGISTRO.contador("bingo_cartones_cargados_total", "Cartones cargados y validados")
+PALABRAS_CANTADAS = REGISTRO.contador(
+    "bingo_palabras_cantadas_total", "Palabras cantadas válidas", ("idioma",)
+)
+MARCAS_APLICADAS = REGISTRO.contador("bingo_marcas_aplicadas_total", "Marcas aplicadas a cartones")
+
+
+class MedidorHTTP:
+    """
+    Middleware ASGI: latencia de cada petición por método, plantilla de ruta
+    (no la URL, para acotar las series) y código de estado.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        inicio = time.perf_counter()
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+            LATENCIA_HTTP.observar(time.perf_counter() - inicio, scope["method"], ruta, str(estado[0]))
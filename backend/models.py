@@ -2,21 +2,168 @@
 # MODELOS DEL SISTEMA - ESTRATEGIA DAC PRESERVADA
 # =============================================================================
 
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from serializacion import dumps
+
+class Vocabulario:
+    """
+    Tabla de internado palabra <-> id de un idioma (solo crece mientras viva
+    la carga que la creó). Los cartones guardan ids pequeños en lugar de
+    cadenas repetidas.
+    """
+    __slots__ = ("palabras", "ids", "_lock")
+
+    def __init__(self):
+        self.palabras: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tipo(self) -> str:
+        """Typecode de array para los ids: 'H' (uint16) mientras quepan"""
+        return 'H' if len(self.palabras) <= 0x10000 else 'I'
+
+    def id(self, palabra: str) -> int:
+        idx = self.ids.get(palabra)
+        if idx is None:
+            with self._lock:
+                idx = self.ids.get(palabra)
+                if idx is None:
+                    idx = len(self.palabras)
+                    self.palabras.append(sys.intern(palabra))
+                    self.ids[palabra] = idx
+        return idx
+
+    def ids_de(self, palabras: List[str]) -> List[int]:
+        ids = self.ids
+        try:
+            return [ids[p] for p in palabras]
+        except KeyError:
+            return [self.id(p) for p in palabras]
+
+
+class Vocabularios(dict):
+    """
+    Vocabularios por idioma de una carga (un mazo). Cada cartón referencia el
+    suyo: al reemplazar el mazo, sus palabras se liberan con él en lugar de
+    acumularse en una tabla global del proceso.
+    """
+
+    def de(self, idioma: str) -> Vocabulario:
+        vocab = self.get(idioma)
+        if vocab is None:
+            vocab = self.setdefault(idioma, Vocabulario())
+        return vocab
+
+    def unificar(self, cartones: List["Carton"]):
+        """
+        Un solo typecode por idioma en todo el mazo: los cartones creados antes
+        de que su vocabulario pasara de 65536 palabras se ensanchan a 'I'
+        (duplicados compara los ids como bytes).
+        """
+        if all(vocab.tipo == 'H' for vocab in self.values()):
+            return
+        for carton in cartones:
+            tipo = carton.vocab.tipo
+            if carton._ids.typecode != tipo:
+                carton._ids = array(tipo, carton._ids)
+
+
 class Carton:
     """
     Clase Carton con estrategia Divide y Conquista.
     - Búsqueda Binaria O(log n)
+    Representación compacta: sin __dict__, palabras como ids del vocabulario
+    del idioma en su carga (array 'H' = uint16) en orden alfabético y marcas
+    como máscara de bits (bit k = palabra k marcada).
+    Sin `vocabularios`, el cartón suelto usa uno propio.
     """
+    __slots__ = ("id", "idioma", "vocab", "_ids", "marcas", "motor", "fila", "_json", "_json_marcas")
+
     # Autoría Propia: Jaren Pazmiño
-    def __init__(self, id_carton, idioma, palabras):
+    def __init__(self, id_carton, idioma, palabras, vocabularios: Optional[Vocabularios] = None):
         self.id = id_carton.upper()
-        self.idioma = idioma.upper()
+        self.idioma = sys.intern(idioma.upper())
         # Ordenamos las palabras para Búsqueda Binaria
-        self.palabras = sorted([p.upper() for p in palabras]) 
+        vocab = (Vocabularios() if vocabularios is None else vocabularios).de(self.idioma)
+        ids = [vocab.id(p) for p in sorted([p.upper() for p in palabras])]
+        self.vocab = vocab
+        self._ids = array(vocab.tipo, ids)
+        self.marcas = 0
         
-        self.total_palabras = len(self.palabras)
-        self.aciertos = 0
-        self.palabras_marcadas = set() 
+        # Motor bitset opcional: si está asignado, las marcas viven en su matriz
+        self.motor = None
+        self.fila = -1
+        # JSON en caché: parte estática y parte de marcas (se recodifica solo si cambian)
+        self._json = None
+        self._json_marcas = None
+
+    @classmethod
+    def desde_ordenadas(
+        cls, id_carton: str, idioma: str, palabras: List[str], vocabularios: Vocabularios
+    ) -> "Carton":
+        """Construcción rápida con id, idioma y palabras ya normalizados y ordenados (snapshots)"""
+        carton = cls.__new__(cls)
+        carton.id = id_carton
+        carton.idioma = sys.intern(idioma)
+        vocab = vocabularios.de(carton.idioma)
+        carton.vocab = vocab
+        carton._ids = array(vocab.tipo, vocab.ids_de(palabras))
+        carton.marcas = 0
+        carton.motor = None
+        carton.fila = -1
+        carton._json = None
+        carton._json_marcas = None
+        return carton
+
+    @classmethod
+    def desde_ids(cls, id_carton: str, idioma: str, ids: array, vocab: Vocabulario) -> "Carton":
+        """Construcción directa con ids de `vocab` ya en orden alfabético (mazos binarios)"""
+        carton = cls.__new__(cls)
+        carton.id = id_carton
+        carton.idioma = sys.intern(idioma)
+        carton.vocab = vocab
+        carton._ids = ids
+        carton.marcas = 0
+        carton.motor = None
+        carton.fila = -1
+        carton._json = None
+        carton._json_marcas = None
+        return carton
+
+    @property
+    def palabras(self) -> List[str]:
+        lista = self.vocab.palabras
+        return [lista[i] for i in self._ids]
+
+    @property
+    def total_palabras(self) -> int:
+        return len(self._ids)
+
+    @property
+    def aciertos(self) -> int:
+        if self.motor is not None:
+            return self.motor.aciertos(self)
+        return self.marcas.bit_count()
+
+    @property
+    def palabras_marcadas(self) -> set:
+        if self.motor is not None:
+            return self.motor.palabras_marcadas(self)
+        palabras = self.palabras
+        return {palabras[k] for k in range(len(palabras)) if self.marcas >> k & 1}
+
+    @palabras_marcadas.setter
+    def palabras_marcadas(self, valor):
+        self.marcas = 0
+        for palabra in valor:
+            posicion = self.posicion(palabra)
+            if posicion >= 0:
+                self.marcas |= 1 << posicion
 
     # Autoría Propia: Jaren Pazmiño
     def get_idioma(self):
@@ -24,59 +171,108 @@ class Carton:
 
     # Algoritmo de Búsqueda Binaria tomado de:
     # [1] T. H. Cormen, C. E. Leiserson, R. L. Rivest, and C. Stein, Introduction to Algorithms, 4th ed. Cambridge, MA, USA: MIT Press, 2022.
-    def busqueda_binaria(self, objetivo):
+    def posicion(self, objetivo):
         """
         DAC: Divide el espacio de búsqueda en mitades. Complejidad: O(log n).
+        Retorna la posición de la palabra en el cartón o -1.
         """
+        lista = self.vocab.palabras
+        ids = self._ids
         izquierda = 0
-        derecha = len(self.palabras) - 1
+        derecha = len(ids) - 1
 
         while izquierda <= derecha:
             medio = (izquierda + derecha) // 2
-            palabra_medio = self.palabras[medio]
+            palabra_medio = lista[ids[medio]]
 
             if palabra_medio == objetivo:
-                return True 
+                # Con palabras repetidas se usa siempre la primera aparición
+                while medio > 0 and lista[ids[medio - 1]] == objetivo:
+                    medio -= 1
+                return medio
             elif palabra_medio < objetivo:
                 izquierda = medio + 1 
             else:
                 derecha = medio - 1 
-        return False 
+        return -1
+
+    def busqueda_binaria(self, objetivo):
+        return self.posicion(objetivo) >= 0
 
     # Autoría Propia: Jaren Pazmiño
     def marcar(self, palabra_cantada):
         palabra_cantada = palabra_cantada.upper()
         
-        # Evitar re-procesamiento si ya se marcó
-        if palabra_cantada in self.palabras_marcadas:
+        # Aplicamos la Búsqueda Binaria
+        posicion = self.posicion(palabra_cantada)
+        if posicion < 0:
             return False
 
-        # Aplicamos la Búsqueda Binaria
-        if self.busqueda_binaria(palabra_cantada):
-            self.palabras_marcadas.add(palabra_cantada)
-            self.aciertos += 1
-            return True
-        return False
+        # Evitar re-procesamiento si ya se marcó
+        bit = 1 << posicion
+        if self.marcas & bit:
+            return False
+        self.marcas |= bit
+        return True
 
     # Autoría Propia: Jaren Pazmiño
     def es_ganador(self):
         return self.aciertos == self.total_palabras and self.total_palabras > 0
 
     def to_dict(self):
+        aciertos = self.aciertos
         return {
             "id": self.id,
             "idioma": self.idioma,
             "palabras": self.palabras,
-            "palabras_marcadas": list(self.palabras_marcadas),
-            "aciertos": self.aciertos,
+            "palabras_marcadas": sorted(self.palabras_marcadas),
+            "aciertos": aciertos,
             "total_palabras": self.total_palabras,
-            "es_ganador": self.aciertos == self.total_palabras
+            "es_ganador": aciertos == self.total_palabras
         }
 
+    def to_json(self) -> bytes:
+        """
+        to_dict ya serializado. La parte estática (id, idioma, palabras) se
+        codifica una sola vez; la de marcas solo cuando cambian las marcas.
+        """
+        if self._json is None:
+            self._json = dumps({"id": self.id, "idioma": self.idioma, "palabras": self.palabras})[:-1]
+        aciertos = self.aciertos
+        clave = (self.marcas, aciertos)
+        if self._json_marcas is None or self._json_marcas[0] != clave:
+            self._json_marcas = (clave, b"," + dumps({
+                "palabras_marcadas": sorted(self.palabras_marcadas),
+                "aciertos": aciertos,
+                "total_palabras": self.total_palabras,
+                "es_ganador": aciertos == self.total_palabras
+            })[1:])
+        return self._json + self._json_marcas[1]
+
+    def proyeccion(self, campos) -> Dict:
+        """Solo los campos pedidos de to_dict (las listas de palabras se omiten si no se piden)"""
+        return {campo: CAMPOS_CARTON[campo](self) for campo in campos}
+
 
 # Autoría Propia: Darwin Pacheco
+# Campos proyectables de un cartón (mismos nombres que to_dict)
+CAMPOS_CARTON = {
+    "id": lambda c: c.id,
+    "idioma": lambda c: c.idioma,
+    "palabras": lambda c: c.palabras,
+    "palabras_marcadas": lambda c: sorted(c.palabras_marcadas),
+    "aciertos": lambda c: c.aciertos,
+    "total_palabras": lambda c: c.total_palabras,
+    "es_ganador": lambda c: c.aciertos == c.total_palabras
+}
+
+
 class Jugador:
-    def __init__(self, nombre, cartones):
+    """
+    `cartones` es de solo lectura y nunca se modifica en su lugar: una vista
+    sobre el tramo del jugador en el reparto (reparto.CartonesAsignados).
+    """
+    def __init__(self, nombre: str, cartones: Sequence[Carton]):
         self.nombre = nombre
         self.cartones = cartones
 
@@ -85,3 +281,15 @@ class Jugador:
             "nombre": self.nombre,
             "cartones": [c.to_dict() for c in self.cartones]
         }
+
+    def to_json(self, cartones=None, campos=None) -> bytes:
+        """
+        to_dict serializado. `cartones` restringe los cartones incluidos (filtros)
+        y `campos` los proyecta; sin proyección se usa el JSON en caché de cada cartón.
+        """
+        cartones = self.cartones if cartones is None else cartones
+        if campos is None:
+            cuerpo = b",".join(c.to_json() for c in cartones)
+        else:
+            cuerpo = dumps([c.proyeccion(campos) for c in cartones])[1:-1]
+        return b'{"nombre":' + dumps(self.nombre) + b',"cartones":[' + cuerpo + b"]}"
@@ -0,0 +1,167 @@
+# =============================================================================
+# MOTOR DE MARCADO VECTORIZADO (BITSET)
+# =============================================================================
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Carton, Jugador
+
+# Memoria de la matriz booleana temporal al construir una MatrizIdioma
+MATRIZ_TRAMO_BYTES = 1 << 22
+
+
+def ids_concatenados(cartones: List[Carton]) -> np.ndarray:
+    """Ids de vocabulario de todos los cartones en un solo vector (sin copiar cartón a cartón)"""
+    if all(c._ids.typecode == 'H' for c in cartones):
+        return np.frombuffer(b"".join(c._ids for c in cartones), dtype=np.uint16).astype(np.int64)
+    return np.concatenate(
+        [np.frombuffer(c._ids, dtype=c._ids.typecode) for c in cartones] or [np.empty(0)]
+    ).astype(np.int64)
+
+
+class MatrizIdioma:
+    """
+    Matriz de bits cartones × vocabulario para un idioma.
+    Cada palabra del vocabulario es una fila empaquetada (un bit por cartón),
+    así marcar una palabra es una sola operación sobre esa columna lógica.
+    La fila f de la matriz es la asignación `numeros[f]` del juego.
+    """
+
+    def __init__(
+        self,
+        idioma: str,
+        asignaciones: Sequence[Tuple[Jugador, Carton]],
+        numeros: np.ndarray,
+        ids: np.ndarray,
+        longitudes: np.ndarray,
+        palabras_carga: List[str],
+        vocabulario: Optional[Dict[str, int]] = None
+    ):
+        self.idioma = idioma
+        self.asignaciones = asignaciones
+        self.numeros = numeros.tolist()
+        self.n_cartones = len(self.numeros)
+
+        # Vocabulario: ids del banco compilado si se conoce, si no el de los propios cartones
+        presentes = np.flatnonzero(np.bincount(ids, minlength=len(palabras_carga))) if len(ids) else np.empty(0, dtype=np.int64)
+        if vocabulario is None:
+            palabras = sorted(palabras_carga[i] for i in presentes)
+            vocabulario = {p: i for i, p in enumerate(palabras)}
+        self.vocabulario: Dict[str, int] = vocabulario
+        self.cantadas = np.zeros(len(vocabulario), dtype=bool)
+
+        # Palabras restantes por cartón (los repetidos cuentan, como en Carton)
+        self.longitudes = longitudes.astype(np.int32)
+        self.restantes = self.longitudes.copy()
+
+        # Traducción id de la carga -> fila de la matriz
+        traduccion = np.zeros(len(palabras_carga), dtype=np.int32)
+        traduccion[presentes] = [vocabulario[palabras_carga[i]] for i in presentes]
+        filas = traduccion[ids]
+
+        bytes_por_palabra = (self.n_cartones + 7) // 8
+        self.bits = np.zeros((len(vocabulario), bytes_por_palabra), dtype=np.uint8)
+        # Por tramos de cartones (múltiplos de 8): una matriz booleana palabras × cartones
+        # de MATRIZ_TRAMO_BYTES, reutilizada (cabe en caché), empaquetada con packbits.
+        # Asignar True es idempotente: las palabras repetidas en un cartón no alteran el bit
+        tramo = max(8, MATRIZ_TRAMO_BYTES // max(1, len(vocabulario)) // 8 * 8)
+        limites = np.zeros(self.n_cartones + 1, dtype=np.int64)
+        np.cumsum(longitudes, out=limites[1:])
+        presencia = np.empty((len(vocabulario), min(tramo, self.n_cartones)), dtype=bool)
+        for inicio in range(0, self.n_cartones, tramo):
+            fin = min(inicio + tramo, self.n_cartones)
+            desde, hasta = limites[inicio], limites[fin]
+            bloque = presencia[:, :fin - inicio]
+            bloque[...] = False
+            columnas = np.repeat(np.arange(fin - inicio, dtype=np.int32), longitudes[inicio:fin])
+            bloque[filas[desde:hasta], columnas] = True
+            self.bits[:, inicio // 8:(fin + 7) // 8] = np.packbits(bloque, axis=1)
+
+    def par(self, fila: int) -> Tuple[Jugador, Carton]:
+        """(jugador, carton) de una fila (con un mazo binario, el cartón se crea aquí si hace falta)"""
+        return self.asignaciones[self.numeros[fila]]
+
+    def columna(self, palabra: str) -> np.ndarray:
+        """Vector booleano de cartones que contienen la palabra"""
+        idx = self.vocabulario.get(palabra)
+        if idx is None:
+            return np.zeros(self.n_cartones, dtype=bool)
+        return np.unpackbits(self.bits[idx], count=self.n_cartones).view(bool)
+
+    def marcar(self, palabra: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Marca la palabra en todos los cartones del idioma.
+        Retorna (filas_marcadas, filas_ganadoras).
+        """
+        idx = self.vocabulario.get(palabra)
+        if idx is None or self.cantadas[idx]:
+            vacio = np.empty(0, dtype=np.int64)
+            return vacio, vacio
+
+        self.cantadas[idx] = True
+        mascara = self.columna(palabra)
+        self.restantes -= mascara
+        ganadores = np.flatnonzero(mascara & (self.restantes == 0))
+        return np.flatnonzero(mascara), ganadores
+
+    def palabras_marcadas(self, carton: Carton) -> set:
+        return {p for p in carton.palabras if self.cantadas[self.vocabulario[p]]}
+
+    def aciertos(self, carton: Carton) -> int:
+        return carton.total_palabras - int(self.restantes[carton.fila])
+
+
+class FilasMarcadas:
+    """Vista perezosa de las filas marcadas: solo crea tuplas (jugador, carton) si se recorre"""
+
+    def __init__(self, matriz: Optional[MatrizIdioma], filas: np.ndarray):
+        self.matriz = matriz
+        self.filas = filas
+
+    def __len__(self) -> int:
+        return len(self.filas)
+
+    def __iter__(self):
+        for f in self.filas.tolist():
+            yield self.matriz.par(f)
+
+
+class MotorBitset:
+    """
+    Motor de marcado alternativo: una MatrizIdioma por idioma cargado.
+    Las matrices se construyen desde los ids de las asignaciones; cada cartón
+    apunta a su matriz y su fila en cuanto existe (al construir el motor o,
+    con un mazo binario, al crearse).
+    """
+
+    def __init__(self, asignaciones, vocabularios: Optional[Dict[str, Dict[str, int]]] = None):
+        self.matrices: Dict[str, MatrizIdioma] = {}
+        # Matriz y fila de cada número de asignación
+        self._matriz = np.zeros(len(asignaciones), dtype=np.int64)
+        self._fila = np.zeros(len(asignaciones), dtype=np.int64)
+        for idioma, numeros, ids, longitudes, palabras in asignaciones.por_idioma():
+            self._matriz[numeros] = len(self.matrices)
+            self._fila[numeros] = np.arange(len(numeros))
+            self.matrices[idioma] = MatrizIdioma(
+                idioma, asignaciones, numeros, ids, longitudes, palabras, (vocabularios or {}).get(idioma)
+            )
+        self._lista = list(self.matrices.values())
+
+        for numero, carton in asignaciones.creados():
+            self._enlazar(numero, carton)
+        asignaciones.al_crear(self._enlazar)
+
+    def _enlazar(self, numero: int, carton: Carton):
+        carton.motor = self._lista[self._matriz[numero]]
+        carton.fila = int(self._fila[numero])
+
+    def marcar(self, idioma: str, palabra: str) -> Tuple[FilasMarcadas, List[Tuple[Jugador, Carton]]]:
+        """Marca una palabra y retorna (marcados, [(jugador, carton) ganadores])"""
+        matriz = self.matrices.get(idioma)
+        if matriz is None:
+            return FilasMarcadas(None, np.empty(0, dtype=np.int64)), []
+
+        marcados, filas = matriz.marcar(palabra)
+        return FilasMarcadas(matriz, marcados), [matriz.par(f) for f in filas.tolist()]
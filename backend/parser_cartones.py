@@ -0,0 +1,219 @@
+# =============================================================================
+# PARSER EN STREAMING DE CARTONES (FORMATO: ID palabra1 palabra2 ...)
+# =============================================================================
+
+import codecs
+import itertools
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import Carton, Vocabularios
+from config import VALIDACION_PARALELA_MIN_LINEAS, LINEAS_POR_FRAGMENTO, PROCESOS_VALIDACION
+
+TAMANO_BLOQUE = 64 * 1024
+PATRON_ID = re.compile(r'^([A-Z]{2})\d+')
+
+
+class ErrorValidacionCarton(Exception):
+    """Error de validación con el número de línea que lo produjo"""
+
+    def __init__(self, mensaje: str, linea: int):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.linea = linea
+
+
+def leer_lineas_por_bloques(archivo: BinaryIO, tam_bloque: int = TAMANO_BLOQUE) -> Iterator[str]:
+    """
+    Lee un archivo binario por bloques y produce sus líneas decodificadas en UTF-8.
+    Solo se mantiene en memoria un bloque más la línea incompleta en curso.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    pendiente = ""
+    while True:
+        bloque = archivo.read(tam_bloque)
+        if not bloque:
+            break
+        pendiente += decodificador.decode(bloque)
+        lineas = pendiente.split('\n')
+        pendiente = lineas.pop()
+        yield from lineas
+    pendiente += decodificador.decode(b"", final=True)
+    if pendiente:
+        yield pendiente
+
+
+def _validar_partes(linea: str, linea_num: int, reglas_dinamicas: Dict, bancos_config: Dict) -> Optional[Tuple[str, str, List[str]]]:
+    """
+    Valida una línea y retorna (id, idioma, palabras) sin construir el Carton.
+    Retorna None para líneas vacías o comentarios; lanza ErrorValidacionCarton si es inválida.
+    """
+    linea = linea.strip()
+    if not linea or linea.startswith('#'):
+        return None
+
+    partes = linea.split()
+    if len(partes) < 2:
+        raise ErrorValidacionCarton(f"Formato inválido en línea {linea_num}", linea_num)
+
+    carton_id = partes[0].strip()
+    match = PATRON_ID.match(carton_id)
+    if not match:
+        raise ErrorValidacionCarton(f"Formato de ID inválido en línea {linea_num}", linea_num)
+    idioma = match.group(1).upper()
+    palabras = [p.strip().upper() for p in partes[1:]]
+
+    if idioma not in reglas_dinamicas:
+        raise ErrorValidacionCarton(f"Idioma '{idioma}' no está configurado", linea_num)
+
+    esperadas = reglas_dinamicas[idioma]['max_palabras']
+    if len(palabras) != esperadas:
+        raise ErrorValidacionCarton(f"El cartón requiere exactamente {esperadas} palabras", linea_num)
+
+    if idioma in bancos_config:
+        banco = bancos_config[idioma]
+        for palabra in palabras:
+            if palabra not in banco:
+                raise ErrorValidacionCarton(f"La palabra '{palabra}' no pertenece al idioma {idioma}", linea_num)
+
+    return carton_id, idioma, palabras
+
+
+def validar_linea(
+    linea: str,
+    linea_num: int,
+    reglas_dinamicas: Dict,
+    bancos_config: Dict,
+    vocabularios: Optional[Vocabularios] = None
+) -> Optional[Carton]:
+    """
+    Valida una línea del archivo y construye su Carton (con los vocabularios de la carga).
+    Retorna None para líneas vacías o comentarios; lanza ErrorValidacionCarton si es inválida.
+    """
+    try:
+        partes = _validar_partes(linea, linea_num, reglas_dinamicas, bancos_config)
+    except ErrorValidacionCarton as e:
+        print(f"❌ ERROR: {e.mensaje} (línea {e.linea})")
+        raise
+    if partes is None:
+        return None
+    return Carton(*partes, vocabularios)
+
+
+def parsear_cartones(
+    lineas: Iterable[str],
+    reglas_dinamicas: Dict,
+    bancos_config: Dict,
+    vocabularios: Optional[Vocabularios] = None
+) -> Iterator[Carton]:
+    """
+    Generador que valida línea a línea y produce los cartones en orden.
+    Todos comparten `vocabularios` (uno nuevo por llamada si no se indica).
+    """
+    if vocabularios is None:
+        vocabularios = Vocabularios()
+    for linea_num, linea in enumerate(lineas, start=1):
+        carton = validar_linea(linea, linea_num, reglas_dinamicas, bancos_config, vocabularios)
+        if carton is not None:
+            yield carton
+
+
+# -----------------------------------------------------------------------------
+# Validación paralela por fragmentos de líneas (pool de procesos)
+# -----------------------------------------------------------------------------
+
+_reglas_trabajador: Dict = {}
+_bancos_trabajador: Dict = {}
+
+
+def _inicializar_trabajador(reglas_dinamicas: Dict, bancos_config: Dict):
+    """Las reglas y bancos compilados se envían una sola vez a cada proceso"""
+    global _reglas_trabajador, _bancos_trabajador
+    _reglas_trabajador = reglas_dinamicas
+    _bancos_trabajador = bancos_config
+
+
+def _validar_fragmento(primera_linea: int, lineas: List[str]):
+    """
+    Valida un fragmento en un proceso trabajador.
+    Retorna ("ok", [(id, idioma, "PALABRA1 PALABRA2 ..."), ...]) o ("error", mensaje, linea)
+    con el primer fallo. Las palabras viajan como un solo texto para abaratar la serialización.
+    """
+    validos = []
+    for linea_num, linea in enumerate(lineas, start=primera_linea):
+        try:
+            partes = _validar_partes(linea, linea_num, _reglas_trabajador, _bancos_trabajador)
+        except ErrorValidacionCarton as e:
+            return "error", e.mensaje, e.linea
+        if partes is not None:
+            carton_id, idioma, palabras = partes
+            validos.append((carton_id, idioma, " ".join(palabras)))
+    return "ok", validos
+
+
+def parsear_cartones_paralelo(
+    lineas: Iterable[str],
+    reglas_dinamicas: Dict,
+    bancos_config: Dict,
+    procesos: Optional[int] = PROCESOS_VALIDACION,
+    lineas_por_fragmento: int = LINEAS_POR_FRAGMENTO,
+    min_lineas: int = VALIDACION_PARALELA_MIN_LINEAS,
+    vocabularios: Optional[Vocabularios] = None
+) -> Iterator[Carton]:
+    """
+    Igual que parsear_cartones, pero si la entrada supera `min_lineas` la valida
+    en fragmentos repartidos en un pool de procesos. Los cartones se producen en
+    el orden original y el error reportado es siempre la primera línea inválida.
+    Se mantienen como máximo 2 fragmentos en vuelo por proceso (memoria acotada).
+    """
+    lineas = iter(lineas)
+    procesos = procesos or os.cpu_count() or 1
+    if vocabularios is None:
+        vocabularios = Vocabularios()
+    inicial = list(itertools.islice(lineas, min_lineas))
+
+    if len(inicial) < min_lineas or procesos <= 1:
+        yield from parsear_cartones(itertools.chain(inicial, lineas), reglas_dinamicas, bancos_config, vocabularios)
+        return
+
+    def fragmentos():
+        todas = itertools.chain(inicial, lineas)
+        primera = 1
+        while True:
+            fragmento = list(itertools.islice(todas, lineas_por_fragmento))
+            if not fragmento:
+                return
+            yield primera, fragmento
+            primera += len(fragmento)
+
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=contexto,
+        initializer=_inicializar_trabajador,
+        initargs=(reglas_dinamicas, bancos_config)
+    ) as pool:
+        pendientes = deque()
+        origen = fragmentos()
+        for primera, fragmento in itertools.islice(origen, 2 * procesos):
+            pendientes.append(pool.submit(_validar_fragmento, primera, fragmento))
+
+        while pendientes:
+            resultado = pendientes.popleft().result()
+            if resultado[0] == "error":
+                for futuro in pendientes:
+                    futuro.cancel()
+                _, mensaje, linea_num = resultado
+                print(f"❌ ERROR: {mensaje} (línea {linea_num})")
+                raise ErrorValidacionCarton(mensaje, linea_num)
+
+            siguiente = next(origen, None)
+            if siguiente is not None:
+                pendientes.append(pool.submit(_validar_fragmento, *siguiente))
+
+            for carton_id, idioma, palabras in resultado[1]:
+                yield Carton(carton_id, idioma, palabras.split(), vocabularios)
@@ -0,0 +1,422 @@
+# =============================================================================
+# SNAPSHOTS PERSISTENTES DE LAS SALAS (SQLITE EN MODO WAL)
+# =============================================================================
+
+import gc
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_manager import GameManager
+from models import Carton, Jugador, Vocabularios
+from reparto import PlanReparto, plan_por_duenos
+from salas import RegistroSalas
+from config import SNAPSHOT_INTERVALO_SEG
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS salas (
+    sala TEXT PRIMARY KEY,
+    config TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    actualizada REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cartones (
+    sala TEXT NOT NULL,
+    fila INTEGER NOT NULL,
+    jugador INTEGER NOT NULL,
+    carton_id TEXT NOT NULL,
+    idioma TEXT NOT NULL,
+    palabras TEXT NOT NULL,
+    PRIMARY KEY (sala, fila)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS marcas (
+    sala TEXT NOT NULL,
+    orden INTEGER NOT NULL,
+    idioma TEXT NOT NULL,
+    palabra TEXT NOT NULL,
+    PRIMARY KEY (sala, orden)
+) WITHOUT ROWID;
+"""
+
+
+def config_juego(juego: GameManager) -> Dict:
+    """
+    Parte que solo cambia con una carga: jugadores, reglas, bancos, motor y el
+    reparto (semilla, regla, cuotas y huella del plan) para poder repetirlo.
+    """
+    plan = juego.reparto
+    return {
+        "jugadores": [j.nombre for j in juego.jugadores],
+        "reglas": juego.reglas_personalizadas,
+        "bancos": juego.bancos_personalizados,
+        "motor": juego.motor,
+        "nivel_traza": juego.nivel_traza,
+        "semilla": juego.semilla if plan is not None else None,
+        "regla": juego.regla_reparto if plan is not None else None,
+        "cuotas": juego.cuotas if plan is not None else None,
+        "huella": plan.huella() if plan is not None else None
+    }
+
+
+def mazo_snapshot(
+    jugadores: List[Jugador], mazo: Sequence[Carton], plan: Optional[PlanReparto]
+) -> Tuple[Sequence[Carton], List[int]]:
+    """
+    Cartones a guardar y el jugador de cada uno. Con plan es el mazo completo
+    en orden de entrada (-1: sin repartir), sin plan (demo) los cartones de los
+    jugadores en orden de reparto.
+    """
+    if plan is None:
+        cartones = [carton for jugador in jugadores for carton in jugador.cartones]
+        duenos = [n for n, jugador in enumerate(jugadores) for _ in range(len(jugador.cartones))]
+        return cartones, duenos
+    duenos = np.full(len(mazo), -1, dtype=np.int64)
+    duenos[plan.orden] = np.repeat(np.arange(len(plan), dtype=np.int64), np.diff(plan.limites))
+    return mazo, duenos.tolist()
+
+
+def _jugadores_snapshot(
+    juego: GameManager, mazo: List[Carton], duenos: Optional[List[int]], config: Dict
+) -> List[Jugador]:
+    """
+    Con huella se repite el reparto con la semilla sobre el mazo completo (el
+    juego queda con su mazo y su plan, como tras la carga); si no coincide o no
+    hay huella, cada cartón vuelve a su jugador guardado.
+    """
+    if config.get("huella") is not None:
+        juego.sembrar(config["semilla"])
+        exito, _ = juego.repartir(
+            mazo, len(config["jugadores"]), config["regla"], config["reglas"],
+            config["jugadores"], config["cuotas"]
+        )
+        if exito and juego.reparto.huella() == config["huella"]:
+            return juego.jugadores
+        if duenos is None:
+            raise ValueError(f"El reparto no se reproduce con la semilla {config['semilla']}")
+        print(f"⚠️ El reparto no se reproduce con la semilla {config['semilla']}: se usan los jugadores guardados")
+        juego.reparto = None
+    return plan_por_duenos(config["jugadores"], duenos).jugadores(mazo)
+
+
+def juego_desde_snapshot(
+    mazo: List[Carton],
+    duenos: Optional[List[int]],
+    config: Dict,
+    estado: Dict,
+    marcas: List[Tuple[str, str]]
+) -> GameManager:
+    """
+    GameManager con la configuración, el estado y las marcas (idioma, palabra)
+    de un snapshot. `duenos` es el jugador de cada cartón de `mazo`; puede
+    faltar si el snapshot trae la huella del reparto.
+    """
+    juego = GameManager()
+    juego.motor = config["motor"]
+    juego.nivel_traza = config["nivel_traza"]
+    juego.reglas_personalizadas = config["reglas"]
+    juego.bancos_personalizados = config["bancos"]
+    jugadores = _jugadores_snapshot(juego, mazo, duenos, config)
+    juego.orden_idiomas = estado["orden_idiomas"]
+    juego.idioma_actual_idx = estado["idioma_actual_idx"]
+    juego.juego_activo = estado["juego_activo"]
+    juego.palabras_cantadas = [
+        {"idioma": idioma, "palabra": palabra}
+        for idioma, palabra in marcas[estado["cantadas_desde"]:]
+    ]
+    juego.restaurar(jugadores, marcas, estado["version"])
+    return juego
+
+
+def base_juego(juego: GameManager) -> Tuple[Dict, Sequence[Carton]]:
+    """
+    Estado completo de una sala (para juego_desde_snapshot) y los cartones que
+    lo acompañan: generaciones del estado compartido y puntos de restauración
+    de la bitácora.
+    """
+    cartones, duenos = mazo_snapshot(juego.jugadores, juego.mazo, juego.reparto)
+    # Palabras marcadas en cualquier orden (marcar es idempotente) y al final las del juego en curso
+    marcadas = sorted(juego.palabras_marcadas())
+    cantadas = [(c["idioma"], c["palabra"]) for c in juego.palabras_cantadas]
+    return {
+        "config": config_juego(juego),
+        # Con plan el reparto se repite con la semilla: los dueños solo hacen falta sin él (demo)
+        "duenos": None if juego.reparto is not None else duenos,
+        "estado": {
+            "orden_idiomas": juego.orden_idiomas,
+            "idioma_actual_idx": juego.idioma_actual_idx,
+            "juego_activo": juego.juego_activo,
+            "cantadas_desde": len(marcadas),
+            "version": juego.version
+        },
+        "marcas": marcadas + cantadas
+    }, cartones
+
+
+def _filas_cartones(sala_id: str, cartones: Sequence[Carton], duenos: List[int]) -> Iterator[Tuple]:
+    """Cartones como texto (palabras, no ids internos) con su jugador, en el orden de mazo_snapshot"""
+    for fila, (carton, dueno) in enumerate(zip(cartones, duenos)):
+        yield sala_id, fila, dueno, carton.id, carton.idioma, " ".join(carton.palabras)
+
+
+class Persistencia:
+    """
+    Guarda snapshots de las salas en SQLite (WAL). Los cartones se escriben
+    una sola vez por carga; cada canto solo añade una fila a `marcas` y
+    reescribe el pequeño estado de la sala, así el costo es proporcional al
+    cambio y no al número de cartones. Las marcas se reconstruyen al restaurar
+    volviendo a aplicar las palabras en orden. Se guarda el mazo completo con la
+    semilla y la huella del reparto: la sala restaurada repite el mismo reparto
+    y se puede volver a repartir o reproducir como tras la carga.
+
+    Las operaciones se encolan desde las peticiones y un hilo escritor las
+    agrupa en una transacción cada `intervalo` segundos.
+
+    Con varios workers (estado_compartido.py) cada operación lleva la
+    generación de la carga: una operación de una carga anterior que llega
+    tarde desde otro proceso no pisa el snapshot de una carga más nueva.
+    """
+
+    def __init__(self, ruta: str, intervalo: float = SNAPSHOT_INTERVALO_SEG):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._cola: "queue.Queue" = queue.Queue()
+        # Marcas escritas por sala: posición de la siguiente fila de `marcas`
+        self._marcas: Dict[str, int] = {}
+        # Generación de la carga de cada sala (0 con un solo proceso)
+        self._generaciones: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        # Aviso por cada sala restaurada (la bitácora anota un punto de restauración)
+        self.al_restaurar: Optional[Callable[[str, GameManager], None]] = None
+        with self._conectar() as conexion:
+            conexion.executescript(ESQUEMA)
+        self._hilo = threading.Thread(target=self._escribir, name="snapshots", daemon=True)
+        self._hilo.start()
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        return conexion
+
+    # -------------------------------------------------------------------------
+    # Cambios (se llaman desde las peticiones)
+    # -------------------------------------------------------------------------
+
+    def _estado(self, sala_id: str, juego: GameManager) -> str:
+        # Las palabras cantadas son las últimas marcas: basta con guardar desde dónde
+        return json.dumps({
+            "orden_idiomas": juego.orden_idiomas,
+            "idioma_actual_idx": juego.idioma_actual_idx,
+            "juego_activo": juego.juego_activo,
+            "cantadas_desde": self._marcas.get(sala_id, 0) - len(juego.palabras_cantadas),
+            "version": juego.version,
+            "generacion": self._generaciones.get(sala_id, 0)
+        })
+
+    def fijar_posicion(self, sala_id: str, marcas: int, generacion: int):
+        """Marcas ya guardadas y generación de la sala según el estado compartido"""
+        with self._lock:
+            self._marcas[sala_id] = marcas
+            self._generaciones[sala_id] = generacion
+
+    def guardar_completo(self, sala_id: str, juego: GameManager, marcas: List[Tuple[str, str]] = ()):
+        """Snapshot completo tras una carga (o la demo): reemplaza cartones y marcas"""
+        with self._lock:
+            self._marcas[sala_id] = len(marcas)
+            estado = self._estado(sala_id, juego)
+            # Cada carga crea jugadores y mazo nuevos: basta con copiar la lista, no los cartones
+            self._cola.put((
+                "completo", sala_id, self._generaciones.get(sala_id, 0),
+                (list(juego.jugadores), juego.mazo, juego.reparto),
+                json.dumps(config_juego(juego)), list(marcas), estado
+            ))
+
+    def registrar_canto(self, sala_id: str, juego: GameManager, cantidad: int = 1):
+        """Añade las últimas `cantidad` palabras cantadas y el estado de la sala"""
+        cantadas = juego.palabras_cantadas[-cantidad:] if cantidad > 0 else []
+        if not cantadas:
+            return
+        with self._lock:
+            orden = self._marcas.get(sala_id, 0)
+            self._marcas[sala_id] = orden + len(cantadas)
+            estado = self._estado(sala_id, juego)
+            self._cola.put((
+                "canto", sala_id, self._generaciones.get(sala_id, 0),
+                orden, [(c["idioma"], c["palabra"]) for c in cantadas], estado
+            ))
+
+    def guardar_estado(self, sala_id: str, juego: GameManager):
+        """Solo el estado de la sala (inicio de juego, cambio de idioma)"""
+        with self._lock:
+            self._cola.put(("estado", sala_id, self._generaciones.get(sala_id, 0), self._estado(sala_id, juego)))
+
+    def borrar(self, sala_id: str):
+        with self._lock:
+            self._marcas.pop(sala_id, None)
+            self._cola.put(("borrar", sala_id, self._generaciones.pop(sala_id, 0)))
+
+    def sincronizar(self):
+        """Bloquea hasta que todas las operaciones encoladas estén escritas"""
+        self._cola.join()
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo escritor"""
+        if self._hilo.is_alive():
+            self._parar.set()
+            self._cola.put(None)
+            self._hilo.join()
+
+    # -------------------------------------------------------------------------
+    # Hilo escritor
+    # -------------------------------------------------------------------------
+
+    def _escribir(self):
+        conexion = self._conectar()
+        activo = True
+        while activo:
+            lote = [self._cola.get()]
+            # Espera el intervalo para agrupar los cambios en una sola transacción
+            self._parar.wait(self.intervalo)
+            while True:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conexion:
+                    for operacion in lote:
+                        if operacion is None:
+                            activo = False
+                        else:
+                            self._aplicar(conexion, operacion)
+            except sqlite3.Error as e:
+                print(f"❌ ERROR al escribir snapshot: {e}")
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+        conexion.close()
+
+    def _aplicar(self, conexion: sqlite3.Connection, operacion: Tuple):
+        tipo, sala_id, generacion = operacion[:3]
+        guardada = conexion.execute(
+            "SELECT COALESCE(json_extract(estado, '$.generacion'), 0) FROM salas WHERE sala = ?", (sala_id,)
+        ).fetchone()
+        if guardada is not None and guardada[0] > generacion:
+            # Operación de una carga anterior escrita tarde por otro proceso
+            return
+        ahora = time.time()
+        if tipo == "completo":
+            _, _, _, reparto, config, marcas, estado = operacion
+            self._borrar_sala(conexion, sala_id)
+            conexion.execute(
+                "INSERT INTO salas VALUES (?, ?, ?, ?)", (sala_id, config, estado, ahora)
+            )
+            conexion.executemany(
+                "INSERT INTO cartones VALUES (?, ?, ?, ?, ?, ?)", _filas_cartones(sala_id, *mazo_snapshot(*reparto))
+            )
+            conexion.executemany(
+                "INSERT INTO marcas VALUES (?, ?, ?, ?)",
+                ((sala_id, orden, idioma, palabra) for orden, (idioma, palabra) in enumerate(marcas))
+            )
+        elif tipo == "canto":
+            _, _, _, orden, cantadas, estado = operacion
+            conexion.executemany(
+                "INSERT OR REPLACE INTO marcas VALUES (?, ?, ?, ?)",
+                ((sala_id, orden + i, idioma, palabra) for i, (idioma, palabra) in enumerate(cantadas))
+            )
+            conexion.execute(
+                "UPDATE salas SET estado = ?, actualizada = ? WHERE sala = ?", (estado, ahora, sala_id)
+            )
+        elif tipo == "estado":
+            conexion.execute(
+                "UPDATE salas SET estado = ?, actualizada = ? WHERE sala = ?", (operacion[3], ahora, sala_id)
+            )
+        elif tipo == "borrar":
+            self._borrar_sala(conexion, sala_id)
+
+    @staticmethod
+    def _borrar_sala(conexion: sqlite3.Connection, sala_id: str):
+        for tabla in ("salas", "cartones", "marcas"):
+            conexion.execute(f"DELETE FROM {tabla} WHERE sala = ?", (sala_id,))
+
+    # -------------------------------------------------------------------------
+    # Restauración al arrancar
+    # -------------------------------------------------------------------------
+
+    def restaurar(self, salas: RegistroSalas) -> int:
+        """Recrea en `salas` todas las salas guardadas; retorna cuántas se restauraron"""
+        inicio = time.perf_counter()
+        conexion = self._conectar()
+        try:
+            guardadas = conexion.execute(
+                "SELECT sala, config, estado FROM salas ORDER BY actualizada"
+            ).fetchall()
+            for sala_id, config, estado in guardadas:
+                self._restaurar_sala(conexion, salas, sala_id, json.loads(config), json.loads(estado))
+        finally:
+            conexion.close()
+        if guardadas:
+            print(f"💾 {len(guardadas)} salas restauradas en {time.perf_counter() - inicio:.2f}s")
+        return len(guardadas)
+
+    def restaurar_sala(self, salas: RegistroSalas, sala_id: str) -> bool:
+        """Vuelve a cargar una sala expulsada de memoria desde su snapshot; False si no hay snapshot"""
+        # Lo encolado antes de la expulsión tiene que estar escrito
+        self.sincronizar()
+        conexion = self._conectar()
+        try:
+            guardada = conexion.execute(
+                "SELECT config, estado FROM salas WHERE sala = ?", (sala_id,)
+            ).fetchone()
+            if guardada is None:
+                return False
+            self._restaurar_sala(conexion, salas, sala_id, json.loads(guardada[0]), json.loads(guardada[1]))
+        finally:
+            conexion.close()
+        print(f"💾 Sala '{sala_id}' restaurada desde su snapshot")
+        return True
+
+    def _restaurar_sala(
+        self,
+        conexion: sqlite3.Connection,
+        salas: RegistroSalas,
+        sala_id: str,
+        config: Dict,
+        estado: Dict
+    ):
+        mazo: List[Carton] = []
+        duenos: List[int] = []
+        vocabularios = Vocabularios()
+        # Las palabras se guardaron normalizadas y ordenadas: no hace falta revalidar.
+        # Se crean cientos de miles de objetos sin ciclos: el recolector solo añadiría pasadas
+        recolector = gc.isenabled()
+        gc.disable()
+        try:
+            for n_jugador, carton_id, idioma, palabras in conexion.execute(
+                "SELECT jugador, carton_id, idioma, palabras FROM cartones WHERE sala = ? ORDER BY fila",
+                (sala_id,)
+            ):
+                mazo.append(Carton.desde_ordenadas(carton_id, idioma, palabras.split(), vocabularios))
+                duenos.append(n_jugador)
+        finally:
+            if recolector:
+                gc.enable()
+        vocabularios.unificar(mazo)
+        marcas = conexion.execute(
+            "SELECT idioma, palabra FROM marcas WHERE sala = ? ORDER BY orden", (sala_id,)
+        ).fetchall()
+
+        sala = salas.crear(sala_id)
+        sala.juego = juego_desde_snapshot(mazo, duenos, config, estado, marcas)
+        salas.registrar_carga(sala_id)
+        with self._lock:
+            self._marcas[sala_id] = len(marcas)
+            self._generaciones[sala_id] = estado.get("generacion", 0)
+        if self.al_restaurar is not None:
+            self.al_restaurar(sala_id, sala.juego)
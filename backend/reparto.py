@@ -0,0 +1,285 @@
+# =============================================================================
+# REPARTO DE CARTONES SEMBRADO (PERMUTACIÓN DE ÍNDICES Y TRAMOS POR JUGADOR)
+# =============================================================================
+#
+# El reparto trabaja con las posiciones de los cartones en el mazo, no con
+# los objetos: una permutación de NumPy sembrada y, por jugador, el tramo
+# [inicio, fin) de esa permutación que le toca. Es O(n) y no registra cada
+# asignación; repartir un millón de cartones entre 50 000 jugadores son un
+# par de operaciones vectorizadas. Los cartones de cada jugador son una vista
+# sobre su tramo: el mazo no se copia en listas por jugador.
+
+import gc
+import hashlib
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mazo_binario import MazoMatriz
+from models import Carton, Jugador, Vocabulario
+from motor_bitset import ids_concatenados
+
+
+class CartonesAsignados(Sequence):
+    """
+    Cartones de un jugador: vista de solo lectura sobre su tramo del plan.
+    Cada acceso resuelve las posiciones contra el mazo, sin lista propia.
+    """
+    __slots__ = ("mazo", "posiciones")
+
+    def __init__(self, mazo: Sequence[Carton], posiciones: np.ndarray):
+        self.mazo = mazo
+        self.posiciones = posiciones
+
+    def __len__(self) -> int:
+        return len(self.posiciones)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(map(self.mazo.__getitem__, self.posiciones[i].tolist()))
+        return self.mazo[int(self.posiciones[i])]
+
+    def __iter__(self) -> Iterator[Carton]:
+        return map(self.mazo.__getitem__, self.posiciones.tolist())
+
+
+class Asignaciones(Sequence):
+    """
+    (jugador, carton) de cada número de asignación: los cartones de los
+    jugadores uno tras otro, en orden de reparto. Guarda la posición en el
+    mazo y el dueño de cada número, no tuplas: con un MazoMatriz ningún
+    cartón se crea hasta que se marca o se lee.
+    """
+    __slots__ = ("jugadores", "mazo", "posiciones", "duenos", "_posiciones", "_duenos", "_numeros")
+
+    def __init__(self, jugadores: List[Jugador]):
+        self.jugadores = jugadores
+        # Los jugadores de un plan comparten mazo (CartonesAsignados)
+        self.mazo: Sequence[Carton] = jugadores[0].cartones.mazo if jugadores else []
+        tramos = [jugador.cartones.posiciones for jugador in jugadores]
+        self.posiciones = np.concatenate(tramos).astype(np.int64, copy=False) if tramos else np.empty(0, dtype=np.int64)
+        self.duenos = np.repeat(np.arange(len(jugadores), dtype=np.int64), [len(t) for t in tramos])
+        # Listas para el acceso uno a uno al marcar (sin escalares de NumPy)
+        self._posiciones = self.posiciones.tolist()
+        self._duenos = self.duenos.tolist()
+        self._numeros: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._posiciones)
+
+    def __getitem__(self, numero: int) -> Tuple[Jugador, Carton]:
+        return self.jugadores[self._duenos[numero]], self.mazo[self._posiciones[numero]]
+
+    def __iter__(self) -> Iterator[Tuple[Jugador, Carton]]:
+        return zip(map(self.jugadores.__getitem__, self._duenos), map(self.mazo.__getitem__, self._posiciones))
+
+    def numeros(self) -> np.ndarray:
+        """Número de asignación de cada posición del mazo (-1: sin repartir)"""
+        if self._numeros is None:
+            numeros = np.full(len(self.mazo), -1, dtype=np.int64)
+            numeros[self.posiciones] = np.arange(len(self.posiciones), dtype=np.int64)
+            self._numeros = numeros
+        return self._numeros
+
+    def creados(self) -> List[Tuple[int, Carton]]:
+        """(número, cartón) de los cartones asignados que ya existen (con un MazoMatriz, los creados)"""
+        if not isinstance(self.mazo, MazoMatriz):
+            return list(enumerate(map(self.mazo.__getitem__, self._posiciones)))
+        numeros = self.numeros()
+        return [(int(numeros[i]), carton) for i, carton in self.mazo.creados() if numeros[i] >= 0]
+
+    def al_crear(self, funcion: Optional[Callable[[int, Carton], None]]):
+        """`funcion(número, cartón)` para cada cartón asignado que se cree de aquí en adelante"""
+        if not isinstance(self.mazo, MazoMatriz):
+            return
+        if funcion is None:
+            self.mazo.al_crear = None
+            return
+        numeros = self.numeros()
+
+        def avisar(posicion: int, carton: Carton):
+            if numeros[posicion] >= 0:
+                funcion(int(numeros[posicion]), carton)
+        self.mazo.al_crear = avisar
+
+    def totales(self) -> np.ndarray:
+        """Palabras de cada cartón asignado"""
+        if isinstance(self.mazo, MazoMatriz):
+            return self.mazo.totales(self.posiciones)
+        return np.fromiter((carton.total_palabras for _, carton in self), dtype=np.int64, count=len(self))
+
+    def por_idioma(self) -> Iterator[Tuple[str, np.ndarray, np.ndarray, np.ndarray, List[str]]]:
+        """
+        Por idioma (en orden de primera aparición): sus números de asignación,
+        los ids de vocabulario de esos cartones concatenados, la longitud de
+        cada uno y las palabras del vocabulario de la carga.
+        """
+        if isinstance(self.mazo, MazoMatriz):
+            mazo = self.mazo
+            bloques = mazo.bloque[self.posiciones]
+            grupos = []
+            for bloque, idioma in enumerate(mazo.idiomas):
+                numeros = np.flatnonzero(bloques == bloque)
+                if len(numeros):
+                    grupos.append((int(numeros[0]), bloque, idioma, numeros))
+            for _, bloque, idioma, numeros in sorted(grupos, key=lambda grupo: grupo[0]):
+                matriz = mazo.matrices[bloque][mazo.fila[self.posiciones[numeros]]]
+                longitudes = np.full(len(numeros), matriz.shape[1], dtype=np.int64)
+                yield idioma, numeros.astype(np.uint32), matriz.reshape(-1), longitudes, mazo.vocabs[bloque].palabras
+            return
+
+        por_idioma: Dict[str, List[int]] = {}
+        for numero, (_, carton) in enumerate(self):
+            por_idioma.setdefault(carton.idioma, []).append(numero)
+        for idioma, numeros in por_idioma.items():
+            cartones = [self[n][1] for n in numeros]
+            longitudes = np.fromiter((c.total_palabras for c in cartones), dtype=np.int64, count=len(cartones))
+            # Los cartones de un idioma comparten el vocabulario de su carga
+            yield idioma, np.asarray(numeros, dtype=np.uint32), ids_concatenados(cartones), longitudes, cartones[0].vocab.palabras
+
+    def matrices(self) -> Iterator[Tuple[str, np.ndarray, np.ndarray, Vocabulario]]:
+        """
+        Con un MazoMatriz, por idioma con cartones repartidos: su matriz de ids,
+        el número de asignación de cada fila (-1: sin repartir) y su vocabulario.
+        """
+        mazo = self.mazo
+        numeros = self.numeros()
+        for bloque, idioma in enumerate(mazo.idiomas):
+            posiciones = np.flatnonzero(mazo.bloque == bloque)
+            por_fila = np.full(len(mazo.matrices[bloque]), -1, dtype=np.int64)
+            por_fila[mazo.fila[posiciones]] = numeros[posiciones]
+            if (por_fila >= 0).any():
+                yield idioma, mazo.matrices[bloque], por_fila, mazo.vocabs[bloque]
+
+    def idiomas(self) -> List[str]:
+        """Idiomas de los cartones asignados, en orden de primera aparición"""
+        if isinstance(self.mazo, MazoMatriz):
+            bloques, primeros = np.unique(self.mazo.bloque[self.posiciones], return_index=True)
+            return [self.mazo.idiomas[b] for b in bloques[np.argsort(primeros)].tolist()]
+        return list(dict.fromkeys(carton.idioma for _, carton in self))
+
+
+class PlanReparto:
+    """
+    Asignación de un mazo: `orden` son las posiciones de los cartones en el
+    mazo agrupadas por jugador y el jugador i recibe orden[limites[i]:limites[i + 1]].
+    """
+    __slots__ = ("nombres", "orden", "limites")
+
+    def __init__(self, nombres: List[str], orden: np.ndarray, limites: np.ndarray):
+        self.nombres = nombres
+        self.orden = orden
+        self.limites = limites
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    def indices(self, jugador: int) -> np.ndarray:
+        """Posiciones en el mazo de los cartones del jugador (vista, sin copia)"""
+        return self.orden[self.limites[jugador]:self.limites[jugador + 1]]
+
+    def jugadores(self, mazo: Sequence[Carton]) -> List[Jugador]:
+        """Jugadores cuyos cartones son vistas de su tramo (sin recorrer el mazo)"""
+        # Decenas de miles de objetos sin ciclos: el recolector solo añadiría pasadas
+        recolector = gc.isenabled()
+        gc.disable()
+        try:
+            return [
+                Jugador(nombre, CartonesAsignados(mazo, self.indices(i)))
+                for i, nombre in enumerate(self.nombres)
+            ]
+        finally:
+            if recolector:
+                gc.enable()
+
+    def huella(self) -> str:
+        """Resumen de la asignación (jugadores, tramos y posiciones) para verificar una repetición"""
+        huella = hashlib.blake2b(digest_size=16)
+        huella.update("\0".join(self.nombres).encode("utf-8") + b"\n")
+        huella.update(self.limites.astype("<i8").tobytes())
+        huella.update(self.orden.astype("<i8").tobytes())
+        return huella.hexdigest()
+
+
+def plan_por_duenos(nombres: List[str], duenos: Sequence[int]) -> PlanReparto:
+    """
+    Plan con el jugador de cada cartón del mazo ya decidido (-1: sin repartir),
+    p. ej. un snapshot sin semilla o la demo. Cada jugador conserva el orden del mazo.
+    """
+    duenos = np.asarray(duenos, dtype=np.int64)
+    repartidos = np.flatnonzero(duenos >= 0)
+    orden = repartidos[np.argsort(duenos[repartidos], kind="stable")]
+    limites = np.zeros(len(nombres) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(duenos[repartidos], minlength=len(nombres)), out=limites[1:])
+    return PlanReparto(nombres, orden, limites)
+
+
+def nombres_jugadores(n_jugadores: int, nombres: Optional[Sequence[str]] = None) -> List[str]:
+    """Lista de jugadores indicada (validada) o la predeterminada Jugador_1..Jugador_n"""
+    if not nombres:
+        return [f"Jugador_{i + 1}" for i in range(n_jugadores)]
+    lista = [str(nombre).strip() for nombre in nombres]
+    if any(not nombre for nombre in lista):
+        raise ValueError("Los nombres de jugador no pueden estar vacíos")
+    if len(set(lista)) != len(lista):
+        raise ValueError("Hay nombres de jugador repetidos")
+    return lista
+
+
+def repartir_minimo_uno(n_cartones: int, nombres: List[str], semilla: int) -> PlanReparto:
+    """
+    Todos los cartones mezclados: cada jugador recibe un tramo consecutivo de
+    la permutación, n // jugadores cartones y uno más los primeros n % jugadores
+    (mismas cantidades que repartirlos de a uno en ronda).
+    """
+    n_jugadores = len(nombres)
+    if n_jugadores == 0 or n_cartones < n_jugadores:
+        raise ValueError("No hay suficientes cartones para todos los jugadores")
+    orden = np.random.default_rng(semilla).permutation(n_cartones)
+    base, resto = divmod(n_cartones, n_jugadores)
+    tamanos = np.full(n_jugadores, base, dtype=np.int64)
+    tamanos[:resto] += 1
+    limites = np.zeros(n_jugadores + 1, dtype=np.int64)
+    np.cumsum(tamanos, out=limites[1:])
+    return PlanReparto(nombres, orden, limites)
+
+
+def repartir_por_cuotas(
+    idiomas: Sequence[str],
+    cuotas: Dict[str, int],
+    nombres: List[str],
+    semilla: int
+) -> PlanReparto:
+    """
+    `cuotas[idioma]` cartones de cada idioma por jugador, elegidos al azar
+    entre los de ese idioma; los cartones que sobran quedan sin repartir.
+    `idiomas` es el idioma de cada cartón del mazo.
+    """
+    n_jugadores = len(nombres)
+    if n_jugadores == 0:
+        raise ValueError("No hay jugadores para repartir")
+    cuotas = {idioma: int(n) for idioma, n in cuotas.items() if int(n) > 0}
+    if not cuotas:
+        raise ValueError("Las cuotas no asignan ningún cartón")
+
+    codigos = {idioma: i for i, idioma in enumerate(cuotas)}
+    # Código de idioma por cartón (-1: idioma sin cuota)
+    por_carton = np.fromiter((codigos.get(idioma, -1) for idioma in idiomas), dtype=np.int16, count=len(idiomas))
+    rng = np.random.default_rng(semilla)
+    bloques = []
+    for idioma, cuota in cuotas.items():
+        posiciones = np.flatnonzero(por_carton == codigos[idioma])
+        necesarios = cuota * n_jugadores
+        if len(posiciones) < necesarios:
+            raise ValueError(
+                f"No hay suficientes cartones del idioma {idioma} "
+                f"({len(posiciones)} de {necesarios} para {cuota} por jugador)"
+            )
+        elegidos = posiciones[rng.permutation(len(posiciones))[:necesarios]]
+        bloques.append(elegidos.reshape(n_jugadores, cuota))
+
+    # Fila i: los cartones del jugador i, idioma por idioma en el orden de las cuotas
+    por_jugador = sum(cuotas.values())
+    orden = np.hstack(bloques).reshape(-1)
+    limites = np.arange(n_jugadores + 1, dtype=np.int64) * por_jugador
+    return PlanReparto(nombres, orden, limites)
@@ -0,0 +1,185 @@
+# =============================================================================
+# REGISTRO DE SALAS (VARIOS JUEGOS POR PROCESO)
+# =============================================================================
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+
+from game_manager import GameManager
+from actor import ActorSala
+from eventos import CanalEventos
+from config import SALA_PRINCIPAL, MAX_SALAS, MAX_CARTONES_SALAS, INACTIVIDAD_SALA_SEG
+
+PATRON_SALA = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class Sala:
+    """Un juego independiente identificado por su id"""
+    __slots__ = ("id", "_juego", "actor", "eventos", "creada", "ultimo_acceso", "cartones")
+
+    def __init__(self, sala_id: str, eventos: Optional[CanalEventos] = None):
+        self.id = sala_id
+        self._juego = GameManager()
+        # Único escritor de la sala; las lecturas usan su instantánea
+        self.actor = ActorSala(lambda: self._juego)
+        # El canal se conserva al reiniciar la sala para no perder suscriptores
+        self.eventos = eventos or CanalEventos()
+        self.creada = time.time()
+        self.ultimo_acceso = self.creada
+        self.cartones = 0
+
+    @property
+    def juego(self) -> GameManager:
+        return self._juego
+
+    @juego.setter
+    def juego(self, juego: GameManager):
+        """Reemplazar el juego (restauración, réplica, reinicio) publica su instantánea"""
+        self._juego = juego
+        self.actor.publicar()
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "jugadores": len(self.juego.jugadores),
+            "cartones": self.cartones,
+            "juego_activo": self.juego.juego_activo,
+            "creada": self.creada,
+            "ultimo_acceso": self.ultimo_acceso
+        }
+
+
+class RegistroSalas:
+    """
+    Salas en orden LRU (la más reciente al final).
+    Se expulsan por inactividad, por número máximo de salas y por
+    total de cartones cargados (aproximación del uso de memoria).
+    """
+
+    def __init__(
+        self,
+        max_salas: int = MAX_SALAS,
+        max_cartones: int = MAX_CARTONES_SALAS,
+        inactividad_seg: float = INACTIVIDAD_SALA_SEG,
+        al_cerrar: Optional[Callable[[str], None]] = None
+    ):
+        self.max_salas = max_salas
+        self.max_cartones = max_cartones
+        self.inactividad_seg = inactividad_seg
+        self._salas: "OrderedDict[str, Sala]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Se invoca con el id de cada sala eliminada o expulsada (p. ej. borrar su snapshot)
+        self.al_cerrar = al_cerrar
+        # Si se indica, reemplaza a al_cerrar en las expulsiones (LRU o inactividad)
+        self.al_expulsar: Optional[Callable[[str], None]] = None
+        # Salas expulsadas (no eliminadas): se pueden volver a cargar desde su snapshot
+        self._expulsadas: Set[str] = set()
+
+    @staticmethod
+    def id_valido(sala_id: str) -> bool:
+        return bool(PATRON_SALA.match(sala_id))
+
+    def crear(self, sala_id: Optional[str] = None) -> Sala:
+        """Crea (o reinicia) una sala; si no se indica id se genera uno"""
+        sala_id = sala_id or uuid.uuid4().hex[:8]
+        with self._lock:
+            anterior = self._salas.get(sala_id)
+            sala = Sala(sala_id, anterior.eventos if anterior else None)
+            self._salas[sala_id] = sala
+            self._expulsadas.discard(sala_id)
+            self._salas.move_to_end(sala_id)
+            self._expulsar(protegida=sala_id)
+            return sala
+
+    def obtener(self, sala_id: str) -> Optional[Sala]:
+        """Sala por id (actualiza su uso); la sala principal se crea bajo demanda"""
+        with self._lock:
+            ahora = time.time()
+            self._expulsar_inactivas(ahora)
+            sala = self._salas.get(sala_id)
+            if sala is None:
+                if sala_id != SALA_PRINCIPAL:
+                    return None
+                sala = Sala(sala_id)
+                self._salas[sala_id] = sala
+                self._expulsar(protegida=sala_id)
+            sala.ultimo_acceso = ahora
+            self._salas.move_to_end(sala_id)
+            return sala
+
+    def eliminar(self, sala_id: str) -> bool:
+        with self._lock:
+            sala = self._salas.pop(sala_id, None)
+            self._expulsadas.discard(sala_id)
+        if sala is None:
+            return False
+        self._cerrada(sala)
+        return True
+
+    def expulsada(self, sala_id: str) -> bool:
+        """¿La sala salió de memoria por los límites o por inactividad (sin eliminarse)?"""
+        return sala_id in self._expulsadas
+
+    def recuperar(self, sala_id: str) -> bool:
+        """Deja de considerar expulsada a la sala; True si lo estaba (la llama quien la restaura)"""
+        with self._lock:
+            if sala_id not in self._expulsadas:
+                return False
+            self._expulsadas.discard(sala_id)
+            return True
+
+    def descartar(self, sala_id: str) -> bool:
+        """Quita la sala solo de este proceso (ya se eliminó en otro worker)"""
+        with self._lock:
+            sala = self._salas.pop(sala_id, None)
+        if sala is None:
+            return False
+        sala.eventos.publicar({"tipo": "sala_cerrada", "sala": sala.id})
+        return True
+
+    def registrar_carga(self, sala_id: str):
+        """Actualiza el conteo de cartones tras una carga y aplica el límite de memoria"""
+        with self._lock:
+            sala = self._salas.get(sala_id)
+            if sala is None:
+                return
+            sala.cartones = sum(len(j.cartones) for j in sala.juego.jugadores)
+            self._expulsar(protegida=sala_id)
+
+    def listar(self) -> List[Dict]:
+        with self._lock:
+            return [sala.to_dict() for sala in reversed(self._salas.values())]
+
+    def _expulsar_inactivas(self, ahora: float):
+        while self._salas:
+            sala_id, sala = next(iter(self._salas.items()))
+            if ahora - sala.ultimo_acceso < self.inactividad_seg:
+                break
+            del self._salas[sala_id]
+            self._cerrada(sala, expulsada=True)
+            print(f"🧹 Sala '{sala_id}' expulsada por inactividad")
+
+    def _expulsar(self, protegida: str):
+        """Expulsa las salas menos usadas hasta respetar los límites"""
+        total_cartones = sum(s.cartones for s in self._salas.values())
+        for sala_id in list(self._salas.keys()):
+            if len(self._salas) <= self.max_salas and total_cartones <= self.max_cartones:
+                break
+            if sala_id == protegida:
+                continue
+            sala = self._salas.pop(sala_id)
+            total_cartones -= sala.cartones
+            self._cerrada(sala, expulsada=True)
+            print(f"🧹 Sala '{sala_id}' expulsada (LRU)")
+
+    def _cerrada(self, sala: Sala, expulsada: bool = False):
+        if expulsada:
+            self._expulsadas.add(sala.id)
+        sala.eventos.publicar({"tipo": "sala_cerrada", "sala": sala.id})
+        al_cerrar = self.al_expulsar if expulsada and self.al_expulsar is not None else self.al_cerrar
+        if al_cerrar is not None:
+            al_cerrar(sala.id)
@@ -0,0 +1,18 @@
+# =============================================================================
+# SERIALIZACIÓN JSON RÁPIDA (ORJSON SI ESTÁ INSTALADO)
+# =============================================================================
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: se usa json de la librería estándar
+    orjson = None
+
+
+def dumps(valor: Any) -> bytes:
+    """JSON compacto en UTF-8 (orjson si está disponible)"""
+    if orjson is not None:
+        return orjson.dumps(valor, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,272 @@
+# =============================================================================
+# SIMULADOR MONTE CARLO DE PARTIDAS (AJUSTE DE REGLAS Y BANCOS)
+# Uso: python simulador.py --archivo cartones.txt --juegos 10000 --regla uno_por_idioma
+#      python simulador.py --generar 400 --tamanos SP=24 EN=14 --banco SP=banco_SP.txt
+# =============================================================================
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bancos import RegistroBancos
+from parser_cartones import parsear_cartones, leer_lineas_por_bloques
+from config import REGLAS_TAMANO
+
+# Elementos (juegos × cartones × palabras) por lote vectorizado: acota la memoria
+ELEMENTOS_POR_LOTE = 4_000_000
+# Valor de "nunca termina" para cartones que no pueden ganar
+NUNCA = np.iinfo(np.int32).max
+
+
+class CartonesIdioma:
+    """Cartones de un idioma como matriz (cartones × palabras) de ids del banco"""
+
+    def __init__(self, idioma: str, banco: List[str], cartones: List[List[str]]):
+        self.idioma = idioma
+        self.n_banco = len(banco)
+        ids = {p: i for i, p in enumerate(banco)}
+        tamano = max((len(c) for c in cartones), default=0)
+        # Palabras fuera del banco o cartones más cortos: columna `n_banco` (nunca se canta)
+        self.matriz = np.full((len(cartones), tamano), self.n_banco, dtype=np.int32)
+        for fila, palabras in enumerate(cartones):
+            self.matriz[fila, :len(palabras)] = [ids.get(p, self.n_banco) for p in palabras]
+
+        # Un cartón con palabras repetidas no llega a marcar todas sus posiciones (como en Carton)
+        ordenada = np.sort(self.matriz, axis=1)
+        self.puede_ganar = ~(ordenada[:, 1:] == ordenada[:, :-1]).any(axis=1) & (ordenada[:, -1] < self.n_banco)
+
+
+def _partidas_idioma(
+    rng: np.random.Generator,
+    cartones: CartonesIdioma,
+    n_juegos: int,
+    por_juego: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Para n_juegos partidas retorna (canto del idioma en que aparece el primer
+    cartón completo, cartones completos en ese canto). Cada partida canta el
+    banco del idioma en un orden aleatorio sin repetir palabras.
+    """
+    n_cartones, tamano = cartones.matriz.shape
+    # rango[g, palabra] = en qué canto del idioma sale la palabra (permutación aleatoria)
+    rango = rng.permuted(np.tile(np.arange(cartones.n_banco, dtype=np.int32), (n_juegos, 1)), axis=1)
+    rango = np.concatenate([rango, np.full((n_juegos, 1), NUNCA, dtype=np.int32)], axis=1)
+
+    if por_juego is None:
+        elegidos = np.broadcast_to(np.arange(n_cartones), (n_juegos, n_cartones))
+    else:
+        # Reparto uno_por_idioma: cada partida juega con `por_juego` cartones al azar
+        elegidos = rng.permuted(np.tile(np.arange(n_cartones), (n_juegos, 1)), axis=1)[:, :por_juego]
+
+    matriz = cartones.matriz[elegidos]                                   # juegos × cartones × palabras
+    termina = np.take_along_axis(rango, matriz.reshape(n_juegos, -1), axis=1)
+    termina = termina.reshape(n_juegos, -1, tamano).max(axis=2)
+    termina[~cartones.puede_ganar[elegidos]] = NUNCA
+
+    primero = termina.min(axis=1)
+    empates = (termina == primero[:, None]).sum(axis=1)
+    return primero, empates
+
+
+def simular_lote(
+    idiomas: List[CartonesIdioma],
+    n_juegos: int,
+    semilla,
+    n_jugadores: int,
+    regla: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simula n_juegos partidas completas. Retorna (cantos hasta el primer ganador,
+    cartones ganadores en ese canto); -1 cantos si ningún cartón puede ganar.
+    """
+    rng = np.random.default_rng(semilla)
+    por_juego = n_jugadores if regla == "uno_por_idioma" else None
+    n_idiomas = len(idiomas)
+    cantos = np.empty(n_juegos, dtype=np.int64)
+    empates = np.empty(n_juegos, dtype=np.int64)
+
+    tamano_max = max(c.matriz.shape[0] * c.matriz.shape[1] for c in idiomas)
+    lote = max(1, ELEMENTOS_POR_LOTE // max(1, tamano_max))
+    for inicio in range(0, n_juegos, lote):
+        g = min(lote, n_juegos - inicio)
+        primeros = np.empty((g, n_idiomas), dtype=np.int64)
+        iguales = np.empty((g, n_idiomas), dtype=np.int64)
+        for i, cartones in enumerate(idiomas):
+            primeros[:, i], iguales[:, i] = _partidas_idioma(rng, cartones, g, por_juego)
+
+        # Misma rotación que cantar_palabra: sin ganador se pasa al siguiente idioma
+        # (cíclico), así el j-ésimo canto del idioma en la posición p es el canto j*L + p + 1
+        posiciones = rng.permuted(np.tile(np.arange(n_idiomas), (g, 1)), axis=1)
+        turno = np.where(primeros == NUNCA, np.iinfo(np.int64).max, primeros * n_idiomas + posiciones + 1)
+        ganador = turno.argmin(axis=1)
+        filas = np.arange(g)
+        mejor = turno[filas, ganador]
+        cantos[inicio:inicio + g] = np.where(mejor == np.iinfo(np.int64).max, -1, mejor)
+        empates[inicio:inicio + g] = np.where(mejor == np.iinfo(np.int64).max, 0, iguales[filas, ganador])
+    return cantos, empates
+
+
+# -----------------------------------------------------------------------------
+# Pool de procesos: los cartones se envían una vez a cada trabajador
+# -----------------------------------------------------------------------------
+
+_idiomas_trabajador: List[CartonesIdioma] = []
+
+
+def _inicializar_trabajador(idiomas: List[CartonesIdioma]):
+    global _idiomas_trabajador
+    _idiomas_trabajador = idiomas
+
+
+def _simular_en_trabajador(n_juegos: int, semilla, n_jugadores: int, regla: str):
+    return simular_lote(_idiomas_trabajador, n_juegos, semilla, n_jugadores, regla)
+
+
+def simular(
+    cartones_por_idioma: Dict[str, List[List[str]]],
+    bancos: Dict[str, List[str]],
+    n_juegos: int,
+    n_jugadores: int,
+    regla: str = "minimo_uno",
+    semilla: int = 0,
+    procesos: Optional[int] = None
+) -> Dict:
+    """Reparte las partidas entre procesos y resume las distribuciones"""
+    inicio = time.perf_counter()
+    idiomas = [
+        CartonesIdioma(idioma, bancos[idioma], cartones)
+        for idioma, cartones in sorted(cartones_por_idioma.items())
+    ]
+    if regla == "uno_por_idioma":
+        for cartones in idiomas:
+            if cartones.matriz.shape[0] < n_jugadores:
+                raise ValueError(f"No hay suficientes cartones del idioma {cartones.idioma}")
+    elif sum(c.matriz.shape[0] for c in idiomas) < n_jugadores:
+        raise ValueError("No hay suficientes cartones para todos los jugadores")
+
+    procesos = procesos or os.cpu_count() or 1
+    n_tareas = min(n_juegos, procesos * 4)
+    semillas = np.random.SeedSequence(semilla).spawn(n_tareas)
+    tamanos = [n_juegos // n_tareas + (1 if i < n_juegos % n_tareas else 0) for i in range(n_tareas)]
+
+    if procesos <= 1:
+        resultados = [simular_lote(idiomas, n, s, n_jugadores, regla) for n, s in zip(tamanos, semillas)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_trabajador,
+            initargs=(idiomas,)
+        ) as pool:
+            resultados = list(pool.map(
+                _simular_en_trabajador, tamanos, semillas,
+                [n_jugadores] * n_tareas, [regla] * n_tareas
+            ))
+
+    cantos = np.concatenate([r[0] for r in resultados])
+    empates = np.concatenate([r[1] for r in resultados])
+    return resumir(cantos, empates, time.perf_counter() - inicio)
+
+
+def resumir(cantos: np.ndarray, empates: np.ndarray, segundos: float) -> Dict:
+    terminados = cantos >= 0
+    validos, ganadores = cantos[terminados], empates[terminados]
+    resumen = {
+        "juegos": int(len(cantos)),
+        "sin_ganador": int((~terminados).sum()),
+        "segundos": segundos
+    }
+    if len(validos):
+        valores, conteos = np.unique(validos, return_counts=True)
+        resumen["cantos"] = {
+            "media": float(validos.mean()),
+            "desviacion": float(validos.std()),
+            "min": int(validos.min()),
+            "p10": float(np.percentile(validos, 10)),
+            "p50": float(np.percentile(validos, 50)),
+            "p90": float(np.percentile(validos, 90)),
+            "p99": float(np.percentile(validos, 99)),
+            "max": int(validos.max()),
+            "histograma": {int(v): int(c) for v, c in zip(valores, conteos)}
+        }
+        valores, conteos = np.unique(ganadores, return_counts=True)
+        resumen["empates"] = {
+            "proporcion": float((ganadores > 1).mean()),
+            "ganadores_por_juego": {int(v): int(c) for v, c in zip(valores, conteos)}
+        }
+    return resumen
+
+
+# -----------------------------------------------------------------------------
+# Fuentes de cartones: archivo TXT o generados al azar
+# -----------------------------------------------------------------------------
+
+def cartones_desde_archivo(ruta: str, reglas: Dict[str, int], bancos: RegistroBancos) -> Dict[str, List[List[str]]]:
+    reglas_dinamicas = {idioma: {"max_palabras": n, "nombre": idioma} for idioma, n in reglas.items()}
+    por_idioma: Dict[str, List[List[str]]] = {}
+    with open(ruta, "rb") as archivo:
+        for carton in parsear_cartones(leer_lineas_por_bloques(archivo), reglas_dinamicas, bancos.conjuntos_personalizados()):
+            por_idioma.setdefault(carton.idioma, []).append(carton.palabras)
+    return por_idioma
+
+
+def cartones_generados(n_por_idioma: int, reglas: Dict[str, int], bancos: Dict[str, List[str]], semilla: int) -> Dict[str, List[List[str]]]:
+    rng = random.Random(semilla)
+    return {
+        idioma: [rng.sample(bancos[idioma], min(n, len(bancos[idioma]))) for _ in range(n_por_idioma)]
+        for idioma, n in reglas.items()
+    }
+
+
+def _pares(valores: List[str]) -> Dict[str, str]:
+    return dict(v.split("=", 1) for v in valores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulador Monte Carlo de partidas de bingo")
+    fuente = parser.add_mutually_exclusive_group(required=True)
+    fuente.add_argument("--archivo", help="Archivo TXT de cartones (formato de /api/cargar-masivo)")
+    fuente.add_argument("--generar", type=int, help="Cartones aleatorios por idioma")
+    parser.add_argument("--juegos", type=int, default=10_000)
+    parser.add_argument("--jugadores", type=int, default=5)
+    parser.add_argument("--regla", choices=("minimo_uno", "uno_por_idioma"), default="minimo_uno")
+    parser.add_argument("--tamanos", nargs="+", default=[], help="Palabras por cartón, p. ej. SP=24 EN=14")
+    parser.add_argument("--banco", nargs="+", default=[], help="Banco por idioma desde TXT, p. ej. SP=banco_SP.txt")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Guardar el resumen en JSON")
+    args = parser.parse_args()
+
+    reglas = {k.upper(): int(v) for k, v in _pares(args.tamanos).items()} or dict(REGLAS_TAMANO)
+    personalizados = {}
+    for idioma, ruta in _pares(args.banco).items():
+        with open(ruta, encoding="utf-8") as archivo:
+            personalizados[idioma.upper()] = [l.strip().upper() for l in archivo if l.strip()]
+    registro = RegistroBancos(personalizados)
+    bancos = {idioma: list(registro.banco(idioma).lista) for idioma in reglas if registro.banco(idioma)}
+    reglas = {idioma: n for idioma, n in reglas.items() if idioma in bancos}
+
+    if args.archivo:
+        cartones = cartones_desde_archivo(args.archivo, reglas, registro)
+    else:
+        cartones = cartones_generados(args.generar, reglas, bancos, args.semilla)
+
+    resumen = simular(cartones, bancos, args.juegos, args.jugadores, args.regla, args.semilla, args.procesos)
+    c = resumen.get("cantos")
+    print(f"🎲 {resumen['juegos']} partidas en {resumen['segundos']:.1f}s ({args.regla}, {args.jugadores} jugadores)")
+    if c:
+        print(f"📢 Cantos hasta el primer ganador: media={c['media']:.1f} p50={c['p50']:.0f} p90={c['p90']:.0f} p99={c['p99']:.0f} (min {c['min']}, max {c['max']})")
+        print(f"🤝 Partidas con empate: {resumen['empates']['proporcion']:.1%}")
+    if resumen["sin_ganador"]:
+        print(f"⚠️ {resumen['sin_ganador']} partidas sin ningún cartón que pueda ganar")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as salida:
+            json.dump(resumen, salida, indent=2)
+        print(f"📄 Resumen en {args.salida}")
@@ -0,0 +1,118 @@
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import sys
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bancos import RegistroBancos
+from config import REGLAS_TAMANO, BANCO_PALABRAS
+from game_manager import GameManager
+from generador import bancos_para, lineas_cartones
+
+REGLAS_CARGA = {
+    codigo: {"max_palabras": tamano, "nombre": codigo}
+    for codigo, tamano in REGLAS_TAMANO.items()
+}
+CONFIG_IDIOMAS = json.dumps([
+    {"codigo": codigo, "nombre": codigo, "maxPalabras": tamano}
+    for codigo, tamano in REGLAS_TAMANO.items()
+])
+_SALAS = itertools.count(1)
+
+
+@pytest.fixture(autouse=True)
+def silencio():
+    """Los módulos informan con print: se silencian durante las pruebas"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@pytest.fixture(scope="session")
+def lineas() -> List[str]:
+    """Mazo sintético pequeño (50 cartones por idioma) con los bancos predeterminados"""
+    reglas = dict(REGLAS_TAMANO)
+    return list(lineas_cartones(bancos_para(reglas, RegistroBancos({})), reglas, 50, semilla=7))
+
+
+@pytest.fixture
+def cargar(lineas) -> Callable[..., GameManager]:
+    def cargar(motor: str = "indice", regla: str = "minimo_uno", semilla: int = 3) -> GameManager:
+        juego = GameManager(motor=motor, nivel_traza="off")
+        exito, mensaje, _ = juego.cargar_cartones_masivos(
+            lineas, 10, REGLAS_CARGA, {}, regla, semilla=semilla
+        )
+        assert exito, mensaje
+        juego.iniciar_juego()
+        return juego
+    return cargar
+
+
+@pytest.fixture(scope="session")
+def api():
+    """Cliente de la API (main.py sin snapshots, bitácora ni memoria compartida)"""
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def sala(api, lineas) -> str:
+    """Sala nueva de la API con el mazo de prueba cargado (10 jugadores, semilla 3)"""
+    sala_id = f"prueba{next(_SALAS)}"
+    assert api.post("/api/salas", json={"id": sala_id}).status_code == 200
+    respuesta = subir(api, lineas, sala_id)
+    assert respuesta.status_code == 200, respuesta.text
+    return sala_id
+
+
+def subir(api, lineas: List[str], sala_id: str, **campos):
+    datos = {"config_idiomas": CONFIG_IDIOMAS, "semilla": "3", **campos}
+    return api.post(
+        f"/api/cargar-masivo?n_jugadores=10&sala={sala_id}",
+        files={"file": ("cartones.txt", "".join(lineas).encode("utf-8"))},
+        data=datos
+    )
+
+
+def jugar(
+    juego: GameManager,
+    pasos: int,
+    semilla: int = 0,
+    al_cantar: Optional[Callable[[str], None]] = None,
+    al_siguiente: Optional[Callable[[], None]] = None
+):
+    """Cantos, lotes y cambios de idioma al azar (como los llegaría a pedir la API)"""
+    rng = random.Random(semilla)
+    for paso in range(pasos):
+        if not juego.juego_activo:
+            return
+        idioma = juego.orden_idiomas[juego.idioma_actual_idx]
+        if paso % 7 == 6:
+            if "error" not in juego.siguiente_idioma() and al_siguiente:
+                al_siguiente()
+        elif paso % 5 == 4:
+            juego.cantar_lote(
+                rng.sample(BANCO_PALABRAS[idioma], 3), "off",
+                (lambda r: al_cantar(r["palabra"])) if al_cantar else None
+            )
+        else:
+            resultado = juego.cantar_palabra(rng.choice(BANCO_PALABRAS[idioma]))
+            if "error" not in resultado and al_cantar:
+                al_cantar(resultado["palabra"])
+
+
+def estado(juego: GameManager) -> Dict:
+    """Estado público comparable entre procesos (sin el contador de versión)"""
+    datos = json.loads(juego.get_estado_json())
+    datos.pop("version")
+    for jugador in datos["jugadores"]:
+        for carton in jugador["cartones"]:
+            carton["palabras_marcadas"].sort()
+    return datos
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import random
+import time
+
+from actor import ActorSala
+from config import BANCO_PALABRAS
+
+
+def test_mutaciones_en_orden_de_llegada(cargar):
+    juego = cargar()
+    actor = ActorSala(lambda: juego)
+    rng = random.Random(4)
+    activas, cantadas = [], []
+
+    def cantar(orden):
+        activas.append(orden)
+        assert len(activas) == 1, "dos mutaciones a la vez"
+        time.sleep(0.001)
+        try:
+            # El idioma rota tras cada canto: la palabra se elige al ejecutar
+            idioma = juego.orden_idiomas[juego.idioma_actual_idx]
+            resultado = juego.cantar_palabra(rng.choice(BANCO_PALABRAS[idioma]))
+            if "error" not in resultado:
+                cantadas.append(resultado["palabra"])
+            return orden
+        finally:
+            activas.pop()
+
+    async def todas():
+        lectura = actor.consultar("resumen", lambda _: juego.get_estado_json(False))
+        return await asyncio.gather(lectura, *(actor.ejecutar(lambda i=i: cantar(i)) for i in range(30)))
+
+    _, *ordenes = asyncio.run(todas())
+    assert ordenes == list(range(30))
+    assert cantadas and [c["palabra"] for c in juego.palabras_cantadas[-len(cantadas):]] == cantadas
+    assert actor.instantanea.version == juego.version
+
+
+def test_lecturas_calientes_sin_cola(cargar):
+    juego = cargar()
+    actor = ActorSala(lambda: juego)
+    construidos = []
+
+    def construir(instantanea):
+        construidos.append(instantanea.version)
+        return juego.get_estado_json(False)
+
+    async def leer():
+        return await actor.consultar("resumen", construir)
+
+    asyncio.run(leer())
+    for _ in range(5):
+        idioma = juego.orden_idiomas[juego.idioma_actual_idx]
+        asyncio.run(actor.ejecutar(lambda: juego.cantar_palabra(BANCO_PALABRAS[idioma][0])))
+        # Construido al publicar: la lectura no pasa por la cola del actor
+        actor._encolar = None
+        instantanea, cuerpo = asyncio.run(leer())
+        del actor._encolar
+        assert instantanea.version == juego.version
+        assert json.loads(cuerpo)["palabras_cantadas"] == juego.palabras_cantadas
+    # Uno por versión publicada, ninguno repetido
+    assert construidos[1:] == sorted(set(construidos[1:])) and len(construidos) == 6
+
+
+def test_delta_del_cliente_al_dia_se_construye_al_publicar(api, sala):
+    version = api.get(f"/api/estado?sala={sala}").json()["version"]
+    assert api.get(f"/api/estado?sala={sala}&since={version}").status_code == 200
+    idioma = api.get(f"/api/estado?sala={sala}&jugadores=false").json()["idioma_actual"]["codigo"]
+    palabra = BANCO_PALABRAS[idioma][0]
+    assert api.post(f"/api/cantar-palabra?sala={sala}", json={"palabra": palabra}).status_code == 200
+
+    import main
+    instantanea = main.salas.obtener(sala).actor.instantanea
+    assert instantanea.anterior == version
+    assert ("desde", "anterior") in instantanea.cuerpos
+    delta = api.get(f"/api/estado?sala={sala}&since={version}").json()
+    assert [c["palabra"] for c in delta["palabras_cantadas"]] == [palabra]
+    assert delta["version"] == instantanea.version
+    api.delete(f"/api/salas/{sala}")
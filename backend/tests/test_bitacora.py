@@ -0,0 +1,97 @@
+import pytest
+
+from bitacora import Bitacora, indice, reproducir
+from conftest import estado, jugar
+from persistencia import Persistencia
+from salas import RegistroSalas
+
+SALA = "principal"
+
+
+def _registrar(bitacora: Bitacora, juego):
+    """Anota la carga y los cambios de la partida como lo hace main.py"""
+    bitacora.registrar_carga(SALA, juego)
+    bitacora.registrar_inicio(SALA, juego.orden_idiomas)
+    return {
+        "al_cantar": lambda palabra: bitacora.registrar_canto(SALA, palabra),
+        "al_siguiente": lambda: bitacora.registrar_siguiente(SALA)
+    }
+
+
+@pytest.mark.parametrize("motor", ["indice", "bitset"])
+@pytest.mark.parametrize("regla", ["minimo_uno", "uno_por_idioma"])
+def test_repeticion_igual_a_la_partida(tmp_path, cargar, motor, regla):
+    bitacora = Bitacora(str(tmp_path))
+    juego = cargar(motor, regla)
+    jugar(juego, 80, **_registrar(bitacora, juego))
+    bitacora.cerrar()
+
+    ruta = bitacora.ruta(SALA)
+    assert estado(reproducir(ruta)) == estado(juego)
+    # Repetir dos veces da lo mismo: no depende del azar del proceso
+    assert estado(reproducir(ruta)) == estado(reproducir(ruta))
+
+
+def test_repeticion_hasta_un_evento(tmp_path, cargar):
+    bitacora = Bitacora(str(tmp_path))
+    juego = cargar()
+    ruta = bitacora.ruta(SALA)
+    registro = _registrar(bitacora, juego)
+    intermedios = {}
+
+    def al_cantar(palabra):
+        registro["al_cantar"](palabra)
+        intermedios[len(indice(ruta)) - 1] = estado(juego)
+
+    jugar(juego, 40, al_cantar=al_cantar, al_siguiente=registro["al_siguiente"])
+    assert intermedios
+    for hasta, esperado in intermedios.items():
+        assert estado(reproducir(ruta, hasta)) == esperado
+
+
+def test_repeticion_desde_punto_de_restauracion(tmp_path, cargar):
+    bitacoras = tmp_path / "bitacoras"
+    bitacora = Bitacora(str(bitacoras))
+    persistencia = Persistencia(str(tmp_path / "salas.db"), intervalo=0)
+    juego = cargar(semilla=11)
+    registro = _registrar(bitacora, juego)
+    persistencia.guardar_completo(SALA, juego)
+
+    def al_cantar(palabra):
+        registro["al_cantar"](palabra)
+        persistencia.registrar_canto(SALA, juego)
+
+    jugar(juego, 30, al_cantar=al_cantar)
+    persistencia.sincronizar()
+    persistencia.cerrar()
+    bitacora.cerrar()
+
+    # Reinicio: la bitácora anterior se perdió, solo queda el snapshot
+    (bitacoras / f"{SALA}.bitacora").unlink()
+    reiniciada = Bitacora(str(bitacoras))
+    salas = RegistroSalas()
+    persistencia = Persistencia(str(tmp_path / "salas.db"), intervalo=0)
+    persistencia.al_restaurar = reiniciada.registrar_restauracion
+    assert persistencia.restaurar(salas) == 1
+    # Un segundo worker que restaura la misma sala no anota otro punto
+    reiniciada.registrar_restauracion(SALA, salas.obtener(SALA).juego)
+    assert [evento.tipo for evento in indice(reiniciada.ruta(SALA))] == ["P"]
+
+    restaurado = salas.obtener(SALA).juego
+    assert estado(reproducir(reiniciada.ruta(SALA))) == estado(restaurado)
+    jugar(
+        restaurado, 30, semilla=1,
+        al_cantar=lambda palabra: reiniciada.registrar_canto(SALA, palabra),
+        al_siguiente=lambda: reiniciada.registrar_siguiente(SALA)
+    )
+    reiniciada.cerrar()
+    persistencia.cerrar()
+    assert estado(reproducir(reiniciada.ruta(SALA))) == estado(restaurado)
+
+
+def test_repeticion_sin_origen(tmp_path):
+    bitacora = Bitacora(str(tmp_path))
+    bitacora.registrar_canto(SALA, "CASA")
+    bitacora.cerrar()
+    with pytest.raises(ValueError, match="antes que la bitácora"):
+        reproducir(bitacora.ruta(SALA))
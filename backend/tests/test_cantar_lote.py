@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from config import BANCO_PALABRAS
+from conftest import estado
+
+
+def _secuencial(juego, n: int, semilla: int):
+    """Canta palabra a palabra (válidas para el idioma de cada momento) hasta n o un ganador"""
+    rng = random.Random(semilla)
+    palabras, resultados = [], []
+    while len(palabras) < n and juego.juego_activo:
+        idioma = juego.orden_idiomas[juego.idioma_actual_idx]
+        palabra = rng.choice(BANCO_PALABRAS[idioma])
+        resultado = juego.cantar_palabra(palabra, "off")
+        palabras.append(palabra)
+        resultados.append({
+            "palabra": resultado["palabra"],
+            "idioma": resultado["idioma"],
+            "marcados": len(juego.marcados_ultimo_canto()),
+            **({"reinicio_loop": True} if resultado["reinicio_loop"] else {})
+        })
+    return palabras, resultados
+
+
+@pytest.mark.parametrize("motor", ["indice", "bitset"])
+def test_lote_igual_que_cantar_de_a_una(cargar, motor):
+    secuencial = cargar(motor)
+    palabras, resultados = _secuencial(secuencial, 1000, 4)
+    assert not secuencial.juego_activo and any("reinicio_loop" in r for r in resultados)
+
+    # Las palabras de después del ganador no se aplican
+    lote = cargar(motor)
+    sobrantes = BANCO_PALABRAS[lote.orden_idiomas[0]][:5]
+    respuesta = lote.cantar_lote(palabras + sobrantes)
+    assert respuesta["aplicadas"] == len(palabras) and respuesta["recibidas"] == len(palabras) + 5
+    assert respuesta["resultados"] == resultados
+    assert respuesta["hay_ganador"] and respuesta["juego_terminado"]
+    assert respuesta["ganadores"] == secuencial.cambios[-1]["ganadores"]
+    assert respuesta["palabra_invalida"] is None
+    assert estado(lote) == estado(secuencial)
+
+
+def test_lote_se_detiene_en_la_primera_invalida(cargar):
+    secuencial = cargar()
+    palabras, resultados = _secuencial(secuencial, 12, 6)
+
+    lote = cargar()
+    idioma = secuencial.orden_idiomas[secuencial.idioma_actual_idx]
+    ajena = next(p for p in BANCO_PALABRAS[lote.orden_idiomas[1]] if p not in BANCO_PALABRAS[idioma])
+    respuesta = lote.cantar_lote(palabras + [ajena] + palabras[:3])
+    assert respuesta["aplicadas"] == 12 and respuesta["resultados"] == resultados
+    assert respuesta["palabra_invalida"]["indice"] == 12
+    assert respuesta["palabra_invalida"]["palabra"] == ajena
+    assert lote.juego_activo and estado(lote) == estado(secuencial)
+    # Traza solo si se pide
+    assert all("trace" not in r for r in respuesta["resultados"])
+    assert all("trace" in r for r in lote.cantar_lote(palabras[:2], "resumen")["resultados"])
@@ -0,0 +1,55 @@
+import pytest
+
+from config import CASI_GANADORES_MAX_K
+from conftest import jugar
+
+
+def _recorrido(juego):
+    """Cartones por palabras restantes (0..CASI_GANADORES_MAX_K) recorriendo todos"""
+    cubetas = [set() for _ in range(CASI_GANADORES_MAX_K + 1)]
+    for jugador in juego.jugadores:
+        for carton in jugador.cartones:
+            restantes = carton.total_palabras - carton.aciertos
+            if restantes <= CASI_GANADORES_MAX_K:
+                cubetas[restantes].add((jugador.nombre, carton.id))
+    return cubetas
+
+
+def _cubetas(juego):
+    return [
+        {(jugador.nombre, carton.id) for carton, jugador in cubeta.items()}
+        for cubeta in juego.casi_ganadores.cubetas
+    ]
+
+
+@pytest.mark.parametrize("motor", ["indice", "bitset"])
+def test_cubetas_iguales_a_un_recorrido_completo(cargar, motor):
+    juego = cargar(motor)
+    vistas = set()
+    for tramo in range(40):
+        jugar(juego, 5, semilla=tramo)
+        esperadas = _recorrido(juego)
+        assert _cubetas(juego) == esperadas
+        vistas.update(r for r in range(1, CASI_GANADORES_MAX_K + 1) if esperadas[r])
+
+        # Los más cercanos primero, sin pasar del límite
+        casi = juego.get_casi_ganadores(3, 7)
+        assert casi["conteo"] == {r: len(esperadas[r]) for r in (1, 2, 3)}
+        restantes = [c["restantes"] for c in casi["cartones"]]
+        assert restantes == sorted(restantes)
+        assert len(restantes) == min(7, sum(casi["conteo"].values()))
+        for carton in casi["cartones"]:
+            assert (carton["jugador"], carton["carton_id"]) in esperadas[carton["restantes"]]
+            assert len(carton["faltantes"]) == carton["restantes"]
+        if not juego.juego_activo:
+            break
+    assert vistas == set(range(1, CASI_GANADORES_MAX_K + 1))
+
+
+def test_cubetas_al_restaurar(cargar):
+    juego = cargar()
+    jugar(juego, 60)
+    # Reconstruidas de una vez (carga o snapshot): las mismas que las incrementales
+    incrementales = _cubetas(juego)
+    juego._construir_casi_ganadores()
+    assert _cubetas(juego) == incrementales == _recorrido(juego)
@@ -0,0 +1,78 @@
+import itertools
+from collections import Counter, defaultdict
+
+from conftest import REGLAS_CARGA
+from duplicados import buscar_duplicados, buscar_similares
+from game_manager import GameManager
+from parser_cartones import parsear_cartones_paralelo
+
+
+def _parsear(lineas):
+    return list(parsear_cartones_paralelo(lineas, REGLAS_CARGA, {}))
+
+
+def _con_repetidos(lineas):
+    """Un id repetido y dos cartones con las mismas palabras en otro orden"""
+    carton_id, palabras = lineas[4].split(" ", 1)
+    otra = next(l for l in lineas[5:] if l[:2] == carton_id[:2]).split(" ", 1)[1]
+    desordenadas = " ".join(reversed(lineas[9].split()[1:]))
+    return lineas + [f"{carton_id} {otra}", f"{lineas[9][:2]}999999 {desordenadas}\n"]
+
+
+def _grupos(palabras_repetidas):
+    return sorted((g["idioma"], sorted(g["ids"])) for g in palabras_repetidas)
+
+
+def test_duplicados_igual_que_comparar_todos(lineas):
+    cartones = _parsear(_con_repetidos(lineas))
+    informe = buscar_duplicados(cartones)
+
+    veces = Counter(c.id for c in cartones)
+    assert informe["ids_repetidos"] == [{"id": i, "veces": n} for i, n in veces.items() if n > 1]
+    assert informe["total_ids_repetidos"] == 1
+    iguales = defaultdict(list)
+    for carton in cartones:
+        iguales[(carton.idioma, tuple(sorted(carton.palabras)))].append(carton.id)
+    esperados = [{"idioma": idioma, "ids": ids} for (idioma, _), ids in iguales.items() if len(ids) > 1]
+    assert _grupos(informe["palabras_repetidas"]) == _grupos(esperados)
+    assert informe["total_palabras_repetidas"] == sum(len(g["ids"]) - 1 for g in esperados) >= 1
+
+    assert buscar_duplicados(_parsear(lineas)) == {
+        "total_ids_repetidos": 0, "total_palabras_repetidas": 0, "ids_repetidos": [], "palabras_repetidas": []
+    }
+
+
+def test_carga_reporta_o_rechaza(lineas):
+    repetidas = _con_repetidos(lineas)
+    juego = GameManager(nivel_traza="off")
+    exito, mensaje, _ = juego.cargar_cartones_masivos(repetidas, 5, REGLAS_CARGA, {}, "minimo_uno", "rechazar")
+    assert not exito and "duplicados" in mensaje and not juego.jugadores
+
+    exito, _, _ = juego.cargar_cartones_masivos(repetidas, 5, REGLAS_CARGA, {}, "minimo_uno", "reportar")
+    assert exito and juego.duplicados["total_ids_repetidos"] == 1
+
+
+def test_similares_con_minhash(lineas):
+    # Copias de tres cartones con una palabra cambiada (Jaccard alto, no iguales)
+    cartones = _parsear(lineas)
+    parecidas = []
+    for n, original in enumerate(cartones[0:150:50]):
+        banco = {p for c in cartones if c.idioma == original.idioma for p in c.palabras}
+        nueva = min(banco - set(original.palabras))
+        palabras = original.palabras[1:] + [nueva]
+        parecidas.append(f"{original.idioma}9{n:05d} {' '.join(palabras)}\n")
+    cartones = _parsear(lineas + parecidas)
+
+    informe = buscar_similares(cartones, 0.8)
+    conjuntos = {c.id: set(c.palabras) for c in cartones}
+    exactos = []
+    for a, b in itertools.combinations(cartones, 2):
+        if a.idioma == b.idioma:
+            jaccard = len(conjuntos[a.id] & conjuntos[b.id]) / len(conjuntos[a.id] | conjuntos[b.id])
+            if jaccard >= 0.8:
+                exactos.append((a.id, b.id, round(jaccard, 4)))
+    assert len(exactos) >= 3
+    assert sorted((p["a"], p["b"], p["jaccard"]) for p in informe["pares"]) == sorted(exactos)
+    assert informe["total"] == len(exactos) and not informe["truncado"]
+    jaccards = [p["jaccard"] for p in informe["pares"]]
+    assert jaccards == sorted(jaccards, reverse=True)
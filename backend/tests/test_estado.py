@@ -0,0 +1,74 @@
+import random
+from collections import deque
+
+from config import BANCO_PALABRAS
+from conftest import jugar
+
+
+def _cantar(api, sala, rng, n):
+    for _ in range(n):
+        idioma = api.get(f"/api/estado?sala={sala}&jugadores=false").json()["idioma_actual"]["codigo"]
+        api.post(f"/api/cantar-palabra?sala={sala}", json={"palabra": rng.choice(BANCO_PALABRAS[idioma])})
+
+
+def _marcas(datos):
+    return {
+        (jugador["nombre"], carton["id"]): (carton["aciertos"], sorted(carton["palabras_marcadas"]))
+        for jugador in datos["jugadores"] for carton in jugador["cartones"]
+    }
+
+
+def test_etag_y_304(api, sala):
+    respuesta = api.get(f"/api/estado?sala={sala}")
+    etag = respuesta.headers["etag"]
+    assert etag == f'"{respuesta.json()["version"]}"'
+    assert api.get(f"/api/estado?sala={sala}", headers={"If-None-Match": etag}).status_code == 304
+    assert api.get(f"/api/estado?sala={sala}", headers={"If-None-Match": f'"0", W/{etag}'}).status_code == 304
+    # Sin jugadores es otra representación: otro ETag
+    resumen = api.get(f"/api/estado?sala={sala}&jugadores=false", headers={"If-None-Match": etag})
+    assert resumen.status_code == 200 and resumen.headers["etag"] != etag
+
+    _cantar(api, sala, random.Random(1), 1)
+    nueva = api.get(f"/api/estado?sala={sala}", headers={"If-None-Match": etag})
+    assert nueva.status_code == 200
+    assert nueva.json()["version"] > respuesta.json()["version"]
+    api.delete(f"/api/salas/{sala}")
+
+
+def test_delta_desde_una_version(api, sala):
+    antes = api.get(f"/api/estado?sala={sala}").json()
+    rng = random.Random(2)
+    _cantar(api, sala, rng, 6)
+    api.post(f"/api/siguiente-idioma?sala={sala}")
+    idioma = api.get(f"/api/estado?sala={sala}&jugadores=false").json()["idioma_actual"]["codigo"]
+    api.post(f"/api/cantar-lote?sala={sala}", json={"palabras": rng.sample(BANCO_PALABRAS[idioma], 3)})
+    despues = api.get(f"/api/estado?sala={sala}").json()
+
+    delta = api.get(f"/api/estado?sala={sala}&since={antes['version']}").json()
+    assert not delta["completo"] and delta["version"] == despues["version"]
+    assert delta["palabras_cantadas"] == despues["palabras_cantadas"][len(antes["palabras_cantadas"]):]
+    assert delta["idioma_actual"] == despues["idioma_actual"]
+    # Cada cartón que cambió aparece una vez, con sus marcas actuales
+    previas, actuales = _marcas(antes), _marcas(despues)
+    marcados = {
+        (c["jugador"], c["carton_id"]): (c["aciertos"], sorted(c["palabras_marcadas"]))
+        for c in delta["cartones_marcados"]
+    }
+    assert marcados and len(marcados) == len(delta["cartones_marcados"])
+    assert marcados == {clave: valor for clave, valor in actuales.items() if valor != previas[clave]}
+
+    # Al día: delta vacío
+    vacio = api.get(f"/api/estado?sala={sala}&since={despues['version']}").json()
+    assert vacio["palabras_cantadas"] == [] and vacio["cartones_marcados"] == []
+    api.delete(f"/api/salas/{sala}")
+
+
+def test_delta_de_una_version_descartada_es_completo(cargar):
+    juego = cargar()
+    juego.cambios = deque(maxlen=3)
+    inicial = juego.version
+    jugar(juego, 10)
+    assert juego.version_base > inicial
+    cambios = juego.get_cambios_desde(inicial)
+    assert cambios["completo"] and cambios["version"] == juego.version
+    assert cambios["palabras_cantadas"] == juego.palabras_cantadas
@@ -0,0 +1,126 @@
+import itertools
+import os
+import random
+
+import pytest
+
+from config import BANCO_PALABRAS
+from conftest import estado
+from estado_compartido import EstadoCompartido
+from salas import RegistroSalas
+
+SALA = "s"
+_PRUEBAS = itertools.count()
+
+
+@pytest.fixture
+def workers(request):
+    """Dos workers del mismo proceso sobre segmentos propios de la prueba"""
+    prefijo = f"prueba{os.getpid()}_{next(_PRUEBAS)}"
+    a = EstadoCompartido(prefijo, RegistroSalas(), capacidad=request.param)
+    b = EstadoCompartido(prefijo, RegistroSalas(), capacidad=request.param)
+    yield a, b
+    a.eliminar(SALA)
+    b.soltar(SALA)
+
+
+def _cantar(compartido: EstadoCompartido, sala, rng: random.Random):
+    with compartido.escritura(sala):
+        juego = sala.juego
+        if not juego.juego_activo:
+            return
+        if rng.random() < 0.15:
+            if "error" not in juego.siguiente_idioma():
+                compartido.publicar(sala, "S")
+            return
+        idioma = juego.orden_idiomas[juego.idioma_actual_idx]
+        resultado = juego.cantar_palabra(rng.choice(BANCO_PALABRAS[idioma]), "off")
+        if "error" not in resultado:
+            compartido.publicar(sala, "C", resultado["palabra"])
+
+
+def _cubetas(juego):
+    """Casi ganadores por palabras restantes (el orden dentro de una cubeta depende de la llegada)"""
+    return [{carton.id for carton in cubeta} for cubeta in juego.casi_ganadores.cubetas]
+
+
+# 300 bytes obligan a compactar en una generación nueva varias veces
+@pytest.mark.parametrize("workers", [1 << 20, 300], indirect=True)
+def test_otro_worker_ve_los_mismos_cambios(workers, cargar):
+    a, b = workers
+    sala = a.salas.crear(SALA)
+    with a.escritura(sala):
+        sala.juego = cargar(semilla=5)
+        a.nueva_generacion(sala)
+
+    rng = random.Random(0)
+    generaciones = set()
+    for paso in range(80):
+        _cantar(a, sala, rng)
+        generaciones.add(a._salas[SALA].generacion)
+        if paso % 9 == 0:
+            copia = b.sincronizar(SALA, b.salas.obtener(SALA))
+            assert estado(copia.juego) == estado(sala.juego)
+    copia = b.sincronizar(SALA, b.salas.obtener(SALA))
+    assert estado(copia.juego) == estado(sala.juego)
+    assert (len(generaciones) > 1) == (a.capacidad == 300)
+
+
+@pytest.mark.parametrize("workers", [300], indirect=True)
+def test_escrituras_alternadas(workers, cargar):
+    a, b = workers
+    sala_a = a.salas.crear(SALA)
+    with a.escritura(sala_a):
+        sala_a.juego = cargar(semilla=9)
+        a.nueva_generacion(sala_a)
+
+    rng = random.Random(1)
+    sala_b = b.sincronizar(SALA, None)
+    for paso in range(60):
+        # `escritura` aplica lo publicado por el otro worker antes de mutar
+        _cantar(a if paso % 2 else b, sala_a if paso % 2 else sala_b, rng)
+        sala_a = a.sincronizar(SALA, sala_a)
+        sala_b = b.sincronizar(SALA, sala_b)
+    assert estado(sala_a.juego) == estado(sala_b.juego)
+    assert len(sala_a.juego.palabras_cantadas) > 20
+
+
+@pytest.mark.parametrize("workers", [1 << 20], indirect=True)
+def test_las_marcas_se_copian_del_tablero(workers, cargar):
+    a, b = workers
+    sala = a.salas.crear(SALA)
+    with a.escritura(sala):
+        sala.juego = cargar(semilla=5)
+        a.nueva_generacion(sala)
+    copia = b.sincronizar(SALA, None)
+    # El otro worker no vuelve a marcar: registra los cantos y copia las máscaras
+    copia.juego.cantar_palabra = None
+
+    rng = random.Random(3)
+    version = copia.juego.version
+    for paso in range(400):
+        _cantar(a, sala, rng)
+        if paso % 6 == 5 or not sala.juego.juego_activo:
+            copia = b.sincronizar(SALA, copia)
+            assert estado(copia.juego) == estado(sala.juego)
+            assert _cubetas(copia.juego) == _cubetas(sala.juego)
+            delta, esperado = copia.juego.get_cambios_desde(version), sala.juego.get_cambios_desde(version)
+            assert delta["palabras_cantadas"] == esperado["palabras_cantadas"]
+            assert delta["ganadores"] == esperado["ganadores"]
+            marcados = {c["carton_id"]: c["aciertos"] for c in delta["cartones_marcados"]}
+            assert marcados == {c["carton_id"]: c["aciertos"] for c in esperado["cartones_marcados"]}
+            version = copia.juego.version
+        if not sala.juego.juego_activo:
+            break
+    assert not sala.juego.juego_activo
+    assert b._salas[SALA].espejo is not None
+
+
+def test_replicar_no_rebobina_las_versiones(cargar):
+    juego = cargar()
+    ultima = cargar().version
+    # Un cambio replicado de otro worker trae una versión más vieja que el contador del proceso
+    juego.version_replicada = juego.version + 1
+    assert "error" not in juego.siguiente_idioma()
+    assert juego.version < ultima
+    assert cargar().version > ultima
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import generador
+from bancos import RegistroBancos
+from config import REGLAS_TAMANO
+from generador import bancos_para, generar_idioma, lineas_cartones
+
+
+def _filas(n_banco, tamano, n, semilla=0):
+    return np.concatenate(list(generar_idioma(n_banco, tamano, n, np.random.default_rng(semilla))))
+
+
+def test_todos_los_cartones_posibles_sin_repetir(monkeypatch):
+    # Lotes de 5 filas: los repetidos se descartan también entre lotes
+    monkeypatch.setattr(generador, "ELEMENTOS_POR_LOTE", 40)
+    filas = _filas(8, 3, 56)
+    assert filas.dtype == np.uint16 and filas.shape == (56, 3)
+    assert (np.diff(filas.astype(np.int64), axis=1) > 0).all()
+    assert {tuple(f) for f in filas.tolist()} == set(itertools.combinations(range(8), 3))
+
+
+def test_imposibles():
+    with pytest.raises(ValueError):
+        _filas(8, 3, 57)
+    with pytest.raises(ValueError):
+        _filas(5, 6, 1)
+
+
+def test_lineas_unicas_con_ids_secuenciales():
+    reglas = dict(REGLAS_TAMANO)
+    bancos = bancos_para(reglas, RegistroBancos({}))
+    lineas = list(lineas_cartones(bancos, reglas, 300, semilla=11))
+    assert lineas == list(lineas_cartones(bancos, reglas, 300, semilla=11))
+    assert lineas != list(lineas_cartones(bancos, reglas, 300, semilla=12))
+
+    por_idioma = {}
+    for linea in lineas:
+        carton_id, *palabras = linea.split()
+        por_idioma.setdefault(carton_id[:2], []).append((carton_id, tuple(palabras)))
+    assert list(por_idioma) == list(reglas)
+    for idioma, cartones in por_idioma.items():
+        assert [c[0] for c in cartones] == [f"{idioma}{n:06d}" for n in range(1, 301)]
+        assert len({c[1] for c in cartones}) == 300
+        banco = set(bancos[idioma])
+        for _, palabras in cartones:
+            assert len(palabras) == reglas[idioma] and list(palabras) == sorted(set(palabras))
+            assert banco.issuperset(palabras)
+
+
+def test_descarga_txt(api, sala):
+    respuesta = api.post(f"/api/generar-cartones?sala={sala}&n_por_idioma=40&destino=txt&semilla=5")
+    assert respuesta.status_code == 200
+    reglas = dict(REGLAS_TAMANO)
+    assert respuesta.text == "".join(lineas_cartones(bancos_para(reglas, RegistroBancos({})), reglas, 40, 5))
+
+    # Cargados en la sala: sin duplicados
+    cargados = api.post(f"/api/generar-cartones?sala={sala}&n_por_idioma=40&semilla=5&n_jugadores=4")
+    assert cargados.status_code == 200, cargados.text
+    duplicados = api.get(f"/api/duplicados?sala={sala}").json()
+    assert duplicados["total_ids_repetidos"] == duplicados["total_palabras_repetidas"] == 0
+    assert api.get(f"/api/jugadores?sala={sala}&campos=id").json()["total"] == 4
+    api.delete(f"/api/salas/{sala}")
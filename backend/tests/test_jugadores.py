@@ -0,0 +1,54 @@
+import random
+
+from config import BANCO_PALABRAS
+
+
+def _paginas(api, sala, limite, consulta=""):
+    jugadores, cursor, paginas = [], 0, 0
+    while cursor is not None:
+        pagina = api.get(f"/api/jugadores?sala={sala}&limite={limite}&cursor={cursor}{consulta}").json()
+        assert len(pagina["jugadores"]) <= limite
+        jugadores.extend(pagina["jugadores"])
+        cursor = pagina["siguiente"]
+        paginas += 1
+    return jugadores, paginas
+
+
+def test_paginas_con_cursor(api, sala):
+    rng = random.Random(3)
+    for _ in range(8):
+        idioma = api.get(f"/api/estado?sala={sala}&jugadores=false").json()["idioma_actual"]["codigo"]
+        api.post(f"/api/cantar-palabra?sala={sala}", json={"palabra": rng.choice(BANCO_PALABRAS[idioma])})
+    completo = api.get(f"/api/estado?sala={sala}").json()["jugadores"]
+
+    jugadores, paginas = _paginas(api, sala, 3)
+    assert jugadores == completo and paginas == 4
+    assert api.get(f"/api/jugadores?sala={sala}").json() == {"jugadores": completo, "total": 10, "siguiente": None}
+    assert api.get(f"/api/jugador/{completo[6]['nombre']}?sala={sala}").json() == completo[6]
+    assert api.get(f"/api/jugador/Nadie?sala={sala}").status_code == 404
+    api.delete(f"/api/salas/{sala}")
+
+
+def test_proyeccion_y_filtros(api, sala):
+    completo = api.get(f"/api/estado?sala={sala}").json()["jugadores"]
+
+    proyectados, _ = _paginas(api, sala, 4, "&campos=id,aciertos")
+    assert proyectados == [
+        {"nombre": j["nombre"], "cartones": [{"id": c["id"], "aciertos": c["aciertos"]} for c in j["cartones"]]}
+        for j in completo
+    ]
+    assert api.get(f"/api/jugadores?sala={sala}&campos=id,clave").status_code == 400
+    uno = api.get(f"/api/jugador/{completo[0]['nombre']}?sala={sala}&campos=es_ganador").json()
+    assert uno["cartones"] == [{"es_ganador": False}] * len(completo[0]["cartones"])
+
+    # Solo los cartones del idioma; los jugadores sin ninguno no aparecen
+    en, _ = _paginas(api, sala, 4, "&idioma=en&campos=id,idioma")
+    esperados = [
+        {"nombre": j["nombre"], "cartones": [{"id": c["id"], "idioma": "EN"} for c in j["cartones"] if c["idioma"] == "EN"]}
+        for j in completo
+    ]
+    assert en == [j for j in esperados if j["cartones"]]
+    assert api.get(f"/api/jugadores?sala={sala}&ganador=true").json()["jugadores"] == []
+    no_ganadores, _ = _paginas(api, sala, 10, "&ganador=false")
+    assert no_ganadores == completo
+    api.delete(f"/api/salas/{sala}")
@@ -0,0 +1,73 @@
+import io
+import random
+
+import pytest
+
+from conftest import REGLAS_CARGA, estado, jugar
+from game_manager import GameManager
+from mazo_binario import MazoBinario, MazoMatriz, escribir_mazo
+from parser_cartones import parsear_cartones_paralelo
+from persistencia import base_juego
+
+
+def _parsear(lineas):
+    return list(parsear_cartones_paralelo(lineas, REGLAS_CARGA, {}))
+
+
+def _escribir(cartones) -> bytes:
+    salida = io.BytesIO()
+    escribir_mazo(cartones, salida)
+    return salida.getvalue()
+
+
+@pytest.fixture
+def intercaladas(lineas):
+    """Idiomas intercalados, un id repetido y dos cartones con las mismas palabras"""
+    lineas = list(lineas)
+    random.Random(5).shuffle(lineas)
+    carton_id, palabras = lineas[3].split(" ", 1)
+    otra = next(l for l in lineas[4:] if l[:2] == carton_id[:2]).split(" ", 1)[1]
+    return lineas + [f"{carton_id} {otra}", f"{carton_id[:2]}999999 {palabras}"]
+
+
+def test_ida_y_vuelta_en_el_orden_original(intercaladas):
+    cartones = _parsear(intercaladas)
+    mazo = MazoBinario(_escribir(cartones)).construir()
+    assert isinstance(mazo, MazoMatriz)
+    assert not mazo.creados()
+    assert [(c.id, c.idioma, c.palabras) for c in mazo] == [(c.id, c.idioma, c.palabras) for c in cartones]
+    # El mismo cartón cada vez que se pide
+    assert mazo[7] is mazo[7] and mazo[-1] is mazo[len(mazo) - 1]
+
+    # Reescrito desde las matrices, sin crear cartones: el mismo archivo
+    copia = MazoBinario(_escribir(cartones)).construir()
+    assert _escribir(copia) == _escribir(cartones)
+    assert not copia.creados()
+
+
+@pytest.mark.parametrize("motor", ["indice", "bitset"])
+@pytest.mark.parametrize("regla", ["minimo_uno", "uno_por_idioma"])
+def test_carga_binaria_igual_que_la_de_texto(intercaladas, motor, regla):
+    juegos = []
+    for contenido in ("".join(intercaladas), MazoBinario(_escribir(_parsear(intercaladas)))):
+        juego = GameManager(motor=motor, nivel_traza="off")
+        exito, mensaje, _ = juego.cargar_cartones_masivos(contenido, 10, REGLAS_CARGA, {}, regla, semilla=3)
+        assert exito, mensaje
+        juego.iniciar_juego()
+        juegos.append(juego)
+    texto, binario = juegos
+
+    # Reparto, índices, casi ganadores y duplicados salen de las matrices
+    assert not binario.mazo.creados()
+    assert binario.duplicados == texto.duplicados
+    assert binario.duplicados["total_ids_repetidos"] == 1
+    assert binario.duplicados["total_palabras_repetidas"] >= 1
+    assert binario.reparto.huella() == texto.reparto.huella()
+
+    for juego in juegos:
+        jugar(juego, 80)
+    # Las marcas de los snapshots también salen de las matrices
+    assert base_juego(binario)[0]["marcas"] == base_juego(texto)[0]["marcas"]
+    assert len(binario.mazo.creados()) < len(binario.mazo)
+    assert estado(binario) == estado(texto)
+    assert binario.get_casi_ganadores(3, 100) == texto.get_casi_ganadores(3, 100)
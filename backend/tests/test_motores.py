@@ -0,0 +1,50 @@
+import pytest
+
+from conftest import estado, jugar
+
+
+def _esperadas(juego):
+    """Palabras marcadas de cada cartón según las palabras cantadas (recorrido completo)"""
+    cantadas = {(c["idioma"], c["palabra"]) for c in juego.palabras_cantadas}
+    return [
+        [sorted({p for p in carton.palabras if (carton.idioma, p) in cantadas}) for carton in jugador.cartones]
+        for jugador in juego.jugadores
+    ]
+
+
+@pytest.mark.parametrize("regla", ["minimo_uno", "uno_por_idioma"])
+def test_indice_marca_lo_mismo_que_un_recorrido_completo(cargar, regla):
+    juego = cargar("indice", regla)
+    jugar(juego, 2000)
+    assert not juego.juego_activo
+
+    datos = estado(juego)
+    marcadas = [[c["palabras_marcadas"] for c in j["cartones"]] for j in datos["jugadores"]]
+    assert marcadas == _esperadas(juego)
+    # Termina en el primer canto con ganadores: todos los cartones completos, en orden de jugador
+    completos = [
+        {"jugador": jugador.nombre, "carton_id": carton.id}
+        for jugador in juego.jugadores for carton in jugador.cartones
+        if carton.aciertos == carton.total_palabras
+    ]
+    assert completos and juego.cambios[-1]["ganadores"] == completos
+
+
+@pytest.mark.parametrize("regla", ["minimo_uno", "uno_por_idioma"])
+def test_bitset_igual_que_el_indice(cargar, regla):
+    juegos = [cargar("indice", regla), cargar("bitset", regla)]
+    indice, bitset = juegos
+    assert bitset.motor_bitset is not None and bitset.indice_invertido is None
+    for tramo in range(30):
+        for juego in juegos:
+            jugar(juego, 10, semilla=tramo)
+        assert estado(bitset) == estado(indice)
+        assert bitset.get_casi_ganadores(3, 1000) == indice.get_casi_ganadores(3, 1000)
+        if not indice.juego_activo:
+            break
+    assert not bitset.juego_activo
+    assert bitset.cambios[-1]["ganadores"] == indice.cambios[-1]["ganadores"]
+    # Los cartones leen sus marcas de la matriz del motor
+    primero = bitset.jugadores[0].cartones[0]
+    assert primero.motor is not None
+    assert primero.to_dict() == indice.jugadores[0].cartones[0].to_dict()
@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import REGLAS_CARGA
+from parser_cartones import ErrorValidacionCarton, parsear_cartones, parsear_cartones_paralelo
+
+# Fragmentos chicos para que incluso el mazo de prueba pase por el pool de procesos
+PARALELO = {"procesos": 2, "lineas_por_fragmento": 37, "min_lineas": 10}
+
+
+def _cartones(cartones):
+    return [(carton.id, carton.idioma, carton.palabras) for carton in cartones]
+
+
+def test_paralelo_igual_que_secuencial(lineas):
+    secuencial = _cartones(parsear_cartones(lineas, REGLAS_CARGA, {}))
+    paralelo = _cartones(parsear_cartones_paralelo(lineas, REGLAS_CARGA, {}, **PARALELO))
+    assert len(secuencial) == len(lineas)
+    assert paralelo == secuencial
+
+
+def test_paralelo_comparte_vocabularios(lineas):
+    cartones = list(parsear_cartones_paralelo(lineas, REGLAS_CARGA, {}, **PARALELO))
+    por_idioma = {}
+    for carton in cartones:
+        assert por_idioma.setdefault(carton.idioma, carton.vocab) is carton.vocab
+
+
+@pytest.mark.parametrize("posicion", [0, 36, 37, 150])
+def test_paralelo_reporta_la_primera_linea_invalida(lineas, posicion):
+    erroneas = list(lineas)
+    erroneas[posicion] = "SP1 X\n"
+    erroneas[posicion + 40] = "zz\n"
+    errores = []
+    for parsear, opciones in ((parsear_cartones, {}), (parsear_cartones_paralelo, PARALELO)):
+        with pytest.raises(ErrorValidacionCarton) as error:
+            list(parsear(erroneas, REGLAS_CARGA, {}, **opciones))
+        errores.append((error.value.mensaje, error.value.linea))
+    assert errores[0] == errores[1]
+    assert errores[0][1] == posicion + 1
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from config import BANCO_PALABRAS
+from conftest import estado, jugar, subir
+from persistencia import Persistencia
+from salas import RegistroSalas
+
+SALA = "principal"
+
+
+def _guardar(persistencia: Persistencia, juego, pasos: int):
+    """Snapshot de la carga y de cada cambio, como lo hace main.py"""
+    persistencia.guardar_completo(SALA, juego)
+    jugar(
+        juego, pasos,
+        al_cantar=lambda palabra: persistencia.registrar_canto(SALA, juego),
+        al_siguiente=lambda: persistencia.guardar_estado(SALA, juego)
+    )
+    persistencia.sincronizar()
+    persistencia.cerrar()
+
+
+def _restaurar(ruta: str):
+    persistencia = Persistencia(ruta, intervalo=0)
+    salas = RegistroSalas()
+    try:
+        assert persistencia.restaurar(salas) == 1
+    finally:
+        persistencia.cerrar()
+    return salas.obtener(SALA).juego
+
+
+@pytest.mark.parametrize("motor", ["indice", "bitset"])
+@pytest.mark.parametrize("regla", ["minimo_uno", "uno_por_idioma"])
+def test_restaurar_tras_reinicio(tmp_path, cargar, motor, regla):
+    ruta = str(tmp_path / "salas.db")
+    juego = cargar(motor, regla)
+    _guardar(Persistencia(ruta, intervalo=0), juego, 60)
+
+    restaurado = _restaurar(ruta)
+    assert estado(restaurado) == estado(juego)
+    assert restaurado.motor == motor
+    assert restaurado.semilla == juego.semilla
+    assert restaurado.reparto.huella() == juego.reparto.huella()
+    assert [carton.id for carton in restaurado.mazo] == [carton.id for carton in juego.mazo]
+
+
+def test_restaurado_sigue_igual_que_el_original(tmp_path, cargar):
+    ruta = str(tmp_path / "salas.db")
+    juego = cargar()
+    _guardar(Persistencia(ruta, intervalo=0), juego, 20)
+
+    restaurado = _restaurar(ruta)
+    for partida in (juego, restaurado):
+        jugar(partida, 40, semilla=5)
+    assert estado(restaurado) == estado(juego)
+
+
+
+def test_sala_expulsada_vuelve_desde_su_snapshot(tmp_path, monkeypatch, api, lineas):
+    import main
+    persistencia = Persistencia(str(tmp_path / "salas.db"), intervalo=0)
+    monkeypatch.setattr(main, "persistencia", persistencia)
+    for sala_id in ("grande", "otra1", "otra2"):
+        api.post("/api/salas", json={"id": sala_id})
+    assert subir(api, lineas, "grande").status_code == 200
+    rng = random.Random(2)
+    for _ in range(15):
+        idioma = api.get("/api/estado?sala=grande").json()["idioma_actual"]["codigo"]
+        api.post("/api/cantar-palabra?sala=grande", json={"palabra": rng.choice(BANCO_PALABRAS[idioma])})
+    antes = api.get("/api/estado?sala=grande").json()
+
+    # Otra sala carga un mazo que supera el límite de cartones: "grande" sale de memoria
+    monkeypatch.setattr(main.salas, "max_cartones", len(lineas))
+    assert subir(api, lineas, "otra1").status_code == 200
+    assert main.salas.expulsada("grande")
+
+    despues = api.get("/api/estado?sala=grande").json()
+    assert not main.salas.expulsada("grande")
+    for datos in (antes, despues):
+        datos.pop("version")
+    assert despues == antes
+
+    # Solo un DELETE explícito borra el snapshot
+    assert api.delete("/api/salas/grande").status_code == 200
+    persistencia.sincronizar()
+    assert not persistencia.restaurar_sala(main.salas, "grande")
+    for sala_id in ("otra1", "otra2"):
+        api.delete(f"/api/salas/{sala_id}")
+    persistencia.cerrar()
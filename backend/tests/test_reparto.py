@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from conftest import estado, jugar
+from persistencia import base_juego, juego_desde_snapshot, mazo_snapshot
+from reparto import (
+    CartonesAsignados, nombres_jugadores, plan_por_duenos, repartir_minimo_uno, repartir_por_cuotas
+)
+
+NOMBRES = nombres_jugadores(7)
+
+
+def test_minimo_uno_reparte_todo_el_mazo():
+    plan = repartir_minimo_uno(100, NOMBRES, semilla=4)
+    assert sorted(plan.orden.tolist()) == list(range(100))
+    tamanos = np.diff(plan.limites).tolist()
+    assert tamanos == [15, 15] + [14] * 5
+
+
+def test_cuotas_por_idioma():
+    idiomas = ["SP"] * 30 + ["EN"] * 20 + ["DT"] * 5
+    plan = repartir_por_cuotas(idiomas, {"EN": 2, "SP": 3}, NOMBRES[:5], semilla=1)
+    for jugador in range(len(plan)):
+        asignados = [idiomas[i] for i in plan.indices(jugador).tolist()]
+        assert asignados == ["EN"] * 2 + ["SP"] * 3
+    assert len(set(plan.orden.tolist())) == len(plan.orden)
+    with pytest.raises(ValueError, match="DT"):
+        repartir_por_cuotas(idiomas, {"DT": 2}, NOMBRES[:5], semilla=1)
+
+
+def test_misma_semilla_mismo_reparto():
+    a = repartir_minimo_uno(1000, NOMBRES, semilla=9)
+    b = repartir_minimo_uno(1000, NOMBRES, semilla=9)
+    assert a.huella() == b.huella()
+    assert repartir_minimo_uno(1000, NOMBRES, semilla=10).huella() != a.huella()
+    otros = NOMBRES[:-1] + ["Otro"]
+    assert repartir_minimo_uno(1000, otros, semilla=9).huella() != a.huella()
+
+
+def test_la_carga_repite_el_reparto_con_la_semilla(cargar):
+    for regla in ("minimo_uno", "uno_por_idioma"):
+        a, b = cargar(regla=regla, semilla=21), cargar(regla=regla, semilla=21)
+        assert a.reparto.huella() == b.reparto.huella()
+        assert [[c.id for c in j.cartones] for j in a.jugadores] == [[c.id for c in j.cartones] for j in b.jugadores]
+
+
+def test_plan_por_duenos_conserva_el_orden_del_mazo():
+    plan = plan_por_duenos(["A", "B", "C"], [1, -1, 0, 1, 2, -1, 0])
+    assert [plan.indices(i).tolist() for i in range(3)] == [[2, 6], [0, 3], [4]]
+
+
+def test_cartones_siempre_son_vistas(cargar):
+    juego = cargar()
+    assert all(isinstance(j.cartones, CartonesAsignados) for j in juego.jugadores)
+
+    # Snapshot sin huella: los jugadores salen de los dueños guardados (cartones en orden de reparto)
+    jugar(juego, 20)
+    base, _ = base_juego(juego)
+    cartones, duenos = mazo_snapshot(juego.jugadores, juego.mazo, None)
+    config = {**base["config"], "huella": None}
+    restaurado = juego_desde_snapshot(cartones, duenos, config, base["estado"], base["marcas"])
+    assert all(isinstance(j.cartones, CartonesAsignados) for j in restaurado.jugadores)
+    assert estado(restaurado) == estado(juego)
+
+    demo = cargar()
+    demo.fijar_demo(demo.mazo[0])
+    assert isinstance(demo.jugadores[0].cartones, CartonesAsignados)
+    assert list(demo.jugadores[0].cartones) == [demo.mazo[0]]
@@ -0,0 +1,49 @@
+# =============================================================================
+# TRAZAS DEL ALGORITMO - NIVELES Y BUFFER CIRCULAR
+# =============================================================================
+
+from collections import deque
+from typing import List
+
+from config import NIVELES_TRAZA, TRAZA_MAX_MENSAJES
+
+# Niveles numéricos: un mensaje se registra si su nivel <= nivel activo
+TRAZA_OFF = 0
+TRAZA_RESUMEN = 1
+TRAZA_COMPLETO = 2
+
+
+def nivel_traza_valido(nombre: str) -> bool:
+    return nombre in NIVELES_TRAZA
+
+
+class Traza:
+    """
+    Registro de trazas con formato diferido.
+    Los mensajes se guardan como plantilla + argumentos y solo se formatean
+    si el nivel activo los admite; el buffer es circular (acotado).
+    """
+
+    def __init__(self, nivel: str = "resumen", max_mensajes: int = TRAZA_MAX_MENSAJES):
+        self.mensajes = deque(maxlen=max_mensajes)
+        self.nivel = NIVELES_TRAZA.index(nivel)
+
+    def reiniciar(self, nivel: str):
+        """Vacía el buffer y fija el nivel para la siguiente operación"""
+        self.mensajes.clear()
+        self.nivel = NIVELES_TRAZA.index(nivel)
+
+    def activo(self, nivel: int) -> bool:
+        return self.nivel >= nivel
+
+    def registrar(self, nivel: int, mensaje: str, args: tuple):
+        if self.nivel < nivel:
+            return
+        texto = mensaje % args if args else mensaje
+        self.mensajes.append(texto)
+        # Solo el nivel completo hace eco en consola
+        if self.nivel >= TRAZA_COMPLETO:
+            print(f"[ALGORITMO] {texto}")
+
+    def como_lista(self) -> List[str]:
+        return list(self.mensajes)